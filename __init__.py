@@ -1,7 +1,70 @@
-from ._combined_result import CombinedResult
-from ._data_types import Box, AngularTrack
-from ._tracking import Track, TrackUpdate
-from ._vectors import Vec2, Vec3
-from .debugging import *
-from .logic import *
-from .comms import *
\ No newline at end of file
+"""
+3D object tracking tools
+
+Everything is imported on first access, so importing the package (or one of
+its subpackages) stays cheap for short-lived processes.
+"""
+from .logic._lazy import lazy_exports, TYPE_CHECKING
+
+
+__getattr__, __dir__, __all__ = lazy_exports(
+    __name__,
+    {
+        "._combined_result": ("CombinedResult",),
+        "._data_types": ("Box", "AngularTrack"),
+        "._box_array": ("BoxArray",),
+        "._tracking": ("Track", "TrackUpdate", "sample_tracks", "Interpolation"),
+        "._history": ("CompactHistory",),
+        "._kinematics": ("KinematicStats",),
+        "._snapshots": ("SnapshotPublisher", "TrackerSnapshot", "TrackView", "FrozenHistory"),
+        "._lifecycle": ("TrackLifecycle", "LifecycleUpdate"),
+        "._checkpoint": (
+            "CheckpointWriter", "CheckpointState", "Checkpoint", "capture_state",
+            "write_checkpoint", "load_checkpoint", "restore_lifecycle", "encode_checkpoint",
+            "decode_checkpoint",
+        ),
+        "._vectors": ("Vec2", "Vec3"),
+        "._transforms": (
+            "Quaternion", "RigidTransform", "CameraTransforms", "as_array", "to_vec3s",
+            "polar_to_directions",
+        ),
+        "._triangulation": (
+            "triangulate", "rays_to_arrays", "point_ray_distances", "pair_midpoints",
+            "triangulate_robust", "triangulate_results",
+        ),
+        "._correspondence": ("CorrespondenceSolver", "ray_distance_matrix"),
+        "._visibility": ("Frustums",),
+        "._fusion_buffer": ("FusionBuffer", "FusedWindow", "FusionStats", "LatePolicy"),
+        "._sharding": (
+            "ShardMap", "RayRouter", "ShardNode", "ShardMerger", "ShardResults", "FrameSocket",
+            "FrameKind", "encode_rays", "decode_rays", "decode_results",
+        ),
+    },
+    subpackages=(".debugging", ".logic", ".comms")
+)
+
+if TYPE_CHECKING:
+    from ._combined_result import CombinedResult
+    from ._data_types import Box, AngularTrack
+    from ._box_array import BoxArray
+    from ._tracking import Track, TrackUpdate, sample_tracks, Interpolation
+    from ._history import CompactHistory
+    from ._kinematics import KinematicStats
+    from ._snapshots import SnapshotPublisher, TrackerSnapshot, TrackView, FrozenHistory
+    from ._lifecycle import TrackLifecycle, LifecycleUpdate
+    from ._checkpoint import CheckpointWriter, CheckpointState, Checkpoint, capture_state
+    from ._checkpoint import write_checkpoint, load_checkpoint, restore_lifecycle
+    from ._checkpoint import encode_checkpoint, decode_checkpoint
+    from ._vectors import Vec2, Vec3
+    from ._transforms import Quaternion, RigidTransform, CameraTransforms, as_array, to_vec3s
+    from ._transforms import polar_to_directions
+    from ._triangulation import triangulate, rays_to_arrays, point_ray_distances
+    from ._triangulation import pair_midpoints, triangulate_robust, triangulate_results
+    from ._correspondence import CorrespondenceSolver, ray_distance_matrix
+    from ._visibility import Frustums
+    from ._fusion_buffer import FusionBuffer, FusedWindow, FusionStats, LatePolicy
+    from ._sharding import ShardMap, RayRouter, ShardNode, ShardMerger, ShardResults, FrameSocket
+    from ._sharding import FrameKind, encode_rays, decode_rays, decode_results
+    from .debugging import *
+    from .logic import *
+    from .comms import *
@@ -0,0 +1,164 @@
+"""
+_box_array.py
+19. October 2026
+
+many 2d boxes at once, stored as one array
+
+Author:
+Nilusink
+"""
+import typing as tp
+
+import numpy as np
+
+from ._data_types import Box
+from ._vectors import Vec2
+
+
+class BoxArray:
+    """
+    N boxes as an (N, 4) array of (x, y, width, height), where (x, y) is
+    the corner `Box.position` refers to
+    """
+    data: np.ndarray
+
+    def __init__(self, data: np.ndarray | tp.Sequence[tp.Sequence[float]] = ()) -> None:
+        self.data = np.asarray(data, dtype=np.float64).reshape(-1, 4)
+
+    @classmethod
+    def from_boxes(cls, boxes: tp.Iterable[Box]) -> tp.Self:
+        return cls([
+            (box.position.x, box.position.y, box.size.x, box.size.y)
+            for box in boxes
+        ])
+
+    @classmethod
+    def from_corners(cls, corners: np.ndarray) -> tp.Self:
+        """
+        :param corners: (N, 4) array of (x1, y1, x2, y2)
+        """
+        corners = np.asarray(corners, dtype=np.float64).reshape(-1, 4)
+        return cls(np.concatenate((corners[:, :2], corners[:, 2:] - corners[:, :2]), axis=1))
+
+    def to_boxes(self) -> list[Box]:
+        return [
+            Box(Vec2.from_cartesian(x, y), Vec2.from_cartesian(w, h))
+            for x, y, w, h in self.data.tolist()
+        ]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, item: int | slice | np.ndarray) -> tp.Self:
+        """
+        always returns a BoxArray (use `to_boxes` for `Box`es)
+        """
+        return self.__class__(self.data[item])
+
+    def __repr__(self) -> str:
+        return f"BoxArray<{len(self)} boxes>"
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.data[:, :2]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self.data[:, 2:]
+
+    @property
+    def centers(self) -> np.ndarray:
+        return self.data[:, :2] + self.data[:, 2:] / 2
+
+    @property
+    def areas(self) -> np.ndarray:
+        return self.data[:, 2] * self.data[:, 3]
+
+    @property
+    def corners(self) -> np.ndarray:
+        """
+        (N, 4) array of (x1, y1, x2, y2)
+        """
+        return np.concatenate((self.data[:, :2], self.data[:, :2] + self.data[:, 2:]), axis=1)
+
+    def iou(self, other: tp.Self | None = None) -> np.ndarray:
+        """
+        pairwise intersection over union
+
+        :param other: defaults to self
+        :return: (N, M) array
+        """
+        other = self if other is None else other
+        a = self.corners[:, None, :]
+        b = other.corners[None, :, :]
+
+        overlap = (
+            np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+            * np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+        )
+        union = self.areas[:, None] + other.areas[None, :] - overlap
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(union > 0, overlap / union, 0.)
+
+    def nms(
+            self,
+            scores: np.ndarray | tp.Sequence[float],
+            iou_threshold: float = .5,
+            max_boxes: int | None = None
+    ) -> np.ndarray:
+        """
+        non-maximum suppression
+
+        :return: indices of the kept boxes, best score first
+        """
+        order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+        iou = self[order].iou()
+
+        suppressed = np.zeros(len(order), dtype=bool)
+        keep: list[int] = []
+        for i in range(len(order)):
+            if suppressed[i]:
+                continue
+
+            keep.append(i)
+            if max_boxes is not None and len(keep) >= max_boxes:
+                break
+
+            suppressed |= iou[i] > iou_threshold
+
+        return order[keep]
+
+    def match(
+            self,
+            other: tp.Self,
+            iou_threshold: float = .3
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        greedily match boxes of this frame to boxes of another frame,
+        highest IoU first
+
+        :return: (K, 2) array of (index in self, index in other) pairs,
+            unmatched indices of self, unmatched indices of other
+        """
+        iou = self.iou(other)
+
+        rows, cols = np.nonzero(iou >= iou_threshold)
+        order = np.argsort(-iou[rows, cols], kind="stable")
+
+        used_self = np.zeros(len(self), dtype=bool)
+        used_other = np.zeros(len(other), dtype=bool)
+        pairs: list[tuple[int, int]] = []
+
+        for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+            if used_self[r] or used_other[c]:
+                continue
+
+            used_self[r] = used_other[c] = True
+            pairs.append((r, c))
+
+        return (
+            np.array(pairs, dtype=np.intp).reshape(-1, 2),
+            np.flatnonzero(~used_self),
+            np.flatnonzero(~used_other)
+        )
@@ -0,0 +1,435 @@
+"""
+_checkpoint.py
+19. October 2026
+
+binary checkpoints of the full tracker state, for warm restarts
+
+Author:
+Nilusink
+"""
+from threading import Thread, Condition
+from dataclasses import dataclass
+from pathlib import Path
+from time import time
+import typing as tp
+import struct
+import mmap
+import os
+
+import numpy as np
+
+from ._snapshots import TrackerSnapshot
+from ._kinematics import KinematicStats
+from ._lifecycle import TrackLifecycle
+from ._history import CompactHistory
+from ._tracking import Track
+from .debugging import debugger
+
+
+MAGIC = b"TCKP"
+VERSION = 1
+
+# magic, version, number of tracks, tick, next id, time, number of arrays
+_HEADER = struct.Struct("<4sHxxQqqdI")
+
+# name, dtype, shape, offset (from the start of the file)
+_ENTRY = struct.Struct("<32s8sQQQ")
+
+_ALIGN = 64
+
+# length of `KinematicStats.to_state`
+_KINEMATICS_WIDTH = len(KinematicStats().to_state())
+
+# `CompactHistory.to_state` fields: dtype, row width (None: flat)
+_COMPACT_FIELDS: dict[str, tuple[type, int | None]] = {
+    "settings": (np.float64, None),
+    "counters": (np.int64, None),
+    "anchor": (np.float64, None),
+    "key_index": (np.uint32, None),
+    "key_delta": (np.int32, None),
+    "pending": (np.float64, 4),
+    "recent": (np.float64, 4),
+}
+
+
+@dataclass
+class _TrackState:
+    id: int
+    track_type: int
+    hits: int
+    last_hit: int
+    kinematics: np.ndarray
+    history: tp.Callable[[], np.ndarray]  # (n, 5) x, y, z, accuracy, time
+    compact: dict[str, np.ndarray] | None
+
+
+@dataclass
+class CheckpointState:
+    """
+    everything needed to write a checkpoint, captured on the tracker thread
+    """
+    time: float
+    tick: int
+    next_id: int
+    params: tuple[int, int, int]  # promote_hits, degrade_misses, track_timeout
+    tracks: list[_TrackState]
+
+
+def capture_state(
+        lifecycle: TrackLifecycle,
+        snapshot: TrackerSnapshot | None = None,
+        track_ids: tp.Iterable[int] | None = None
+) -> CheckpointState:
+    """
+    Capture the state of all tracks. Only small per track state is copied
+    here, histories of tracks that didn't change since `snapshot` are read
+    from its (immutable) views later, on the writer thread. Pass the
+    snapshot of the current tick, other histories have to be copied.
+
+    :param track_ids: only capture these tracks (default: all)
+    """
+    selected = lifecycle if track_ids is None else (lifecycle.get(tid) for tid in track_ids)
+
+    tracks = []
+    for track in selected:
+        hits, last_hit = lifecycle.counters(track.id)
+
+        view = None if snapshot is None else snapshot.get(track.id)
+        if view is not None and view.version == track.version:
+            history = view.history.to_array
+
+        else:
+            rows = np.array([
+                (*pos.xyz, accuracy, timestamp)
+                for pos, accuracy, timestamp in zip(
+                    track.position_history,
+                    track.accuracy_history,
+                    track.timestamp_history
+                )
+            ], dtype=np.float64).reshape(-1, 5)
+            history = (lambda r: lambda: r)(rows)
+
+        compact = track.compact_history
+        tracks.append(_TrackState(
+            id=track.id,
+            track_type=track.track_type,
+            hits=hits,
+            last_hit=last_hit,
+            kinematics=track.kinematics.to_state(),
+            history=history,
+            compact=None if compact is None else compact.to_state()
+        ))
+
+    return CheckpointState(
+        time=time(),
+        tick=lifecycle.current_tick,
+        next_id=lifecycle.next_id,
+        params=(lifecycle.promote_hits, lifecycle.degrade_misses, lifecycle.track_timeout),
+        tracks=tracks
+    )
+
+
+def encode_checkpoint(state: CheckpointState) -> bytes:
+    """
+    serialize to the checkpoint format (also used for track handoffs)
+    """
+    arrays = _to_arrays(state)
+
+    # layout: header, array table, aligned arrays
+    offset = _align(_HEADER.size + _ENTRY.size * len(arrays))
+    table = []
+    for name, array in arrays.items():
+        table.append((name, array, offset))
+        offset = _align(offset + array.nbytes)
+
+    parts = [_HEADER.pack(
+        MAGIC, VERSION, len(state.tracks), state.tick, state.next_id, state.time, len(arrays)
+    )]
+
+    for name, array, array_offset in table:
+        shape = (*array.shape, 0)[:2] if array.ndim else (1, 0)
+        parts.append(_ENTRY.pack(
+            name.encode(), array.dtype.str.encode(), shape[0], shape[1], array_offset
+        ))
+
+    size = sum(len(part) for part in parts)
+    for _, array, array_offset in table:
+        parts.append(b"\0" * (array_offset - size))
+        parts.append(np.ascontiguousarray(array).tobytes())
+        size = array_offset + array.nbytes
+
+    return b"".join(parts)
+
+
+def write_checkpoint(state: CheckpointState, path: str | os.PathLike) -> None:
+    """
+    write to a temporary file and atomically replace `path`, so a crash
+    never leaves a partial checkpoint behind
+    """
+    path = Path(path)
+    data = encode_checkpoint(state)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as out:
+        out.write(data)
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp, path)
+
+
+@dataclass
+class Checkpoint:
+    """
+    a loaded checkpoint, the arrays are read-only views of the mapped file
+    """
+    time: float
+    tick: int
+    next_id: int
+    n_tracks: int
+    arrays: dict[str, np.ndarray]
+
+    def ragged(self, name: str, index: int) -> np.ndarray:
+        """
+        per track entry of a field that is stored with offsets
+        """
+        offsets = self.arrays[f"{name}.offsets"]
+        return self.arrays[name][offsets[index]:offsets[index + 1]]
+
+    def tracks(
+            self,
+            history_limit: int | None = None,
+            tick: int | None = None
+    ) -> tp.Iterator[tuple[Track, int, int]]:
+        """
+        rebuild the saved tracks
+
+        :param tick: current tick of the receiving lifecycle, the tick of
+            the last hit is moved to it (default: the saved tick)
+        :return: track, hits in a row, tick of the last hit
+        """
+        a = self.arrays
+        shift = 0 if tick is None else tick - self.tick
+
+        for i in range(self.n_tracks):
+            history = self.ragged("history", i)
+            if history_limit is not None:
+                history = history[-history_limit:]
+
+            compact = None
+            if a["compacted"][i]:
+                compact = CompactHistory.from_state({
+                    name: self.ragged(f"compact.{name}", i) for name in _COMPACT_FIELDS
+                })
+
+            track = Track.restore(
+                int(a["ids"][i]),
+                int(a["track_types"][i]),
+                history[:, :3],
+                history[:, 3],
+                KinematicStats.from_state(a["kinematics"][i]),
+                compact,
+                history[:, 4]
+            )
+            yield track, int(a["hits"][i]), int(a["last_hit"][i]) + shift
+
+
+def decode_checkpoint(data: bytes | mmap.mmap) -> Checkpoint:
+    """
+    parse the checkpoint format without copying the arrays
+    """
+    magic, version, n_tracks, tick, next_id, t, n_arrays = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("data isn't a tracker checkpoint")
+
+    if version != VERSION:
+        raise ValueError(f"unsupported checkpoint version {version}")
+
+    arrays = {}
+    for i in range(n_arrays):
+        name, dtype, dim0, dim1, offset = _ENTRY.unpack_from(data, _HEADER.size + i * _ENTRY.size)
+        shape = (dim0, dim1) if dim1 else (dim0,)
+
+        arrays[name.rstrip(b"\0").decode()] = np.frombuffer(
+            data,
+            dtype=np.dtype(dtype.rstrip(b"\0").decode()),
+            count=int(np.prod(shape)),
+            offset=offset
+        ).reshape(shape)
+
+    return Checkpoint(time=t, tick=tick, next_id=next_id, n_tracks=n_tracks, arrays=arrays)
+
+
+def load_checkpoint(path: str | os.PathLike) -> Checkpoint:
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return decode_checkpoint(data)
+
+
+def restore_lifecycle(
+        path: str | os.PathLike,
+        history_limit: int | None = None,
+        **lifecycle_kwargs
+) -> TrackLifecycle:
+    """
+    rebuild all tracks and their lifecycle state from a checkpoint
+
+    :param history_limit: only restore the most recent positions of every
+        track (compacted paths are always restored completely). Every
+        restored position becomes a `Vec3` (a few µs each), so this is what
+        keeps restoring long histories fast.
+    :param lifecycle_kwargs: override the saved lifecycle parameters
+    """
+    checkpoint = load_checkpoint(path)
+
+    promote_hits, degrade_misses, track_timeout = checkpoint.arrays["params"].tolist()
+    lifecycle = TrackLifecycle(**{
+        "promote_hits": promote_hits,
+        "degrade_misses": degrade_misses,
+        "track_timeout": track_timeout,
+        "capacity": max(checkpoint.n_tracks, 1),
+        "start_tick": checkpoint.tick,
+        **lifecycle_kwargs
+    })
+
+    for track, hits, last_hit in checkpoint.tracks(history_limit):
+        lifecycle.add_track(track, hits, last_hit)
+
+    lifecycle.next_id = checkpoint.next_id
+    return lifecycle
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints on a background thread. The tracker thread calls
+    `maybe_submit` every tick, which only captures the state every
+    `interval` seconds. If the writer falls behind, only the newest state
+    is written.
+    """
+    def __init__(self, path: str | os.PathLike, interval: float = 5.) -> None:
+        self.path = Path(path)
+        self.interval = interval
+
+        self._condition = Condition()
+        self._pending: CheckpointState | None = None
+        self._running = True
+        self._last_submit = -float("inf")
+        self._written = 0
+
+        self._thread = Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    def maybe_submit(
+            self,
+            lifecycle: TrackLifecycle,
+            snapshot: TrackerSnapshot | None = None,
+            now: float | None = None
+    ) -> bool:
+        """
+        :return: True if a checkpoint was submitted
+        """
+        now = time() if now is None else now
+        if now - self._last_submit < self.interval:
+            return False
+
+        self._last_submit = now
+        self.submit(capture_state(lifecycle, snapshot))
+        return True
+
+    def submit(self, state: CheckpointState) -> None:
+        with self._condition:
+            self._pending = state
+            self._condition.notify()
+
+    def close(self, flush: bool = True) -> None:
+        """
+        stop the writer thread, writing the last submitted state if `flush`
+        """
+        with self._condition:
+            if not flush:
+                self._pending = None
+
+            self._running = False
+            self._condition.notify()
+
+        self._thread.join()
+
+    # internal functions
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None and self._running:
+                    self._condition.wait()
+
+                state, self._pending = self._pending, None
+                if state is None:
+                    return
+
+            try:
+                write_checkpoint(state, self.path)
+                self._written += 1
+
+            except Exception as e:
+                # keep the thread alive, the next state may well be writable
+                debugger.error(f"failed to write checkpoint: {e!r}")
+
+
+# internal functions
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _ragged(
+        parts: list[np.ndarray],
+        dtype: type,
+        width: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    concatenate per track arrays, with offsets (n + 1,) into the result
+    """
+    shape = (-1,) if width is None else (-1, width)
+    parts = [np.asarray(part, dtype=dtype).reshape(shape) for part in parts]
+
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(part) for part in parts])
+
+    if not parts:
+        return np.empty((0, *shape[1:]), dtype=dtype), offsets
+
+    return np.concatenate(parts), offsets
+
+
+def _to_arrays(state: CheckpointState) -> dict[str, np.ndarray]:
+    tracks = state.tracks
+    arrays = {
+        "params": np.array(state.params, dtype=np.int64),
+        "ids": np.array([t.id for t in tracks], dtype=np.int64),
+        "track_types": np.array([t.track_type for t in tracks], dtype=np.int8),
+        "hits": np.array([t.hits for t in tracks], dtype=np.int32),
+        "last_hit": np.array([t.last_hit for t in tracks], dtype=np.int64),
+        "kinematics": np.array([t.kinematics for t in tracks], dtype=np.float64).reshape(
+            len(tracks), _KINEMATICS_WIDTH
+        ),
+        "compacted": np.array([t.compact is not None for t in tracks], dtype=np.bool_),
+    }
+
+    arrays["history"], arrays["history.offsets"] = _ragged(
+        [t.history() for t in tracks], np.float64, 5
+    )
+
+    for name, (dtype, width) in _COMPACT_FIELDS.items():
+        empty = np.empty(0 if width is None else (0, width))
+        data, offsets = _ragged(
+            [empty if t.compact is None else t.compact[name] for t in tracks],
+            dtype,
+            width
+        )
+        arrays[f"compact.{name}"] = data
+        arrays[f"compact.{name}.offsets"] = offsets
+
+    return arrays
@@ -0,0 +1,252 @@
+"""
+_correspondence.py
+19. October 2026
+
+finds which rays of different cameras look at the same target
+
+Author:
+Nilusink
+"""
+import typing as tp
+
+import numpy as np
+
+from ._triangulation import rays_to_arrays, triangulate, point_ray_distances
+from ._combined_result import CombinedResult
+from ._data_types import AngularTrack
+from ._tracking import TrackUpdate
+from ._vectors import Vec3
+
+
+def ray_distance_matrix(
+        origins_a: np.ndarray,
+        directions_a: np.ndarray,
+        origins_b: np.ndarray,
+        directions_b: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    closest approach of every ray of A to every ray of B
+
+    :param directions_a: normalized (N, 3)
+    :param directions_b: normalized (M, 3)
+    :return: distances (N, M), depth along the A rays (N, M),
+        depth along the B rays (N, M)
+    """
+    w0 = origins_a[:, None, :] - origins_b[None, :, :]
+    b = directions_a @ directions_b.T
+    d = np.einsum("nk,nmk->nm", directions_a, w0)
+    e = np.einsum("mk,nmk->nm", directions_b, w0)
+
+    # directions are normalized, so a = c = 1
+    denom = 1 - b ** 2
+    parallel = denom < 1e-12
+    safe = np.where(parallel, 1, denom)
+
+    t = np.where(parallel, 0, (b * e - d) / safe)
+    s = np.where(parallel, e, (e - b * d) / safe)
+
+    closest = (
+        w0
+        + t[..., None] * directions_a[:, None, :]
+        - s[..., None] * directions_b[None, :, :]
+    )
+    return np.linalg.norm(closest, axis=-1), t, s
+
+
+class CorrespondenceSolver:
+    """
+    Groups the rays of all cameras into targets.
+
+    For every camera pair the closest approach distances between all rays
+    are computed in one step and gated by
+
+    * `max_distance`: absolute closest approach distance
+    * `max_angle`: closest approach distance / depth (how far the ray of
+      one camera misses the other one, as seen from the camera)
+    * `min_depth` / `max_depth`: the target has to be in front of both
+      cameras and not too far away
+
+    Every gated pair is a target hypothesis (the midpoint of its closest
+    approach). All hypotheses are scored against all rays at once by the
+    number of cameras that have a ray passing within `max_distance`, then
+    accepted best first, each ray being used by one target only.
+    """
+    def __init__(
+            self,
+            max_distance: float = .5,
+            max_angle: float = .02,
+            min_depth: float = .1,
+            max_depth: float = 1000,
+            min_cameras: int = 2
+    ) -> None:
+        self.max_distance = max_distance
+        self.max_angle = max_angle
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.min_cameras = min_cameras
+
+    def candidate_pairs(
+            self,
+            origins: np.ndarray,
+            directions: np.ndarray,
+            cams: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        all gated ray pairs between different cameras
+
+        :return: ray indices i (K,), ray indices j (K,), distances (K,),
+            midpoints of the closest approach (K, 3)
+        """
+        by_cam = [np.flatnonzero(cams == cam) for cam in np.unique(cams)]
+
+        pairs_i, pairs_j, costs, points = [], [], [], []
+        for a in range(len(by_cam)):
+            for b in range(a + 1, len(by_cam)):
+                ia, ib = by_cam[a], by_cam[b]
+                dist, t, s = ray_distance_matrix(
+                    origins[ia], directions[ia], origins[ib], directions[ib]
+                )
+
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    gate = (
+                        (dist <= self.max_distance)
+                        & (t >= self.min_depth) & (t <= self.max_depth)
+                        & (s >= self.min_depth) & (s <= self.max_depth)
+                        & (dist / t <= self.max_angle)
+                        & (dist / s <= self.max_angle)
+                    )
+
+                rows, cols = np.nonzero(gate)
+                pairs_i.append(ia[rows])
+                pairs_j.append(ib[cols])
+                costs.append(dist[rows, cols])
+                points.append((
+                    origins[ia[rows]] + t[rows, cols, None] * directions[ia[rows]]
+                    + origins[ib[cols]] + s[rows, cols, None] * directions[ib[cols]]
+                ) / 2)
+
+        if not costs:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, np.empty(0), np.empty((0, 3))
+
+        return (
+            np.concatenate(pairs_i),
+            np.concatenate(pairs_j),
+            np.concatenate(costs),
+            np.concatenate(points)
+        )
+
+    def score_hypotheses(
+            self,
+            points: np.ndarray,
+            origins: np.ndarray,
+            directions: np.ndarray,
+            cams: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        find the closest ray of every camera for every hypothesis
+
+        :return: closest ray per hypothesis and camera (K, C), whether it
+            is within `max_distance` (K, C), its distance (K, C)
+        """
+        distances = point_ray_distances(points[:, None, :], origins[None], directions[None])
+
+        # the target has to be in front of the camera
+        depth = np.sum((points[:, None, :] - origins[None]) * directions[None], axis=-1)
+        distances = np.where(
+            (depth >= self.min_depth) & (depth <= self.max_depth),
+            distances,
+            np.inf
+        )
+
+        unique_cams = np.unique(cams)
+        best = np.empty((len(points), len(unique_cams)), dtype=np.intp)
+        best_dist = np.empty((len(points), len(unique_cams)))
+        for c, cam in enumerate(unique_cams):
+            rays = np.flatnonzero(cams == cam)
+            closest = np.argmin(distances[:, rays], axis=1)
+            best[:, c] = rays[closest]
+            best_dist[:, c] = distances[np.arange(len(points)), rays[closest]]
+
+        return best, best_dist <= self.max_distance, best_dist
+
+    def solve_arrays(
+            self,
+            origins: np.ndarray,
+            directions: np.ndarray,
+            cams: np.ndarray
+    ) -> list[list[int]]:
+        """
+        :param directions: normalized
+        :return: ray indices of every target seen by at least `min_cameras`
+        """
+        cams = np.asarray(cams)
+        _, _, _, points = self.candidate_pairs(origins, directions, cams)
+        if not len(points):
+            return []
+
+        best, ok, best_dist = self.score_hypotheses(points, origins, directions, cams)
+        support = ok.sum(axis=1)
+        mean_dist = np.where(ok, best_dist, 0).sum(axis=1) / np.maximum(support, 1)
+
+        # most cameras first, then the tightest fit
+        order = np.lexsort((mean_dist, -support))
+
+        used = np.zeros(len(origins), dtype=bool)
+        groups: list[list[int]] = []
+        for k in order.tolist():
+            if support[k] < self.min_cameras:
+                break
+
+            members = [int(r) for r in best[k][ok[k]] if not used[r]]
+            if len(members) < self.min_cameras:
+                continue
+
+            # the rays may have been picked for a slightly different point
+            point, _ = triangulate(origins[members], directions[members])
+            distances = point_ray_distances(point, origins[members], directions[members])
+            members = [r for r, d in zip(members, distances.tolist()) if d <= self.max_distance]
+            if len(members) < self.min_cameras:
+                continue
+
+            used[members] = True
+            groups.append(members)
+
+        return groups
+
+    def solve(self, rays: tp.Sequence[AngularTrack]) -> list[CombinedResult]:
+        """
+        :return: one result per target, with an unassigned (-1) track id and
+            the triangulated position
+        """
+        rays = list(rays)
+        if not rays:
+            return []
+
+        origins, directions = rays_to_arrays(rays)
+        cams = np.array([ray.cam_id for ray in rays])
+        groups = self.solve_arrays(origins, directions, cams)
+        if not groups:
+            return []
+
+        # triangulate all clusters at once, padded to the biggest one
+        width = max(len(group) for group in groups)
+        index = np.zeros((len(groups), width), dtype=np.intp)
+        mask = np.zeros((len(groups), width), dtype=bool)
+        for k, group in enumerate(groups):
+            index[k, :len(group)] = group
+            mask[k, :len(group)] = True
+
+        points, _ = triangulate(origins[index], directions[index], mask)
+
+        return [
+            CombinedResult(
+                camera_angles=[rays[i] for i in group],
+                track_update=TrackUpdate(
+                    track_id=-1,
+                    pos=Vec3.from_cartesian(*points[k].tolist()),
+                    track_type=0
+                )
+            )
+            for k, group in enumerate(groups)
+        ]
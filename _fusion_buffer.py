@@ -0,0 +1,261 @@
+"""
+_fusion_buffer.py
+19. October 2026
+
+aligns the rays of asynchronous cameras to common time windows
+
+Author:
+Nilusink
+"""
+from dataclasses import dataclass, field
+from collections import deque
+from bisect import insort
+from time import time
+import typing as tp
+import math as m
+
+from ._data_types import AngularTrack
+from ._vectors import Vec3
+
+
+type LatePolicy = tp.Literal["interpolate", "drop"]
+
+
+@dataclass
+class FusedWindow:
+    index: int
+    time: float  # center of the window
+    rays: list[AngularTrack] = field(default_factory=list)
+    frame_times: dict[int, float] = field(default_factory=dict)  # per camera
+    interpolated: list[int] = field(default_factory=list)  # cameras
+    missing: list[int] = field(default_factory=list)  # cameras
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+
+@dataclass
+class FusionStats:
+    windows: int = 0
+    complete: int = 0
+    deadline: int = 0  # emitted because the deadline expired
+    interpolated: int = 0  # camera frames
+    late: int = 0  # frames dropped because their window was already emitted
+
+
+@dataclass(order=True)
+class _Frame:
+    t: float
+    rays: list[AngularTrack] = field(compare=False)
+    keys: list[tp.Hashable] | None = field(compare=False)
+
+
+class FusionBuffer:
+    """
+    Buffers the frames (all rays of one camera at one time) of every camera
+    in time order and emits them grouped by windows of `window` seconds.
+
+    A window is emitted as soon as every camera in `cameras` sent a frame
+    in or after it, or at the latest `max_latency` seconds after it ended.
+    Per camera the frame closest to the window center is used. A camera
+    without a frame in the window is interpolated between its frames before
+    and after the window (rays are matched by their `keys`, e.g. the camera
+    side track ids, and at most `max_gap` seconds apart) if `late_policy`
+    is "interpolate", otherwise it is reported as missing.
+
+    Frames that arrive after their window was emitted are dropped.
+    """
+    def __init__(
+            self,
+            cameras: tp.Iterable[int],
+            window: float = 1 / 30,
+            max_latency: float = .05,
+            late_policy: LatePolicy = "interpolate",
+            max_gap: float | None = None,
+            max_frames: int = 64
+    ) -> None:
+        self.cameras = set(cameras)
+        self.window = window
+        self.max_latency = max_latency
+        self.late_policy = late_policy
+        self.max_gap = 3 * window if max_gap is None else max_gap
+        self.max_frames = max_frames
+
+        self.stats = FusionStats()
+
+        self._frames: dict[int, deque[_Frame]] = {cam: deque() for cam in self.cameras}
+        self._latest: dict[int, float] = {}
+        self._next_window: int | None = None
+
+    def add_camera(self, cam_id: int) -> None:
+        if cam_id not in self.cameras:
+            self.cameras.add(cam_id)
+            self._frames[cam_id] = deque()
+
+    def remove_camera(self, cam_id: int) -> None:
+        """
+        stop waiting for a camera (e.g. after it disconnected)
+        """
+        self.cameras.discard(cam_id)
+        self._frames.pop(cam_id, None)
+        self._latest.pop(cam_id, None)
+
+    def push(
+            self,
+            cam_id: int,
+            t: float,
+            rays: tp.Sequence[AngularTrack],
+            keys: tp.Sequence[tp.Hashable] | None = None,
+            now: float | None = None
+    ) -> list[FusedWindow]:
+        """
+        add a frame of a camera
+
+        :param t: capture time of the frame
+        :param keys: identifies the target of each ray across frames, only
+            needed for interpolation
+        :return: windows that became ready
+        """
+        if cam_id not in self.cameras:
+            raise KeyError(f"camera {cam_id} isn't expected by this buffer")
+
+        if keys is not None and len(keys) != len(rays):
+            raise ValueError("need one key per ray")
+
+        index = self._index(t)
+        if self._next_window is None:
+            self._next_window = index
+
+        if index < self._next_window:
+            self.stats.late += 1
+            return self.poll(now)
+
+        frames = self._frames[cam_id]
+        insort(frames, _Frame(t, list(rays), None if keys is None else list(keys)))
+        if len(frames) > self.max_frames:
+            frames.popleft()
+
+        self._latest[cam_id] = max(self._latest.get(cam_id, -m.inf), t)
+        return self.poll(now)
+
+    def poll(self, now: float | None = None) -> list[FusedWindow]:
+        """
+        :return: windows that became ready (in order)
+        """
+        if self._next_window is None:
+            return []
+
+        now = time() if now is None else now
+        ready = []
+
+        while True:
+            k = self._next_window
+            start = k * self.window
+
+            reported = all(self._latest.get(cam, -m.inf) >= start for cam in self.cameras)
+            expired = now >= start + self.window + self.max_latency
+            if not (reported or expired):
+                break
+
+            # nothing buffered for this or any later window
+            if not reported and all(
+                    self._latest.get(cam, -m.inf) < start for cam in self.cameras
+            ):
+                self._next_window = self._index(now - self.max_latency)
+                if self._next_window <= k:
+                    self._next_window = k + 1
+
+                continue
+
+            fused = self._fuse(k)
+            self._next_window = k + 1
+            self._discard_before((k + 1) * self.window - self.max_gap)
+
+            if fused.rays or fused.frame_times:
+                self.stats.windows += 1
+                self.stats.complete += fused.complete
+                self.stats.deadline += not reported
+                ready.append(fused)
+
+        return ready
+
+    # internal functions
+    def _index(self, t: float) -> int:
+        return m.floor(t / self.window)
+
+    def _fuse(self, k: int) -> FusedWindow:
+        start = k * self.window
+        end = start + self.window
+        center = start + self.window / 2
+        fused = FusedWindow(index=k, time=center)
+
+        for cam in sorted(self.cameras):
+            frames = self._frames[cam]
+            inside = [f for f in frames if start <= f.t < end]
+
+            if inside:
+                frame = min(inside, key=lambda f: abs(f.t - center))
+                fused.rays.extend(frame.rays)
+                fused.frame_times[cam] = frame.t
+                continue
+
+            rays = None
+            if self.late_policy == "interpolate":
+                rays = self._interpolate(frames, center)
+
+            if rays is None:
+                fused.missing.append(cam)
+                continue
+
+            fused.rays.extend(rays)
+            fused.frame_times[cam] = center
+            fused.interpolated.append(cam)
+            self.stats.interpolated += 1
+
+        return fused
+
+    def _interpolate(self, frames: deque[_Frame], t: float) -> list[AngularTrack] | None:
+        before = next((f for f in reversed(frames) if f.t < t), None)
+        after = next((f for f in frames if f.t > t), None)
+
+        if before is None or after is None or after.t - before.t > self.max_gap:
+            return None
+
+        if before.keys is None or after.keys is None:
+            return None
+
+        f = (t - before.t) / (after.t - before.t)
+        later = dict(zip(after.keys, after.rays))
+
+        rays = []
+        for key, a in zip(before.keys, before.rays):
+            b = later.get(key)
+            if b is None:
+                continue
+
+            direction = _lerp(a.direction, b.direction, f)
+            rays.append(AngularTrack(
+                cam_id=a.cam_id,
+                position=_lerp(a.position, b.position, f),
+                direction=direction / direction.length if direction.length else direction
+            ))
+
+        return rays
+
+    def _discard_before(self, t: float) -> None:
+        """
+        drop frames that can't be used anymore, except the newest one of
+        each camera (needed for interpolation)
+        """
+        for frames in self._frames.values():
+            while len(frames) > 1 and frames[1].t < t:
+                frames.popleft()
+
+
+def _lerp(a: Vec3, b: Vec3, f: float) -> Vec3:
+    return Vec3.from_cartesian(
+        a.x + (b.x - a.x) * f,
+        a.y + (b.y - a.y) * f,
+        a.z + (b.z - a.z) * f
+    )
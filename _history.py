@@ -0,0 +1,215 @@
+"""
+_history.py
+19. October 2026
+
+lossy, error bounded compaction of long position histories
+
+Author:
+Nilusink
+"""
+from collections import deque
+from array import array
+import typing as tp
+
+import numpy as np
+
+from ._vectors import Vec3
+
+
+class CompactHistory:
+    """
+    Stores a path in two tiers:
+
+    * the last `recent_window` samples at full rate and precision
+    * everything older as key points of a streaming simplification
+      (opening window with synchronized distance), quantized to a grid
+      and stored as integer deltas
+
+    Every position returned by `reconstruct` is within `tolerance` of the
+    original sample (simplification error + quantization error).
+    """
+    def __init__(
+            self,
+            tolerance: float = .05,
+            recent_window: int = 300,
+            max_segment: int = 256
+    ) -> None:
+        if tolerance <= 0:
+            raise ValueError("tolerance has to be positive")
+
+        self.tolerance = tolerance
+        self.recent_window = recent_window
+        self.max_segment = max_segment
+
+        # a quarter of the budget goes to the quantization
+        self._quantum = tolerance / 4
+        self._quant_error = self._quantum * np.sqrt(3) / 2
+        self._simplify_tolerance = tolerance - self._quant_error
+
+        self._count = 0
+        self._recent: deque[tuple[int, float, float, float]] = deque()
+
+        # key points: index delta + quantized position delta (x, y, z)
+        self._key_index = array("I")
+        self._key_delta = array("i")
+        self._last_key_index = 0
+        self._last_key_q = (0, 0, 0)
+
+        # open segment of the simplification
+        self._anchor: np.ndarray | None = None
+        self._anchor_index = 0
+        self._pending = np.empty((max_segment, 4), dtype=np.float64)
+        self._n_pending = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def n_keys(self) -> int:
+        return len(self._key_index)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        approximate memory used by the stored samples
+        """
+        return (
+            self._key_index.itemsize * len(self._key_index)
+            + self._key_delta.itemsize * len(self._key_delta)
+            + self._n_pending * 32
+            + len(self._recent) * 32
+        )
+
+    def append(self, pos: Vec3 | tp.Sequence[float]) -> None:
+        xyz = pos.xyz if isinstance(pos, Vec3) else tuple(pos)
+
+        self._recent.append((self._count, *xyz))
+        self._count += 1
+
+        if len(self._recent) > self.recent_window:
+            index, *old = self._recent.popleft()
+            self._simplify(index, np.array(old, dtype=np.float64))
+
+    def reconstruct(self, indices: tp.Sequence[int] | np.ndarray | None = None) -> np.ndarray:
+        """
+        positions of the given sample indices (default: all samples)
+
+        :return: array of shape (n, 3)
+        """
+        if indices is None:
+            indices = np.arange(self._count)
+
+        indices = np.asarray(indices)
+        if indices.size and (indices.min() < 0 or indices.max() >= self._count):
+            raise IndexError("sample index out of range")
+
+        known_index, known_pos = self._known_points()
+
+        return np.stack(
+            [np.interp(indices, known_index, known_pos[:, axis]) for axis in range(3)],
+            axis=-1
+        )
+
+    def to_state(self) -> dict[str, np.ndarray]:
+        """
+        complete internal state as arrays, to restore it with `from_state`
+        """
+        anchor = np.full(3, np.nan) if self._anchor is None else self._anchor
+
+        return {
+            "settings": np.array((self.tolerance, self.recent_window, self.max_segment)),
+            "counters": np.array(
+                (self._count, self._last_key_index, *self._last_key_q, self._anchor_index),
+                dtype=np.int64
+            ),
+            "anchor": anchor.astype(np.float64),
+            "key_index": np.frombuffer(self._key_index, dtype=np.uint32).copy(),
+            "key_delta": np.frombuffer(self._key_delta, dtype=np.int32).copy(),
+            "pending": self._pending[:self._n_pending].copy(),
+            "recent": np.array(self._recent, dtype=np.float64).reshape(-1, 4),
+        }
+
+    @classmethod
+    def from_state(cls, state: tp.Mapping[str, np.ndarray]) -> tp.Self:
+        tolerance, recent_window, max_segment = state["settings"].tolist()
+        history = cls(tolerance, int(recent_window), int(max_segment))
+
+        count, last_key_index, qx, qy, qz, anchor_index = state["counters"].tolist()
+        history._count = count
+        history._last_key_index = last_key_index
+        history._last_key_q = (qx, qy, qz)
+        history._anchor_index = anchor_index
+
+        anchor = np.asarray(state["anchor"], dtype=np.float64)
+        history._anchor = None if np.isnan(anchor).any() else anchor.copy()
+
+        history._key_index.frombytes(np.ascontiguousarray(state["key_index"], dtype=np.uint32).tobytes())
+        history._key_delta.frombytes(np.ascontiguousarray(state["key_delta"], dtype=np.int32).tobytes())
+
+        pending = state["pending"]
+        history._pending[:len(pending)] = pending
+        history._n_pending = len(pending)
+
+        history._recent.extend(
+            (int(row[0]), row[1], row[2], row[3]) for row in state["recent"].tolist()
+        )
+
+        return history
+
+    # internal functions
+    def _known_points(self) -> tuple[np.ndarray, np.ndarray]:
+        key_index = np.cumsum(np.frombuffer(self._key_index, dtype=np.uint32), dtype=np.int64)
+        key_pos = np.cumsum(
+            np.frombuffer(self._key_delta, dtype=np.int32).reshape(-1, 3),
+            axis=0,
+            dtype=np.int64
+        ) * self._quantum
+
+        pending = self._pending[:self._n_pending]
+        recent = np.array(self._recent, dtype=np.float64).reshape(-1, 4)
+
+        return (
+            np.concatenate((key_index, pending[:, 0], recent[:, 0])),
+            np.concatenate((key_pos, pending[:, 1:], recent[:, 1:]))
+        )
+
+    def _simplify(self, index: int, pos: np.ndarray) -> None:
+        if self._anchor is None:
+            self._emit(index, pos)
+            return
+
+        if self._n_pending < self.max_segment and self._segment_fits(index, pos):
+            self._pending[self._n_pending] = (index, *pos)
+            self._n_pending += 1
+            return
+
+        # the segment can't be extended, the last point becomes a key
+        last_index, *last = self._pending[self._n_pending - 1]
+        self._emit(int(last_index), np.array(last))
+
+        self._pending[0] = (index, *pos)
+        self._n_pending = 1
+
+    def _segment_fits(self, index: int, pos: np.ndarray) -> bool:
+        """
+        check if all pending points are within tolerance of anchor -> pos
+        """
+        pending = self._pending[:self._n_pending]
+        t = (pending[:, :1] - self._anchor_index) / (index - self._anchor_index)
+        expected = self._anchor + (pos - self._anchor) * t
+
+        dist = np.linalg.norm(pending[:, 1:] - expected, axis=1)
+        return bool((dist <= self._simplify_tolerance).all())
+
+    def _emit(self, index: int, pos: np.ndarray) -> None:
+        q = tuple(int(v) for v in np.rint(pos / self._quantum))
+
+        self._key_index.append(index - self._last_key_index)
+        self._key_delta.extend(q[i] - self._last_key_q[i] for i in range(3))
+
+        self._last_key_index = index
+        self._last_key_q = q
+
+        self._anchor = pos
+        self._anchor_index = index
+        self._n_pending = 0
@@ -0,0 +1,228 @@
+"""
+_kinematics.py
+19. October 2026
+
+incrementally maintained motion statistics of a track
+
+Author:
+Nilusink
+"""
+import typing as tp
+import math as m
+
+import numpy as np
+
+from ._vectors import Vec3
+
+
+# layout of `KinematicStats.as_row`
+_COLUMNS: dict[str, slice] = {
+    "velocity": slice(0, 3),
+    "acceleration": slice(3, 6),
+    "speed": slice(6, 7),
+    "heading": slice(7, 8),
+    "position_mean": slice(8, 11),
+    "position_variance": slice(11, 14),
+    "accuracy_mean": slice(14, 15),
+    "accuracy_variance": slice(15, 16),
+    "extent_min": slice(16, 19),
+    "extent_max": slice(19, 22),
+    "distance": slice(22, 23),
+    "count": slice(23, 24),
+}
+
+
+class KinematicStats:
+    """
+    Statistics that are updated in O(1) with every position:
+
+    * exponentially weighted velocity and acceleration (weight `alpha`)
+    * running mean / variance (Welford) of position and accuracy
+    * min / max extents and the distance travelled
+
+    Velocities are in units per `dt` (one update if no time is given).
+    """
+    def __init__(self, alpha: float = .3) -> None:
+        self.alpha = alpha
+        self.count = 0
+        self.distance = 0.
+
+        self._last: tuple[float, float, float] | None = None
+        self._last_velocity: tuple[float, float, float] | None = None
+        self._velocity = [0., 0., 0.]
+        self._acceleration = [0., 0., 0.]
+
+        self._mean = [0., 0., 0.]
+        self._m2 = [0., 0., 0.]
+        self._accuracy_mean = 0.
+        self._accuracy_m2 = 0.
+
+        self._min = [m.inf, m.inf, m.inf]
+        self._max = [-m.inf, -m.inf, -m.inf]
+
+    def update(
+            self,
+            pos: Vec3 | tp.Sequence[float],
+            accuracy: float,
+            dt: float = 1.
+    ) -> None:
+        xyz = pos.xyz if isinstance(pos, Vec3) else tuple(pos)
+        self.count += 1
+        n = self.count
+        a = self.alpha
+
+        # running mean / variance and extents
+        for i in range(3):
+            delta = xyz[i] - self._mean[i]
+            self._mean[i] += delta / n
+            self._m2[i] += delta * (xyz[i] - self._mean[i])
+
+            self._min[i] = min(self._min[i], xyz[i])
+            self._max[i] = max(self._max[i], xyz[i])
+
+        delta = accuracy - self._accuracy_mean
+        self._accuracy_mean += delta / n
+        self._accuracy_m2 += delta * (accuracy - self._accuracy_mean)
+
+        # motion, two positions at the same time still moved the track but
+        # give no velocity
+        if self._last is not None:
+            step = [xyz[i] - self._last[i] for i in range(3)]
+            self.distance += m.sqrt(step[0]**2 + step[1]**2 + step[2]**2)
+
+        if self._last is not None and dt > 0:
+            velocity = [s / dt for s in step]
+            if self._last_velocity is None:
+                self._velocity = velocity
+
+            else:
+                for i in range(3):
+                    acceleration = (velocity[i] - self._last_velocity[i]) / dt
+                    self._acceleration[i] += a * (acceleration - self._acceleration[i])
+                    self._velocity[i] += a * (velocity[i] - self._velocity[i])
+
+            self._last_velocity = tuple(velocity)
+
+        self._last = xyz
+
+    @property
+    def velocity(self) -> Vec3:
+        return Vec3.from_cartesian(*self._velocity)
+
+    @property
+    def acceleration(self) -> Vec3:
+        return Vec3.from_cartesian(*self._acceleration)
+
+    @property
+    def speed(self) -> float:
+        return m.sqrt(sum(v**2 for v in self._velocity))
+
+    @property
+    def heading(self) -> float:
+        """
+        direction of the velocity in the xy plane (radian)
+        """
+        return m.atan2(self._velocity[1], self._velocity[0])
+
+    @property
+    def position_mean(self) -> Vec3:
+        return Vec3.from_cartesian(*self._mean)
+
+    @property
+    def position_variance(self) -> tuple[float, float, float]:
+        if self.count < 2:
+            return 0., 0., 0.
+
+        return tuple(v / (self.count - 1) for v in self._m2)
+
+    @property
+    def accuracy_mean(self) -> float:
+        return self._accuracy_mean
+
+    @property
+    def accuracy_variance(self) -> float:
+        if self.count < 2:
+            return 0.
+
+        return self._accuracy_m2 / (self.count - 1)
+
+    @property
+    def extent_min(self) -> Vec3:
+        return Vec3.from_cartesian(*self._min)
+
+    @property
+    def extent_max(self) -> Vec3:
+        return Vec3.from_cartesian(*self._max)
+
+    def as_row(self) -> tuple[float, ...]:
+        """
+        all statistics as one flat row (see `stack`)
+        """
+        return (
+            *self._velocity,
+            *self._acceleration,
+            self.speed,
+            self.heading,
+            *self._mean,
+            *self.position_variance,
+            self._accuracy_mean,
+            self.accuracy_variance,
+            *self._min,
+            *self._max,
+            self.distance,
+            self.count,
+        )
+
+    def to_state(self) -> np.ndarray:
+        """
+        complete internal state, to restore it with `from_state`
+        """
+        nan3 = (m.nan, m.nan, m.nan)
+
+        return np.array((
+            self.alpha,
+            self.count,
+            self.distance,
+            *(nan3 if self._last is None else self._last),
+            *(nan3 if self._last_velocity is None else self._last_velocity),
+            *self._velocity,
+            *self._acceleration,
+            *self._mean,
+            *self._m2,
+            self._accuracy_mean,
+            self._accuracy_m2,
+            *self._min,
+            *self._max,
+        ), dtype=np.float64)
+
+    @classmethod
+    def from_state(cls, state: np.ndarray) -> tp.Self:
+        values = [float(v) for v in state]
+        stats = cls(alpha=values[0])
+        stats.count = int(values[1])
+        stats.distance = values[2]
+
+        stats._last = None if m.isnan(values[3]) else tuple(values[3:6])
+        stats._last_velocity = None if m.isnan(values[6]) else tuple(values[6:9])
+        stats._velocity = values[9:12]
+        stats._acceleration = values[12:15]
+        stats._mean = values[15:18]
+        stats._m2 = values[18:21]
+        stats._accuracy_mean = values[21]
+        stats._accuracy_m2 = values[22]
+        stats._min = values[23:26]
+        stats._max = values[26:29]
+
+        return stats
+
+    @staticmethod
+    def stack(stats: tp.Iterable["KinematicStats"]) -> dict[str, np.ndarray]:
+        """
+        statistics of many tracks as arrays, e.g. {"velocity": (N, 3), "speed": (N,)}
+        """
+        rows = np.array([s.as_row() for s in stats], dtype=np.float64).reshape(-1, 24)
+
+        return {
+            name: rows[:, columns] if columns.stop - columns.start > 1 else rows[:, columns.start]
+            for name, columns in _COLUMNS.items()
+        }
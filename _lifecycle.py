@@ -0,0 +1,291 @@
+"""
+_lifecycle.py
+19. October 2026
+
+promotes, degrades and deletes tracks
+
+Author:
+Nilusink
+"""
+from dataclasses import dataclass, field
+import typing as tp
+
+import numpy as np
+
+from ._kinematics import KinematicStats
+from ._tracking import Track
+from ._vectors import Vec3
+from .logic import TimerWheel
+
+
+@dataclass
+class LifecycleUpdate:
+    tick: int
+    promoted: list[int] = field(default_factory=list)
+    degraded: list[int] = field(default_factory=list)
+    deleted: list[Track] = field(default_factory=list)
+
+
+class TrackLifecycle:
+    """
+    Owns all live tracks and applies the lifecycle rules once per tick:
+
+    * new / degraded -> valid after `promote_hits` hits in a row
+    * new / valid -> degraded after `degrade_misses` ticks without a hit
+    * deleted after `track_timeout` ticks without a hit
+
+    Ticks in which no camera could see a track (see `Frustums.unseen`)
+    don't count as misses, for at most `max_unseen` ticks in a row.
+
+    Hit / miss counters live in arrays indexed by slot, so the rules are
+    evaluated for all affected tracks at once. Each track has a single
+    pending check in a timer wheel, which is only re-armed when it fires,
+    so a tick costs O(hits + expired checks) instead of O(tracks).
+    """
+    def __init__(
+            self,
+            promote_hits: int = 3,
+            degrade_misses: int = 5,
+            track_timeout: int = 20,
+            capacity: int = 64,
+            start_tick: int = 0,
+            max_unseen: int = 100,
+            id_stride: int = 1,
+            id_offset: int = 0
+    ) -> None:
+        """
+        :param start_tick: tick to continue from (e.g. after a restore)
+        :param id_stride: new tracks only get ids ≡ `id_offset` mod
+            `id_stride`, so several lifecycles can create unique ids
+        """
+        if not 0 < degrade_misses <= track_timeout:
+            raise ValueError("degrade_misses has to be in (0, track_timeout]")
+
+        self.promote_hits = promote_hits
+        self.degrade_misses = degrade_misses
+        self.track_timeout = track_timeout
+        self.max_unseen = max_unseen
+        self.id_stride = id_stride
+        self.id_offset = id_offset
+
+        self._tick = start_tick
+        self._next_id = 0
+        self._wheel: TimerWheel[tuple[int, int]] = TimerWheel(start_tick=start_tick)
+
+        self._tracks: list[Track | None] = [None] * capacity
+        self._slots: dict[int, int] = {}
+        self._free: list[int] = list(range(capacity - 1, -1, -1))
+
+        self._hits = np.zeros(capacity, dtype=np.int32)
+        self._last_hit = np.zeros(capacity, dtype=np.int64)
+        self._unseen = np.zeros(capacity, dtype=np.int32)
+        self._types = np.zeros(capacity, dtype=np.int8)
+        self._generation = np.zeros(capacity, dtype=np.int64)
+
+    @property
+    def current_tick(self) -> int:
+        return self._tick
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    @next_id.setter
+    def next_id(self, value: int) -> None:
+        self._next_id = value
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, track_id: int) -> bool:
+        return track_id in self._slots
+
+    def __iter__(self) -> tp.Iterator[Track]:
+        return (self._tracks[slot] for slot in self._slots.values())
+
+    def get(self, track_id: int) -> Track | None:
+        slot = self._slots.get(track_id)
+        return None if slot is None else self._tracks[slot]
+
+    def kinematics(self) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        kinematic statistics of all live tracks as arrays
+
+        :return: track ids (N,), {statistic: (N, ...) array}
+        """
+        tracks = list(self)
+        ids = np.array([track.id for track in tracks], dtype=np.int64)
+
+        return ids, KinematicStats.stack(track.kinematics for track in tracks)
+
+    def new_track(self, pos: Vec3, accuracy: float, timestamp: float | None = None) -> Track:
+        """
+        create and register a new track with the next free id
+        """
+        track_id = self._next_id + (self.id_offset - self._next_id) % self.id_stride
+        while track_id in self._slots:
+            track_id += self.id_stride
+
+        track = Track(track_id, pos, accuracy, 0, timestamp=timestamp)
+        self.add_track(track)
+        return track
+
+    def add_track(self, track: Track, hits: int = 1, last_hit: int | None = None) -> None:
+        """
+        register an existing track
+        """
+        if track.id in self._slots:
+            raise KeyError(f"track {track.id} is already registered")
+
+        if not self._free:
+            self._grow()
+
+        slot = self._free.pop()
+        last_hit = self._tick if last_hit is None else last_hit
+
+        self._slots[track.id] = slot
+        self._tracks[slot] = track
+        self._hits[slot] = hits
+        self._last_hit[slot] = last_hit
+        self._unseen[slot] = 0
+        self._types[slot] = track.track_type
+        self._next_id = max(self._next_id, track.id + 1)
+
+        self._wheel.schedule(
+            (slot, int(self._generation[slot])),
+            last_hit + self._next_check_delay(track.track_type)
+        )
+
+    def remove_track(self, track_id: int) -> Track:
+        slot = self._slots.pop(track_id)
+        track = self._tracks[slot]
+
+        # invalidates the pending timer of this slot
+        self._generation[slot] += 1
+        self._tracks[slot] = None
+        self._free.append(slot)
+
+        return track
+
+    def counters(self, track_id: int) -> tuple[int, int]:
+        """
+        :return: hits in a row, tick of the last hit
+        """
+        slot = self._slots[track_id]
+        return int(self._hits[slot]), int(self._last_hit[slot])
+
+    def tick(
+            self,
+            hit_ids: tp.Iterable[int] = (),
+            unseen_ids: tp.Iterable[int] = ()
+    ) -> LifecycleUpdate:
+        """
+        advance one tick
+
+        :param hit_ids: ids of all tracks that were updated this tick
+        :param unseen_ids: ids of tracks no camera could see this tick
+        """
+        self._tick += 1
+        update = LifecycleUpdate(tick=self._tick)
+
+        # hits, a track hit by several cameras may be listed more than once
+        slots = np.unique(np.fromiter(
+            (self._slots[tid] for tid in hit_ids if tid in self._slots),
+            dtype=np.intp
+        ))
+        if slots.size:
+            # a tick without a hit (that isn't excused as unseen) breaks the row
+            in_a_row = self._last_hit[slots] == self._tick - 1
+            self._hits[slots] = np.where(in_a_row, self._hits[slots] + 1, 1)
+            self._last_hit[slots] = self._tick
+            self._unseen[slots] = 0
+
+            promote = slots[
+                (self._types[slots] != 1)
+                & (self._hits[slots] >= self.promote_hits)
+            ]
+            recovered = promote[self._types[promote] == -1]
+            self._set_types(promote, 1, update.promoted)
+
+            # degraded tracks wait for the (longer) timeout, replace their
+            # timer by the degrade check
+            self._generation[recovered] += 1
+            for slot in recovered.tolist():
+                self._wheel.schedule(
+                    (slot, int(self._generation[slot])),
+                    int(self._last_hit[slot]) + self.degrade_misses
+                )
+
+        # not a miss if nobody could have seen it, shifting the last hit
+        # keeps the pending timers valid (they re-check when they fire)
+        unseen = np.unique(np.fromiter(
+            (self._slots[tid] for tid in unseen_ids if tid in self._slots),
+            dtype=np.intp
+        ))
+        if unseen.size:
+            unseen = unseen[self._last_hit[unseen] != self._tick]
+            excused = unseen[self._unseen[unseen] < self.max_unseen]
+            self._last_hit[excused] += 1
+            self._unseen[unseen] += 1
+
+        # misses, only for tracks whose check expired
+        expired = self._wheel.advance(self._tick)
+        if expired:
+            self._evaluate_expired(np.array(expired, dtype=np.int64), update)
+
+        return update
+
+    # internal functions
+    def _next_check_delay(self, track_type: int) -> int:
+        return self.track_timeout if track_type == -1 else self.degrade_misses
+
+    def _evaluate_expired(self, expired: np.ndarray, update: LifecycleUpdate) -> None:
+        slots = expired[:, 0]
+
+        # drop timers of removed / reused slots
+        slots = slots[self._generation[slots] == expired[:, 1]].astype(np.intp)
+        if not slots.size:
+            return
+
+        misses = self._tick - self._last_hit[slots]
+
+        delete = misses >= self.track_timeout
+        degrade = ~delete & (misses >= self.degrade_misses) & (self._types[slots] != -1)
+
+        for slot in slots[delete]:
+            update.deleted.append(self.remove_track(self._tracks[slot].id))
+
+        degrade_slots = slots[degrade]
+        self._hits[degrade_slots] = 0
+        self._set_types(degrade_slots, -1, update.degraded)
+
+        # re-arm the check of all surviving tracks
+        alive = slots[~delete]
+        deadlines = self._last_hit[alive] + np.where(
+            self._types[alive] == -1,
+            self.track_timeout,
+            self.degrade_misses
+        )
+        for slot, deadline in zip(alive.tolist(), deadlines.tolist()):
+            self._wheel.schedule((slot, int(self._generation[slot])), deadline)
+
+    def _set_types(self, slots: np.ndarray, track_type: int, out: list[int]) -> None:
+        self._types[slots] = track_type
+
+        for slot in slots.tolist():
+            track = self._tracks[slot]
+            track.track_type = track_type
+            out.append(track.id)
+
+    def _grow(self) -> None:
+        old = len(self._tracks)
+        new = old * 2 or 1
+
+        self._tracks.extend([None] * (new - old))
+        self._free.extend(range(new - 1, old - 1, -1))
+
+        for name in ("_hits", "_last_hit", "_unseen", "_types", "_generation"):
+            arr = getattr(self, name)
+            grown = np.zeros(new, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
@@ -0,0 +1,499 @@
+"""
+_sharding.py
+19. October 2026
+
+splits tracking across several tracker nodes by regions of world space
+
+Author:
+Nilusink
+"""
+from pydantic import BaseModel
+from collections import defaultdict
+from enum import IntEnum
+import typing as tp
+import struct
+import socket
+
+import numpy as np
+
+from ._checkpoint import capture_state, encode_checkpoint, decode_checkpoint
+from ._triangulation import point_ray_distances, rays_to_arrays
+from ._lifecycle import TrackLifecycle, LifecycleUpdate
+from .comms import TRes3Data
+from ._data_types import AngularTrack
+from ._tracking import Track
+from ._vectors import Vec3
+from .debugging import debugger
+
+
+class ShardMap:
+    """
+    Grid of `grid` (x, y) regions between `bounds_min` and `bounds_max`,
+    region i is owned by shard i. Points outside of the bounds belong to
+    the closest edge region.
+
+    A track only changes its shard once it is more than `hysteresis` inside
+    of another region, so tracks moving along a border aren't handed back
+    and forth.
+    """
+    def __init__(
+            self,
+            bounds_min: tuple[float, float],
+            bounds_max: tuple[float, float],
+            grid: tuple[int, int] = (2, 1),
+            hysteresis: float = .5
+    ) -> None:
+        self.bounds_min = np.array(bounds_min, dtype=np.float64)
+        self.bounds_max = np.array(bounds_max, dtype=np.float64)
+        self.grid = np.array(grid, dtype=np.int64)
+        self.hysteresis = hysteresis
+
+        self._cell = (self.bounds_max - self.bounds_min) / self.grid
+
+    @property
+    def n_shards(self) -> int:
+        return int(self.grid.prod())
+
+    def shard_of(self, points: np.ndarray) -> np.ndarray:
+        """
+        :param points: (N, 3) or (N, 2)
+        :return: owning shard of every point (N,)
+        """
+        cells = np.floor((np.asarray(points)[:, :2] - self.bounds_min) / self._cell).astype(np.int64)
+        cells = np.clip(cells, 0, self.grid - 1)
+
+        return cells[:, 1] * self.grid[0] + cells[:, 0]
+
+    def region(self, shard: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: (x, y) min, (x, y) max, infinite at the outer edges
+        """
+        cell = np.array((shard % self.grid[0], shard // self.grid[0]))
+        low = self.bounds_min + cell * self._cell
+        high = low + self._cell
+
+        low = np.where(cell == 0, -np.inf, low)
+        high = np.where(cell == self.grid - 1, np.inf, high)
+        return low, high
+
+    def keeps(self, shard: int, points: np.ndarray) -> np.ndarray:
+        """
+        :return: whether `shard` keeps tracks at these points (N,)
+        """
+        low, high = self.region(shard)
+        xy = np.asarray(points)[:, :2]
+
+        return np.all((xy >= low - self.hysteresis) & (xy < high + self.hysteresis), axis=1)
+
+    def crossed(
+            self,
+            origins: np.ndarray,
+            directions: np.ndarray,
+            min_depth: float = .1,
+            max_depth: float = 1000.
+    ) -> np.ndarray:
+        """
+        which regions every ray passes through between `min_depth` and
+        `max_depth` (slab test in the xy plane)
+
+        :return: (N, n_shards)
+        """
+        regions = [self.region(shard) for shard in range(self.n_shards)]
+        low = np.array([r[0] for r in regions])[None]  # (1, S, 2)
+        high = np.array([r[1] for r in regions])[None]
+
+        o = origins[:, None, :2]
+        d = directions[:, None, :2]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t0 = (low - o) / d
+            t1 = (high - o) / d
+
+        # rays parallel to an axis: inside the slab or not at all
+        parallel = d == 0
+        inside = (o >= low) & (o < high)
+        near = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t0, t1))
+        far = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t0, t1))
+
+        enter = np.maximum(near.max(axis=-1), min_depth)
+        leave = np.minimum(far.min(axis=-1), max_depth)
+        return enter <= leave
+
+
+class RayRouter:
+    """
+    Decides which shards get a ray: the shard currently holding the track
+    with the closest predicted position within `gate` of the ray, or, for
+    rays of targets that aren't tracked yet, every shard the ray passes
+    through.
+
+    Which shard holds a track is looked up in `owners` (track id -> shard),
+    pass `ShardMerger.owners` to keep it up to date. The position alone
+    isn't enough, a track near a border stays with its shard until it is
+    `ShardMap.hysteresis` inside of the next region.
+    """
+    def __init__(
+            self,
+            shard_map: ShardMap,
+            gate: float = .5,
+            min_depth: float = .1,
+            max_depth: float = 1000.,
+            owners: dict[int, int] | None = None
+    ) -> None:
+        self.shard_map = shard_map
+        self.gate = gate
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.owners: dict[int, int] = {} if owners is None else owners
+
+    def route(
+            self,
+            origins: np.ndarray,
+            directions: np.ndarray,
+            predicted: np.ndarray | None = None,
+            track_ids: tp.Sequence[int] | np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        :param directions: normalized (N, 3)
+        :param predicted: predicted positions of all tracks (T, 3)
+        :param track_ids: ids of these tracks (T,), required with `predicted`
+        :return: (N, n_shards) which shards get which ray
+        """
+        targets = self.shard_map.crossed(origins, directions, self.min_depth, self.max_depth)
+
+        if predicted is not None and len(predicted):
+            if track_ids is None or len(track_ids) != len(predicted):
+                raise ValueError("every predicted position needs its track id")
+
+            owners = self._owners_of(track_ids, predicted)
+
+            distances = point_ray_distances(predicted[None], origins[:, None], directions[:, None])
+            closest = np.argmin(distances, axis=1)
+            tracked = distances[np.arange(len(origins)), closest] <= self.gate
+
+            targets[tracked] = False
+            targets[np.flatnonzero(tracked), owners[closest[tracked]]] = True
+
+        return targets
+
+    def route_rays(
+            self,
+            rays: tp.Sequence[AngularTrack],
+            predicted: np.ndarray | None = None,
+            track_ids: tp.Sequence[int] | np.ndarray | None = None
+    ) -> dict[int, list[AngularTrack]]:
+        """
+        :return: {shard: rays}
+        """
+        if not rays:
+            return {}
+
+        origins, directions = rays_to_arrays(rays)
+        targets = self.route(origins, directions, predicted, track_ids)
+
+        return {
+            shard: [rays[i] for i in np.flatnonzero(targets[:, shard])]
+            for shard in range(self.shard_map.n_shards)
+            if targets[:, shard].any()
+        }
+
+    # internal functions
+    def _owners_of(
+            self,
+            track_ids: tp.Sequence[int] | np.ndarray,
+            predicted: np.ndarray
+    ) -> np.ndarray:
+        """
+        shard of every track, tracks no shard reported yet go to the shard
+        of their position
+        """
+        owners = np.fromiter(
+            (self.owners.get(int(tid), -1) for tid in track_ids),
+            dtype=np.int64,
+            count=len(predicted)
+        )
+
+        unknown = owners < 0
+        if unknown.any():
+            owners[unknown] = self.shard_map.shard_of(predicted[unknown])
+
+        return owners
+
+
+class ShardResults(BaseModel):
+    shard: int
+    tick: int
+    tracks: list[TRes3Data]
+
+
+class ShardNode:
+    """
+    Tracking state of one shard. New track ids are unique across all
+    shards (the lifecycle of every shard only creates ids ≡ shard index
+    mod n_shards), handed off tracks keep their id.
+    """
+    def __init__(
+            self,
+            shard: int,
+            shard_map: ShardMap,
+            lifecycle: TrackLifecycle | None = None
+    ) -> None:
+        """
+        :param lifecycle: e.g. restored from a checkpoint, its id scheme is
+            set to the one of this shard
+        """
+        self.shard = shard
+        self.shard_map = shard_map
+        self.lifecycle = TrackLifecycle() if lifecycle is None else lifecycle
+
+        self.lifecycle.id_stride = shard_map.n_shards
+        self.lifecycle.id_offset = shard
+
+    def new_track(self, pos: Vec3, accuracy: float, timestamp: float | None = None) -> Track:
+        return self.lifecycle.new_track(pos, accuracy, timestamp)
+
+    def tick(self, hit_ids: tp.Iterable[int] = ()) -> LifecycleUpdate:
+        return self.lifecycle.tick(hit_ids)
+
+    def handoffs(self) -> dict[int, bytes]:
+        """
+        remove all tracks that left this shard
+
+        :return: {shard: serialized tracks}, see `adopt`
+        """
+        tracks = list(self.lifecycle)
+        if not tracks:
+            return {}
+
+        positions = np.array([track.position.xyz for track in tracks], dtype=np.float64)
+        leaving = np.flatnonzero(~self.shard_map.keeps(self.shard, positions))
+        if not leaving.size:
+            return {}
+
+        targets = self.shard_map.shard_of(positions[leaving])
+        by_target: dict[int, list[int]] = defaultdict(list)
+        for i, target in zip(leaving.tolist(), targets.tolist()):
+            by_target[target].append(tracks[i].id)
+
+        payloads = {}
+        for target, ids in by_target.items():
+            payloads[target] = encode_checkpoint(capture_state(self.lifecycle, track_ids=ids))
+
+            for tid in ids:
+                self.lifecycle.remove_track(tid)
+
+            debugger.trace(f"shard {self.shard}: handing {len(ids)} tracks to shard {target}")
+
+        return payloads
+
+    def adopt(self, payload: bytes) -> list[Track]:
+        """
+        take over tracks handed off by another shard
+        """
+        adopted = []
+        for track, hits, last_hit in decode_checkpoint(payload).tracks(tick=self.lifecycle.current_tick):
+            if track.id in self.lifecycle:
+                debugger.warning(f"shard {self.shard}: track {track.id} handed off twice")
+                continue
+
+            self.lifecycle.add_track(track, hits, last_hit)
+            adopted.append(track)
+
+        return adopted
+
+    def results(self) -> ShardResults:
+        return ShardResults(
+            shard=self.shard,
+            tick=self.lifecycle.current_tick,
+            tracks=[
+                TRes3Data(
+                    track_id=track.id,
+                    track_type=track.track_type,
+                    position=track.position.xyz,
+                    accuracy=track.accuracy,
+                    cam_angles=[]
+                )
+                for track in self.lifecycle
+            ]
+        )
+
+
+class ShardMerger:
+    """
+    Merges the results of all shards into one stream of `TRes3Data`. A tick
+    is emitted once every shard reported it, older incomplete ticks are
+    emitted with what arrived once a newer tick is complete or more than
+    `max_pending` ticks are waiting (e.g. a shard stopped reporting or
+    its ticks aren't aligned with the others).
+
+    `owners` holds the shard every track was taken from in the last
+    emitted tick (see `RayRouter`). A track that shows up in two shards (it
+    was handed off during the tick) is taken from that shard as long as it
+    still keeps the track (`ShardMap.keeps`, with hysteresis), else from
+    the one it was handed to.
+    """
+    def __init__(self, shard_map: ShardMap, max_pending: int = 16) -> None:
+        self.shard_map = shard_map
+        self.max_pending = max_pending
+        self.owners: dict[int, int] = {}
+        self._pending: dict[int, dict[int, list[TRes3Data]]] = defaultdict(dict)
+        self._last_emitted = -1
+
+    def add(self, results: ShardResults) -> list[tuple[int, list[TRes3Data]]]:
+        """
+        :return: (tick, merged results) of every tick that became ready
+        """
+        if results.tick <= self._last_emitted:
+            debugger.warning(f"late results of shard {results.shard} for tick {results.tick}")
+            return []
+
+        self._pending[results.tick][results.shard] = results.tracks
+
+        if len(self._pending[results.tick]) == self.shard_map.n_shards:
+            return self._emit(results.tick)
+
+        if len(self._pending) > self.max_pending:
+            oldest = sorted(self._pending)[-self.max_pending - 1]
+            debugger.warning(f"tick {oldest} incomplete, shards {sorted(self._pending[oldest])} reported")
+            return self._emit(oldest)
+
+        return []
+
+    # internal functions
+    def _emit(self, last: int) -> list[tuple[int, list[TRes3Data]]]:
+        """
+        emit all pending ticks up to `last`
+        """
+        ready = []
+        for tick in sorted(t for t in self._pending if t <= last):
+            ready.append((tick, self._merge(self._pending.pop(tick))))
+
+        self._last_emitted = last
+        return ready
+
+    def _merge(self, by_shard: dict[int, list[TRes3Data]]) -> list[TRes3Data]:
+        merged: dict[int, tuple[int, TRes3Data]] = {}
+        duplicates: dict[int, list[tuple[int, TRes3Data]]] = defaultdict(list)
+        for shard, tracks in by_shard.items():
+            for track in tracks:
+                if track.track_id in merged:
+                    duplicates[track.track_id].append((shard, track))
+
+                else:
+                    merged[track.track_id] = (shard, track)
+
+        for tid, others in duplicates.items():
+            merged[tid] = self._resolve(tid, [merged[tid], *others])
+
+        # updated in place, routers may share the dict
+        if len(by_shard) == self.shard_map.n_shards:
+            for tid in self.owners.keys() - merged.keys():
+                del self.owners[tid]
+
+        self.owners.update((tid, shard) for tid, (shard, _) in merged.items())
+
+        return [merged[tid][1] for tid in sorted(merged)]
+
+    def _resolve(self, track_id: int, candidates: list[tuple[int, TRes3Data]]) -> tuple[int, TRes3Data]:
+        """
+        pick one of the results of a track that was reported by several shards
+        """
+        previous = self.owners.get(track_id)
+        keeps = [
+            self.shard_map.keeps(shard, np.array([track.position]))[0]
+            for shard, track in candidates
+        ]
+
+        for (shard, track), kept in zip(candidates, keeps):
+            if shard == previous and kept:
+                return shard, track
+
+        for (shard, track), kept in zip(candidates, keeps):
+            if shard != previous and kept:
+                return shard, track
+
+        return candidates[0]
+
+
+# transport between the shards and the merger
+class FrameKind(IntEnum):
+    HANDOFF = 1
+    RESULTS = 2
+    RAYS = 3
+
+
+# kind, payload length
+_FRAME = struct.Struct("<BI")
+
+# cam id, origin, direction
+_RAY = np.dtype([("cam_id", "<i8"), ("position", "<f8", 3), ("direction", "<f8", 3)])
+
+
+class FrameSocket:
+    """
+    length prefixed frames over a stream socket (e.g. TCP on loopback)
+    """
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self._buffer = bytearray()
+
+    def send(self, kind: FrameKind, payload: bytes) -> None:
+        self.sock.sendall(_FRAME.pack(kind, len(payload)) + payload)
+
+    def send_results(self, results: ShardResults) -> None:
+        self.send(FrameKind.RESULTS, results.model_dump_json().encode())
+
+    def send_rays(self, rays: tp.Sequence[AngularTrack]) -> None:
+        self.send(FrameKind.RAYS, encode_rays(rays))
+
+    def receive(self) -> tuple[FrameKind, bytes] | None:
+        """
+        block until a full frame arrived
+
+        :return: kind, payload, None if the peer closed the connection
+        """
+        while True:
+            if len(self._buffer) >= _FRAME.size:
+                kind, length = _FRAME.unpack_from(self._buffer)
+                end = _FRAME.size + length
+                if len(self._buffer) >= end:
+                    payload = bytes(self._buffer[_FRAME.size:end])
+                    del self._buffer[:end]
+                    return FrameKind(kind), payload
+
+            data = self.sock.recv(1 << 16)
+            if not data:
+                return None
+
+            self._buffer.extend(data)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def encode_rays(rays: tp.Sequence[AngularTrack]) -> bytes:
+    data = np.empty(len(rays), dtype=_RAY)
+    data["cam_id"] = [ray.cam_id for ray in rays]
+    data["position"] = [ray.position.xyz for ray in rays]
+    data["direction"] = [ray.direction.xyz for ray in rays]
+
+    return data.tobytes()
+
+
+def decode_rays(payload: bytes) -> list[AngularTrack]:
+    data = np.frombuffer(payload, dtype=_RAY)
+
+    return [
+        AngularTrack(
+            cam_id,
+            Vec3.from_cartesian(*position),
+            Vec3.from_cartesian(*direction)
+        )
+        for cam_id, position, direction in zip(
+            data["cam_id"].tolist(), data["position"].tolist(), data["direction"].tolist()
+        )
+    ]
+
+
+def decode_results(payload: bytes) -> ShardResults:
+    return ShardResults.model_validate_json(payload)
@@ -0,0 +1,244 @@
+"""
+_snapshots.py
+19. October 2026
+
+immutable snapshots of all tracks, for readers on other threads
+
+Author:
+Nilusink
+"""
+from dataclasses import dataclass
+from types import MappingProxyType
+from time import time
+import typing as tp
+
+import numpy as np
+
+from ._tracking import Track
+
+
+HISTORY_CHUNK = 256
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class FrozenHistory:
+    """
+    Read-only history of a track as (x, y, z, accuracy, time) rows. Completed
+    chunks of `HISTORY_CHUNK` rows are shared between snapshots, only the
+    open tail is copied.
+    """
+    start: int  # lifetime index of the first row
+    chunks: tuple[np.ndarray, ...]
+    tail: np.ndarray
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks) + len(self.tail)
+
+    def to_array(self) -> np.ndarray:
+        """
+        :return: (n, 5) array of x, y, z, accuracy, time
+        """
+        return np.concatenate((*self.chunks, self.tail))
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.to_array()[:, :3]
+
+    @property
+    def accuracies(self) -> np.ndarray:
+        return self.to_array()[:, 3]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.to_array()[:, 4]
+
+
+@dataclass(frozen=True)
+class TrackView:
+    """
+    immutable state of one track at the time of a snapshot
+    """
+    id: int
+    track_type: int
+    version: int
+    position: tuple[float, float, float]
+    accuracy: float
+    history: FrozenHistory
+
+
+@dataclass(frozen=True)
+class TrackerSnapshot:
+    """
+    Consistent, immutable state of all tracks. The arrays are read-only,
+    row i belongs to `ids[i]`.
+    """
+    epoch: int
+    time: float
+    ids: np.ndarray
+    positions: np.ndarray
+    accuracies: np.ndarray
+    track_types: np.ndarray
+    tracks: tp.Mapping[int, TrackView]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, track_id: int) -> TrackView | None:
+        return self.tracks.get(track_id)
+
+
+class _HistoryFreezer:
+    """
+    remembers the frozen chunks of one track object
+    """
+    def __init__(self, track: Track) -> None:
+        self.track = track
+        self.chunks: dict[int, np.ndarray] = {}
+
+    def freeze(self, track: Track) -> FrozenHistory:
+        start = track.history_start
+        end = start + len(track.position_history)
+
+        # trimmed (compacted) history isn't kept
+        first_chunk = start // HISTORY_CHUNK
+        for index in [i for i in self.chunks if i < first_chunk]:
+            del self.chunks[index]
+
+        chunks = []
+        for index in range(first_chunk, end // HISTORY_CHUNK):
+            if index * HISTORY_CHUNK < start:
+                # partially trimmed, its start may still move
+                chunks.append(_frozen(self._rows(
+                    track,
+                    0,
+                    (index + 1) * HISTORY_CHUNK - start
+                )))
+                continue
+
+            if index not in self.chunks:
+                self.chunks[index] = _frozen(self._rows(
+                    track,
+                    index * HISTORY_CHUNK - start,
+                    (index + 1) * HISTORY_CHUNK - start
+                ))
+
+            chunks.append(self.chunks[index])
+
+        tail_start = max(end // HISTORY_CHUNK * HISTORY_CHUNK, start)
+        tail = _frozen(self._rows(track, tail_start - start, end - start))
+
+        return FrozenHistory(start=start, chunks=tuple(chunks), tail=tail)
+
+    @staticmethod
+    def _rows(track: Track, begin: int, end: int) -> np.ndarray:
+        return np.array([
+            (*pos.xyz, accuracy, timestamp)
+            for pos, accuracy, timestamp in zip(
+                track.position_history[begin:end],
+                track.accuracy_history[begin:end],
+                track.timestamp_history[begin:end]
+            )
+        ], dtype=np.float64).reshape(-1, 5)
+
+
+class SnapshotPublisher:
+    """
+    The tracker thread calls `publish` once per tick, readers use `current`
+    without any locking: a snapshot is never modified after it has been
+    published and replacing the reference is atomic.
+
+    Views of tracks that didn't change (same track object and
+    `Track.version`) are reused from the previous snapshot, so publishing
+    mostly costs the changed tracks. A restored track (checkpoint, shard
+    handoff) is a new object, its version starts over.
+    """
+    def __init__(self) -> None:
+        self._epoch = 0
+        self._freezers: dict[int, _HistoryFreezer] = {}
+        self._current = TrackerSnapshot(
+            epoch=0,
+            time=time(),
+            ids=_frozen(np.empty(0, dtype=np.int64)),
+            positions=_frozen(np.empty((0, 3))),
+            accuracies=_frozen(np.empty(0)),
+            track_types=_frozen(np.empty(0, dtype=np.int8)),
+            tracks=MappingProxyType({})
+        )
+
+    @property
+    def current(self) -> TrackerSnapshot:
+        return self._current
+
+    def publish(self, tracks: tp.Iterable[Track]) -> TrackerSnapshot:
+        previous = self._current
+        self._epoch += 1
+
+        views: dict[int, TrackView] = {}
+        changed: list[TrackView] = []
+        changed_rows: list[int] = []
+        for row, track in enumerate(tracks):
+            view = previous.tracks.get(track.id)
+            freezer = self._freezers.get(track.id)
+            if freezer is None or freezer.track is not track:
+                self._freezers[track.id] = _HistoryFreezer(track)
+                view = None
+
+            if view is None or view.version != track.version:
+                view = self._view(track)
+                changed.append(view)
+                changed_rows.append(row)
+
+            views[track.id] = view
+
+        # drop the chunks of deleted tracks
+        for tid in [tid for tid in self._freezers if tid not in views]:
+            del self._freezers[tid]
+
+        ids = np.fromiter(views, dtype=np.int64, count=len(views))
+
+        if np.array_equal(ids, previous.ids):
+            # same tracks in the same order, only patch the changed rows
+            positions = previous.positions.copy()
+            accuracies = previous.accuracies.copy()
+            track_types = previous.track_types.copy()
+
+            if changed:
+                positions[changed_rows] = [v.position for v in changed]
+                accuracies[changed_rows] = [v.accuracy for v in changed]
+                track_types[changed_rows] = [v.track_type for v in changed]
+
+        else:
+            values = list(views.values())
+            positions = np.array([v.position for v in values], dtype=np.float64).reshape(-1, 3)
+            accuracies = np.array([v.accuracy for v in values], dtype=np.float64)
+            track_types = np.array([v.track_type for v in values], dtype=np.int8)
+
+        snapshot = TrackerSnapshot(
+            epoch=self._epoch,
+            time=time(),
+            ids=_frozen(ids),
+            positions=_frozen(positions),
+            accuracies=_frozen(accuracies),
+            track_types=_frozen(track_types),
+            tracks=MappingProxyType(views)
+        )
+
+        # atomic swap, readers see either the old or the new snapshot
+        self._current = snapshot
+        return snapshot
+
+    # internal functions
+    def _view(self, track: Track) -> TrackView:
+        return TrackView(
+            id=track.id,
+            track_type=track.track_type,
+            version=track.version,
+            position=tuple(track.position.xyz),
+            accuracy=track.accuracy,
+            history=self._freezers[track.id].freeze(track)
+        )
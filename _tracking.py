@@ -8,10 +8,22 @@ Author:
 Nilusink
 """
 from dataclasses import dataclass
+from bisect import bisect_right
+from time import time
+import typing as tp
+
+import numpy as np
+
+from ._kinematics import KinematicStats
+from ._history import CompactHistory
 from ._data_types import Vec3
 
 # raise NotImplementedError("not rewritten to 3d")
 
+
+type Interpolation = tp.Literal["linear", "spline"]
+
+
 class Track:
     # movement_threshold: float = 50
     # track_timeout: int = 20
@@ -19,23 +31,98 @@ class Track:
     # last_box: Box
     position_history: list[Vec3]
     accuracy_history: list[float]
+    timestamp_history: list[float]  # capture time of every position
 
     _track_type: int  # -1: degraded, 0: new / unclassified, 1: tracking / valid
     _id: int
+    _compact_history: CompactHistory | None
+    _kinematics: KinematicStats
+    _version: int  # changes with every modification
     # _current_timeout: int
 
-    def __init__(self, track_id: int, pos: Vec3, accuracy: float, track_type: int) -> None:
+    def __init__(
+            self,
+            track_id: int,
+            pos: Vec3,
+            accuracy: float,
+            track_type: int,
+            compact_history: CompactHistory | None = None,
+            timestamp: float | None = None
+    ) -> None:
+        """
+        :param compact_history: if given, the full path is kept compacted in
+            it and `position_history` / `accuracy_history` only hold the most
+            recent samples
+        :param timestamp: capture time of `pos` (default: now)
+        """
         self._id = track_id
         self.position_history = [pos.copy()]
         self.accuracy_history = [accuracy]
+        self.timestamp_history = [time() if timestamp is None else timestamp]
         # self.last_box = box
 
         self._track_type = track_type
 
+        self._compact_history = compact_history
+        if compact_history is not None:
+            compact_history.append(pos)
+
+        self._kinematics = KinematicStats()
+        self._kinematics.update(pos, accuracy)
+        self._version = 0
+
+    @classmethod
+    def restore(
+            cls,
+            track_id: int,
+            track_type: int,
+            positions: np.ndarray,
+            accuracies: np.ndarray,
+            kinematics: KinematicStats,
+            compact_history: CompactHistory | None = None,
+            timestamps: np.ndarray | None = None
+    ) -> tp.Self:
+        """
+        rebuild a track from saved state (see `_checkpoint.py`)
+
+        :param positions: (n, 3) most recent positions, n > 0
+        :param accuracies: (n,)
+        :param timestamps: (n,) (default: all now)
+        """
+        track = cls.__new__(cls)
+        track._id = track_id
+        track._track_type = track_type
+        track.position_history = [Vec3.from_cartesian(*p) for p in positions.tolist()]
+        track.accuracy_history = accuracies.tolist()
+        track.timestamp_history = (
+            [time()] * len(positions) if timestamps is None else timestamps.tolist()
+        )
+        track._compact_history = compact_history
+        track._kinematics = kinematics
+        track._version = 0
+
+        return track
+
     @property
     def track_type(self) -> int:
         return self._track_type
 
+    @track_type.setter
+    def track_type(self, value: int) -> None:
+        self._track_type = value
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def history_start(self) -> int:
+        """
+        lifetime index of `position_history[0]` (not 0 if it was trimmed)
+        """
+        return self.history_length - len(self.position_history)
+
     @property
     def id(self) -> int:
         return self._id
@@ -48,20 +135,102 @@ class Track:
     def accuracy(self) -> float:
         return self.accuracy_history[-1]
 
+    @property
+    def timestamp(self) -> float:
+        return self.timestamp_history[-1]
+
+    @property
+    def kinematics(self) -> KinematicStats:
+        """
+        velocity, acceleration, extents, ... (updated with every position,
+        per second of the timestamps)
+        """
+        return self._kinematics
+
+    @property
+    def compact_history(self) -> CompactHistory | None:
+        return self._compact_history
+
+    @property
+    def history_length(self) -> int:
+        """
+        number of positions recorded over the whole lifetime
+        """
+        if self._compact_history is not None:
+            return len(self._compact_history)
+
+        return len(self.position_history)
+
+    def full_path(self, indices: tp.Sequence[int] | None = None) -> np.ndarray:
+        """
+        positions over the whole lifetime (within the compaction tolerance)
+
+        :return: array of shape (n, 3)
+        """
+        if self._compact_history is not None:
+            return self._compact_history.reconstruct(indices)
+
+        path = np.array([p.xyz for p in self.position_history], dtype=np.float64)
+        return path if indices is None else path[np.asarray(indices)]
+
     def update_track(
             self,
             pos: Vec3,
             accuracy: float,
-            track_type: int | None = None
+            track_type: int | None = None,
+            timestamp: float | None = None
     ) -> None:
         """
         append position to track and optionally update track type
+
+        :param timestamp: capture time of `pos`, not older than the last one
+            (default: now)
         """
+        last = self.timestamp_history[-1]
+        if timestamp is None:
+            timestamp = max(time(), last)
+
+        elif timestamp < last:
+            raise ValueError(f"timestamp {timestamp} is older than the last one ({last})")
+
         if track_type is not None:
             self._track_type = track_type
 
+        self._version += 1
+
         self.position_history.append(pos)
         self.accuracy_history.append(accuracy)
+        self.timestamp_history.append(timestamp)
+        self._kinematics.update(pos, accuracy, dt=timestamp - last)
+
+        if self._compact_history is not None:
+            self._compact_history.append(pos)
+
+            # trim in chunks so appending stays amortized O(1)
+            window = self._compact_history.recent_window
+            if len(self.position_history) > 2 * window:
+                del self.position_history[:-window]
+                del self.accuracy_history[:-window]
+                del self.timestamp_history[:-window]
+
+    def index_at(self, t: float) -> int:
+        """
+        :return: index (into `position_history`) of the last position
+            captured at or before `t`, -1 if there is none
+        """
+        return bisect_right(self.timestamp_history, t) - 1
+
+    def position_at(self, t: float, method: Interpolation = "linear") -> Vec3 | None:
+        """
+        position at time `t`, interpolated between the recorded positions
+        (compacted history has no timestamps, only the recent positions
+        are used)
+
+        :param method: "linear" or "spline" (Catmull-Rom)
+        :return: None if `t` is outside of the recorded time range
+        """
+        _, positions, valid = sample_tracks((self,), t, method)
+        return Vec3.from_cartesian(*positions[0].tolist()) if valid[0] else None
 
     def __repr__(self):
         return f"Track<center: {self.position}, type: {self.track_type}>"
@@ -72,3 +241,83 @@ class TrackUpdate:
     track_id: int
     pos: Vec3
     track_type: int
+
+
+def sample_tracks(
+        tracks: tp.Iterable[Track],
+        t: float,
+        method: Interpolation = "linear"
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    positions of all tracks at time `t`, one binary search per track and
+    the interpolation for all of them at once
+
+    :param method: "linear" or "spline" (Catmull-Rom, using the neighbouring
+        positions for the tangents)
+    :return: ids (N,), positions (N, 3), valid (N,) (False if `t` is outside
+        of the recorded time range of a track, its position is nan)
+    """
+    if method not in ("linear", "spline"):
+        raise ValueError(f"unknown interpolation method {method!r}")
+
+    ids, points, times, valid = [], [], [], []
+    for track in tracks:
+        stamps = track.timestamp_history
+        history = track.position_history
+        n = len(stamps)
+
+        ids.append(track.id)
+        if not n or not stamps[0] <= t <= stamps[-1]:
+            valid.append(False)
+            points.append((0.,) * 12)
+            times.append((0.,) * 4)
+            continue
+
+        # segment k1 -> k2 containing t, k0 and k3 for the tangents
+        k2 = min(max(bisect_right(stamps, t), 1), n - 1)
+        k1 = max(k2 - 1, 0)
+        window = (max(k1 - 1, 0), k1, k2, min(k2 + 1, n - 1))
+
+        valid.append(True)
+        points.append(tuple(c for k in window for c in history[k].xyz))
+        times.append(tuple(stamps[k] for k in window))
+
+    ids = np.array(ids, dtype=np.int64)
+    valid = np.array(valid, dtype=bool)
+    p = np.array(points, dtype=np.float64).reshape(-1, 4, 3)
+    ts = np.array(times, dtype=np.float64).reshape(-1, 4)
+
+    p0, p1, p2, p3 = p[:, 0], p[:, 1], p[:, 2], p[:, 3]
+    t0, t1, t2, t3 = ts[:, 0], ts[:, 1], ts[:, 2], ts[:, 3]
+
+    h = t2 - t1
+    f = _divide(t - t1, h, 1.)[:, None]
+
+    if method == "linear":
+        positions = p1 + (p2 - p1) * f
+
+    else:
+        # non-uniform Catmull-Rom as cubic hermite, tangents scaled to the segment
+        m1 = _divide(p2 - p0, (t2 - t0)[:, None]) * h[:, None]
+        m2 = _divide(p3 - p1, (t3 - t1)[:, None]) * h[:, None]
+
+        f2 = f * f
+        f3 = f2 * f
+        positions = (
+            (2 * f3 - 3 * f2 + 1) * p1
+            + (f3 - 2 * f2 + f) * m1
+            + (-2 * f3 + 3 * f2) * p2
+            + (f3 - f2) * m2
+        )
+
+    positions[~valid] = np.nan
+    return ids, positions, valid
+
+
+# internal functions
+def _divide(a: np.ndarray, b: np.ndarray, default: float = 0.) -> np.ndarray:
+    """
+    a / b, `default` where b is 0 (repeated timestamps)
+    """
+    a, b = np.broadcast_arrays(a, b)
+    return np.divide(a, b, out=np.full(a.shape, default), where=b != 0)
@@ -0,0 +1,299 @@
+"""
+_transforms.py
+19. October 2026
+
+quaternions and rigid transforms, applied to many vectors at once
+
+Author:
+Nilusink
+"""
+from dataclasses import dataclass
+import typing as tp
+import math as m
+
+import numpy as np
+
+from ._data_types import AngularTrack
+from ._vectors import Vec3
+
+if tp.TYPE_CHECKING:
+    from .comms import SInfData
+
+
+type Vectors = np.ndarray | tp.Sequence[Vec3]
+
+
+def as_array(vectors: Vectors | Vec3) -> np.ndarray:
+    """
+    :return: (N, 3) float array, (3,) for a single vector
+    """
+    if isinstance(vectors, np.ndarray):
+        return vectors.astype(np.float64, copy=False)
+
+    if isinstance(vectors, Vec3):
+        return np.array(vectors.xyz, dtype=np.float64)
+
+    vectors = list(vectors)
+    if vectors and isinstance(vectors[0], Vec3):
+        return np.array([v.xyz for v in vectors], dtype=np.float64)
+
+    return np.array(vectors, dtype=np.float64).reshape(-1, 3)
+
+
+def to_vec3s(array: np.ndarray) -> list[Vec3]:
+    return [Vec3.from_cartesian(*row) for row in array.reshape(-1, 3).tolist()]
+
+
+def polar_to_directions(angles: np.ndarray) -> np.ndarray:
+    """
+    unit vectors for (angle_xy, angle_xz) pairs, same convention as
+    `Vec3.from_polar`
+
+    :param angles: (N, 2)
+    :return: (N, 3)
+    """
+    angles = np.asarray(angles, dtype=np.float64).reshape(-1, 2)
+    cos_xz = np.cos(angles[:, 1])
+
+    return np.stack((
+        cos_xz * np.cos(angles[:, 0]),
+        cos_xz * np.sin(angles[:, 0]),
+        np.sin(angles[:, 1])
+    ), axis=1)
+
+
+@dataclass(frozen=True)
+class Quaternion:
+    """
+    unit quaternion w + xi + yj + zk, `a * b` rotates by b first
+    """
+    w: float = 1.
+    x: float = 0.
+    y: float = 0.
+    z: float = 0.
+
+    @classmethod
+    def from_axis_angle(cls, axis: Vec3 | tp.Sequence[float], angle: float) -> tp.Self:
+        axis = np.asarray(axis.xyz if isinstance(axis, Vec3) else axis, dtype=np.float64)
+        norm = np.linalg.norm(axis)
+        if norm == 0:
+            raise ValueError("rotation axis can't be zero")
+
+        s = m.sin(angle / 2) / norm
+        return cls(m.cos(angle / 2), *(axis * s).tolist())
+
+    @classmethod
+    def from_polar(cls, angle_xy: float, angle_xz: float) -> tp.Self:
+        """
+        rotation that turns +x into the direction of
+        `Vec3.from_polar(angle_xy, angle_xz, 1)` (no roll)
+        """
+        return cls.from_axis_angle((0, 0, 1), angle_xy) * cls.from_axis_angle((0, 1, 0), -angle_xz)
+
+    @classmethod
+    def from_direction(cls, direction: Vec3 | tp.Sequence[float]) -> tp.Self:
+        """
+        rotation that turns +x into `direction` (no roll)
+        """
+        x, y, z = direction.xyz if isinstance(direction, Vec3) else direction
+        return cls.from_polar(m.atan2(y, x), m.atan2(z, m.hypot(x, y)))
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> tp.Self:
+        r = np.asarray(matrix, dtype=np.float64)
+        trace = r[0, 0] + r[1, 1] + r[2, 2]
+
+        # branch on the largest component for numerical stability
+        if trace > 0:
+            s = m.sqrt(trace + 1) * 2
+            q = (s / 4, (r[2, 1] - r[1, 2]) / s, (r[0, 2] - r[2, 0]) / s, (r[1, 0] - r[0, 1]) / s)
+
+        elif r[0, 0] > r[1, 1] and r[0, 0] > r[2, 2]:
+            s = m.sqrt(1 + r[0, 0] - r[1, 1] - r[2, 2]) * 2
+            q = ((r[2, 1] - r[1, 2]) / s, s / 4, (r[0, 1] + r[1, 0]) / s, (r[0, 2] + r[2, 0]) / s)
+
+        elif r[1, 1] > r[2, 2]:
+            s = m.sqrt(1 + r[1, 1] - r[0, 0] - r[2, 2]) * 2
+            q = ((r[0, 2] - r[2, 0]) / s, (r[0, 1] + r[1, 0]) / s, s / 4, (r[1, 2] + r[2, 1]) / s)
+
+        else:
+            s = m.sqrt(1 + r[2, 2] - r[0, 0] - r[1, 1]) * 2
+            q = ((r[1, 0] - r[0, 1]) / s, (r[0, 2] + r[2, 0]) / s, (r[1, 2] + r[2, 1]) / s, s / 4)
+
+        return cls(*(float(v) for v in q)).normalized()
+
+    def normalized(self) -> tp.Self:
+        norm = m.sqrt(self.w**2 + self.x**2 + self.y**2 + self.z**2)
+        return self.__class__(self.w / norm, self.x / norm, self.y / norm, self.z / norm)
+
+    def inverse(self) -> tp.Self:
+        return self.__class__(self.w, -self.x, -self.y, -self.z)
+
+    def to_matrix(self) -> np.ndarray:
+        w, x, y, z = self.w, self.x, self.y, self.z
+
+        return np.array([
+            [1 - 2*(y*y + z*z), 2*(x*y - w*z), 2*(x*z + w*y)],
+            [2*(x*y + w*z), 1 - 2*(x*x + z*z), 2*(y*z - w*x)],
+            [2*(x*z - w*y), 2*(y*z + w*x), 1 - 2*(x*x + y*y)],
+        ])
+
+    def rotate(self, vectors: Vectors) -> np.ndarray:
+        """
+        :param vectors: (N, 3) array or Vec3s
+        :return: (N, 3)
+        """
+        return as_array(vectors) @ self.to_matrix().T
+
+    def __mul__(self, other: tp.Self) -> tp.Self:
+        a, b = self, other
+        return self.__class__(
+            a.w*b.w - a.x*b.x - a.y*b.y - a.z*b.z,
+            a.w*b.x + a.x*b.w + a.y*b.z - a.z*b.y,
+            a.w*b.y - a.x*b.z + a.y*b.w + a.z*b.x,
+            a.w*b.z + a.x*b.y - a.y*b.x + a.z*b.w
+        )
+
+
+class RigidTransform:
+    """
+    Rotation (3, 3) followed by a translation (3,). `a @ b` applies b
+    first. Points are rotated and translated, directions only rotated.
+    """
+    __slots__ = ("rotation", "translation")
+
+    def __init__(
+            self,
+            rotation: np.ndarray | Quaternion | None = None,
+            translation: Vec3 | tp.Sequence[float] | np.ndarray = (0., 0., 0.)
+    ) -> None:
+        if rotation is None:
+            rotation = np.eye(3)
+
+        elif isinstance(rotation, Quaternion):
+            rotation = rotation.to_matrix()
+
+        self.rotation = np.array(rotation, dtype=np.float64).reshape(3, 3)
+        self.translation = np.array(as_array(translation)).reshape(3)
+
+        # shared between threads, never modified in place
+        self.rotation.flags.writeable = False
+        self.translation.flags.writeable = False
+
+    @classmethod
+    def identity(cls) -> tp.Self:
+        return cls()
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> tp.Self:
+        """
+        :param matrix: homogeneous (4, 4)
+        """
+        return cls(matrix[:3, :3], matrix[:3, 3])
+
+    @property
+    def quaternion(self) -> Quaternion:
+        return Quaternion.from_matrix(self.rotation)
+
+    def as_matrix(self) -> np.ndarray:
+        """
+        :return: homogeneous (4, 4)
+        """
+        matrix = np.eye(4)
+        matrix[:3, :3] = self.rotation
+        matrix[:3, 3] = self.translation
+        return matrix
+
+    def inverse(self) -> tp.Self:
+        rotation = self.rotation.T
+        return self.__class__(rotation, -(rotation @ self.translation))
+
+    def apply_points(self, points: Vectors) -> np.ndarray | list[Vec3]:
+        """
+        :param points: (N, 3) array or Vec3s
+        :return: same type as the input
+        """
+        result = as_array(points) @ self.rotation.T + self.translation
+        return result if isinstance(points, np.ndarray) else to_vec3s(result)
+
+    def apply_directions(self, directions: Vectors) -> np.ndarray | list[Vec3]:
+        """
+        :param directions: (N, 3) array or Vec3s
+        :return: same type as the input
+        """
+        result = as_array(directions) @ self.rotation.T
+        return result if isinstance(directions, np.ndarray) else to_vec3s(result)
+
+    def __matmul__(self, other: tp.Self) -> tp.Self:
+        return self.__class__(
+            self.rotation @ other.rotation,
+            self.rotation @ other.translation + self.translation
+        )
+
+    def __repr__(self) -> str:
+        return f"RigidTransform<rotation: {self.rotation.tolist()}, translation: {self.translation.tolist()}>"
+
+
+class CameraTransforms:
+    """
+    Camera to world transform of every camera, built from its `SInfData`
+    (position and viewing direction, the camera looks along its +x axis)
+    and only rebuilt if the camera info changed.
+    """
+    def __init__(self) -> None:
+        self._transforms: dict[int, RigidTransform] = {}
+        self._sources: dict[int, tuple] = {}
+
+    def __contains__(self, cam_id: int) -> bool:
+        return cam_id in self._transforms
+
+    def update(self, info: "SInfData") -> RigidTransform:
+        key = (info.position, info.direction)
+        if self._sources.get(info.id) != key:
+            self._sources[info.id] = key
+            self._transforms[info.id] = RigidTransform(
+                Quaternion.from_direction(info.direction),
+                info.position
+            )
+
+        return self._transforms[info.id]
+
+    def set(self, cam_id: int, transform: RigidTransform) -> None:
+        """
+        set a transform directly (e.g. from a calibration with roll)
+        """
+        self._sources[cam_id] = None
+        self._transforms[cam_id] = transform
+
+    def get(self, cam_id: int) -> RigidTransform:
+        try:
+            return self._transforms[cam_id]
+
+        except KeyError:
+            raise KeyError(f"no transform for camera {cam_id}, no sensor info received") from None
+
+    def angles_to_world(self, cam_id: int, angles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param angles: (N, 2) angle_xy, angle_xz in the camera frame
+        :return: origins (N, 3), unit directions in world frame (N, 3)
+        """
+        transform = self.get(cam_id)
+        directions = transform.apply_directions(polar_to_directions(angles))
+
+        return np.broadcast_to(transform.translation, directions.shape), directions
+
+    def to_angular_tracks(
+            self,
+            cam_id: int,
+            angles: tp.Iterable[tuple[float, float]]
+    ) -> list[AngularTrack]:
+        """
+        world frame rays for the `CamAngle.direction`s of one camera
+        """
+        origins, directions = self.angles_to_world(cam_id, np.array(list(angles)))
+        origin = Vec3.from_cartesian(*origins[0].tolist()) if len(origins) else None
+
+        return [
+            AngularTrack(cam_id, origin.copy(), direction)
+            for direction in to_vec3s(directions)
+        ]
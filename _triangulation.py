@@ -0,0 +1,233 @@
+"""
+_triangulation.py
+19. October 2026
+
+least squares (and robust) intersection of camera rays, for many targets
+at once
+
+Author:
+Nilusink
+"""
+import typing as tp
+
+import numpy as np
+
+from ._combined_result import CombinedResult
+from ._data_types import AngularTrack
+
+
+def rays_to_arrays(rays: tp.Iterable[AngularTrack]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: origins (N, 3), normalized directions (N, 3)
+    """
+    data = np.array(
+        [(*ray.position.xyz, *ray.direction.xyz) for ray in rays],
+        dtype=np.float64
+    ).reshape(-1, 6)
+
+    directions = data[:, 3:]
+    norm = np.linalg.norm(directions, axis=1, keepdims=True)
+
+    return data[:, :3], directions / np.where(norm > 0, norm, 1)
+
+
+def point_ray_distances(
+        points: np.ndarray,
+        origins: np.ndarray,
+        directions: np.ndarray
+) -> np.ndarray:
+    """
+    distance of points to rays (treated as infinite lines), broadcasting
+
+    :param directions: normalized
+    """
+    diff = points - origins
+    along = np.sum(diff * directions, axis=-1, keepdims=True)
+
+    return np.linalg.norm(diff - along * directions, axis=-1)
+
+
+def triangulate(
+        origins: np.ndarray,
+        directions: np.ndarray,
+        mask: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Point closest (least squares) to a group of rays, for K groups of up
+    to R rays at once.
+
+    :param origins: (K, R, 3) or (R, 3)
+    :param directions: normalized, same shape as origins
+    :param mask: (K, R) / (R,), which rays belong to the group
+    :return: points (K, 3) / (3,), rms distance of the used rays (K,) / ()
+    """
+    single = origins.ndim == 2
+    if single:
+        origins, directions = origins[None], directions[None]
+        mask = None if mask is None else mask[None]
+
+    if mask is None:
+        mask = np.ones(origins.shape[:2], dtype=bool)
+
+    weights = mask.astype(np.float64)[..., None, None]
+
+    # sum over all rays of (I - d d^T) and (I - d d^T) p
+    projectors = np.eye(3) - directions[..., :, None] * directions[..., None, :]
+    a = np.sum(projectors * weights, axis=1)
+    b = np.sum((projectors @ origins[..., None]) * weights, axis=1)[..., 0]
+
+    # parallel rays give a singular system, fall back to least squares
+    points = np.empty_like(b)
+    regular = np.abs(np.linalg.det(a)) > 1e-12
+    if regular.any():
+        points[regular] = np.linalg.solve(a[regular], b[regular][..., None])[..., 0]
+
+    for k in np.flatnonzero(~regular):
+        points[k] = np.linalg.lstsq(a[k], b[k], rcond=None)[0]
+
+    distances = point_ray_distances(points[:, None, :], origins, directions)
+    used = np.maximum(mask.sum(axis=1), 1)
+    rms = np.sqrt(np.sum(np.where(mask, distances ** 2, 0), axis=1) / used)
+
+    if single:
+        return points[0], rms[0]
+
+    return points, rms
+
+
+def pair_midpoints(
+        origins: np.ndarray,
+        directions: np.ndarray,
+        i: np.ndarray,
+        j: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    midpoints of the closest approach of rays i and j, for K groups at once
+
+    :param origins: (K, R, 3)
+    :param directions: normalized (K, R, 3)
+    :param i: first ray of every pair (P,)
+    :param j: second ray of every pair (P,)
+    :return: midpoints (K, P, 3), False for (nearly) parallel pairs (K, P)
+    """
+    oa, da = origins[:, i], directions[:, i]
+    ob, db = origins[:, j], directions[:, j]
+
+    w0 = oa - ob
+    b = np.sum(da * db, axis=-1)
+    d = np.sum(da * w0, axis=-1)
+    e = np.sum(db * w0, axis=-1)
+
+    denom = 1 - b ** 2
+    valid = denom > 1e-12
+    safe = np.where(valid, denom, 1)
+
+    t = ((b * e - d) / safe)[..., None]
+    s = ((e - b * d) / safe)[..., None]
+
+    return (oa + t * da + ob + s * db) / 2, valid
+
+
+def triangulate_robust(
+        origins: np.ndarray,
+        directions: np.ndarray,
+        mask: np.ndarray | None = None,
+        threshold: float = .1
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    RANSAC style triangulation that ignores wrong rays, for K groups of up
+    to R rays at once.
+
+    Every pair of rays of a group is a hypothesis (the midpoint of their
+    closest approach). All hypotheses are scored against all rays of their
+    group in one step: most rays within `threshold` first, then the lowest
+    sum of (truncated) squared distances. The best hypothesis is refined
+    by least squares on its inliers, which are then updated once more.
+
+    :param origins: (K, R, 3) or (R, 3)
+    :param directions: normalized, same shape as origins
+    :param mask: (K, R) / (R,), which rays belong to the group
+    :return: points (K, 3) / (3,), rms distance of the inliers (K,) / (),
+        inliers (K, R) / (R,)
+    """
+    single = origins.ndim == 2
+    if single:
+        origins, directions = origins[None], directions[None]
+        mask = None if mask is None else mask[None]
+
+    if mask is None:
+        mask = np.ones(origins.shape[:2], dtype=bool)
+
+    n_rays = origins.shape[1]
+    if n_rays < 3:
+        # nothing to vote with
+        points, rms = triangulate(origins, directions, mask)
+        return (points[0], rms[0], mask[0]) if single else (points, rms, mask.copy())
+
+    i, j = np.triu_indices(n_rays, k=1)
+    hypotheses, valid = pair_midpoints(origins, directions, i, j)
+    valid &= mask[:, i] & mask[:, j]
+
+    # (K, P, R) distance of every ray to every hypothesis of its group
+    distances = point_ray_distances(hypotheses[:, :, None, :], origins[:, None], directions[:, None])
+    inlier = (distances <= threshold) & mask[:, None, :]
+
+    support = np.where(valid, inlier.sum(axis=-1), -1)
+    cost = np.sum(np.where(mask[:, None, :], np.minimum(distances, threshold) ** 2, 0), axis=-1)
+
+    # most inliers, then the lowest cost
+    best = np.argmax(support - cost / (threshold ** 2 * (n_rays + 1)), axis=1)
+    k = np.arange(len(origins))
+    inliers = inlier[k, best]
+
+    # groups without a usable pair keep all their rays
+    no_pair = support[k, best] < 2
+    inliers[no_pair] = mask[no_pair]
+
+    points, _ = triangulate(origins, directions, inliers)
+
+    # update the inliers with the refined point and solve once more
+    refined = (point_ray_distances(points[:, None, :], origins, directions) <= threshold) & mask
+    keep = refined.sum(axis=1) >= 2
+    inliers[keep] = refined[keep]
+    points, rms = triangulate(origins, directions, inliers)
+
+    if single:
+        return points[0], rms[0], inliers[0]
+
+    return points, rms, inliers
+
+
+def triangulate_results(
+        results: tp.Sequence[CombinedResult],
+        threshold: float = .1
+) -> tuple[np.ndarray, np.ndarray, list[list[int]]]:
+    """
+    robust positions for many `CombinedResult`s at once
+
+    :return: points (K, 3), rms distance of the inliers (K,), ids of the
+        cameras whose rays were rejected, per result
+    """
+    groups = [list(result.camera_angles) for result in results]
+    if not groups:
+        return np.empty((0, 3)), np.empty(0), []
+
+    width = max(len(group) for group in groups)
+    origins, directions = rays_to_arrays([ray for group in groups for ray in group])
+
+    # pad every group to the biggest one
+    index = np.zeros((len(groups), width), dtype=np.intp)
+    mask = np.zeros((len(groups), width), dtype=bool)
+    start = 0
+    for g, group in enumerate(groups):
+        index[g, :len(group)] = np.arange(start, start + len(group))
+        mask[g, :len(group)] = True
+        start += len(group)
+
+    points, rms, inliers = triangulate_robust(origins[index], directions[index], mask, threshold)
+
+    rejected = [
+        [ray.cam_id for ray, ok in zip(group, inliers[g].tolist()) if not ok]
+        for g, group in enumerate(groups)
+    ]
+    return points, rms, rejected
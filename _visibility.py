@@ -0,0 +1,148 @@
+"""
+_visibility.py
+19. October 2026
+
+which cameras can see which positions, for all cameras and tracks at once
+
+Author:
+Nilusink
+"""
+import typing as tp
+import math as m
+
+import numpy as np
+
+from ._transforms import Quaternion
+
+if tp.TYPE_CHECKING:
+    from .comms import SInfData
+
+
+class Frustums:
+    """
+    View frustums of all cameras as 6 planes each (left, right, bottom,
+    top, near, far), built from the `SInfData` of every camera.
+
+    The camera looks along `direction` without roll, `fov` is the full
+    (horizontal, vertical) opening angle in radians (degrees if `degrees`
+    is set). Positions within `margin` outside of a frustum count as
+    visible, to allow for prediction errors.
+    """
+    def __init__(
+            self,
+            near: float = .1,
+            far: float = 1000.,
+            margin: float = 0.,
+            degrees: bool = False
+    ) -> None:
+        self.near = near
+        self.far = far
+        self.margin = margin
+        self.degrees = degrees
+
+        self._cam_ids: list[int] = []
+        self._sources: dict[int, tuple] = {}
+        self._planes = np.empty((0, 6, 4))
+
+    @property
+    def cam_ids(self) -> list[int]:
+        """
+        camera of every row of `visible`
+        """
+        return list(self._cam_ids)
+
+    @property
+    def planes(self) -> np.ndarray:
+        """
+        (C, 6, 4) inward normal and offset, inside if normal . p >= offset
+        """
+        return self._planes
+
+    def update(self, info: "SInfData") -> None:
+        """
+        add or update a camera, only rebuilt if its info changed
+        """
+        key = (info.position, info.direction, info.fov)
+        if self._sources.get(info.id) == key:
+            return
+
+        self._sources[info.id] = key
+        planes = self._build(info)
+
+        if info.id in self._cam_ids:
+            self._planes[self._cam_ids.index(info.id)] = planes
+
+        else:
+            self._cam_ids.append(info.id)
+            self._planes = np.concatenate((self._planes, planes[None]))
+
+    def remove(self, cam_id: int) -> None:
+        index = self._cam_ids.index(cam_id)
+
+        del self._cam_ids[index]
+        del self._sources[cam_id]
+        self._planes = np.delete(self._planes, index, axis=0)
+
+    def visible(self, points: np.ndarray, margin: float | None = None) -> np.ndarray:
+        """
+        :param points: (N, 3)
+        :return: (C, N) whether camera `cam_ids[c]` sees point n
+        """
+        margin = self.margin if margin is None else margin
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+        # (C, 6, N) signed distances to all planes
+        distances = self._planes[:, :, :3] @ points.T - self._planes[:, :, 3:]
+        return np.all(distances >= -margin, axis=1)
+
+    def unseen(self, ids: tp.Sequence[int], points: np.ndarray) -> list[int]:
+        """
+        ids of the points no camera can see (a missing detection of these
+        isn't a real miss, see `TrackLifecycle.tick`)
+        """
+        seen = self.visible(points).any(axis=0)
+        return [tid for tid, ok in zip(ids, seen.tolist()) if not ok]
+
+    def candidates(self, ray_cams: tp.Sequence[int], points: np.ndarray) -> np.ndarray:
+        """
+        which rays can belong to which track, to prune association
+
+        :param ray_cams: camera of every ray (M,), unknown cameras see
+            everything
+        :param points: predicted track positions (N, 3)
+        :return: (M, N)
+        """
+        visible = self.visible(points)
+        rows = {cam: i for i, cam in enumerate(self._cam_ids)}
+
+        # an extra row of "sees everything" for unknown cameras
+        visible = np.vstack((visible, np.ones((1, visible.shape[1]), dtype=bool)))
+        index = np.array([rows.get(cam, len(rows)) for cam in ray_cams], dtype=np.intp)
+
+        return visible[index]
+
+    # internal functions
+    def _build(self, info: "SInfData") -> np.ndarray:
+        half_h, half_v = (v / 2 for v in info.fov)
+        if self.degrees:
+            half_h, half_v = m.radians(half_h), m.radians(half_v)
+
+        sh, ch = m.sin(half_h), m.cos(half_h)
+        sv, cv = m.sin(half_v), m.cos(half_v)
+
+        # camera frame: looks along +x, y left, z up
+        normals = np.array([
+            (sh, -ch, 0),   # left
+            (sh, ch, 0),    # right
+            (sv, 0, cv),    # bottom
+            (sv, 0, -cv),   # top
+            (1, 0, 0),      # near
+            (-1, 0, 0),     # far
+        ], dtype=np.float64)
+        offsets = np.array((0, 0, 0, 0, self.near, -self.far))
+
+        rotation = Quaternion.from_direction(info.direction).to_matrix()
+        position = np.array(info.position, dtype=np.float64)
+
+        world = normals @ rotation.T
+        return np.column_stack((world, world @ position + offsets))
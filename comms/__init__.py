@@ -1,6 +1,56 @@
-from ._common_functions import DEVICE_MAC, try_find_id, prepare_message, receive_message
-from ._message_types import DataMessage, ReqData, AckData, ReplData, SInfData, CamAngle3
-from ._message_types import SInfData, TResData, CamAngle, MessageData, TRes3DataMessage
-from ._message_types import Message, ReqMessage, AckMessage, ReplMessage, TRes3Data
-from ._message_types import DataDataMessage, TResDataMessage, SInfDataMessage
-from ._message_future import MessageFuture
+"""
+message types and transports, submodules are imported on first access
+"""
+from ..logic._lazy import lazy_exports, TYPE_CHECKING
+
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "._common_functions": (
+        "DEVICE_MAC", "get_device_mac", "try_find_id", "prepare_message",
+        "receive_message", "decode_message", "build_message",
+    ),
+    "._message_types": (
+        "DataMessage", "ReqData", "AckData", "ReplData", "SInfData", "CamAngle3",
+        "TResData", "CamAngle", "MessageData", "TRes3DataMessage", "Message",
+        "ReqMessage", "AckMessage", "ReplMessage", "TRes3Data", "DataDataMessage",
+        "TResDataMessage", "SInfDataMessage", "TRes3Delta", "TRes3DeltaData",
+        "TRes3DeltaDataMessage", "Stamp",
+    ),
+    "._message_future": ("MessageFuture",),
+    "._delta_stream": ("TRes3DeltaEncoder", "TRes3DeltaDecoder"),
+    "._fanout_hub": ("FanoutHub", "Subscriber", "QueuePolicy", "conflation_key"),
+    "._shm_transport": ("ShmRing", "ShmTransport"),
+    "._udp_transport": ("UdpDataSender", "UdpDataReceiver", "UdpStats", "UdpData"),
+    "._wire_encoder": ("WireEncoder", "format_float"),
+    "._reliability": ("ReliableWindow", "RttEstimator"),
+    "._latency": (
+        "STAGES", "stamp", "carry_stamps", "LatencyHistogram", "ClockOffsetEstimator",
+        "LatencyTracker",
+    ),
+    "._outbound_scheduler": ("OutboundScheduler", "ClassStats", "TrafficClass", "CLASSES", "classify"),
+    "._reply_cache": ("ReplyCache", "CacheStats", "request_key"),
+    "._connection_manager": ("ConnectionManager", "SessionRegistry", "Session"),
+    "._framing": ("FrameStream",),
+})
+
+if TYPE_CHECKING:
+    from ._common_functions import DEVICE_MAC, try_find_id, prepare_message, receive_message, decode_message
+    from ._common_functions import build_message, get_device_mac
+    from ._message_types import DataMessage, ReqData, AckData, ReplData, SInfData, CamAngle3
+    from ._message_types import SInfData, TResData, CamAngle, MessageData, TRes3DataMessage
+    from ._message_types import Message, ReqMessage, AckMessage, ReplMessage, TRes3Data
+    from ._message_types import DataDataMessage, TResDataMessage, SInfDataMessage
+    from ._message_types import TRes3Delta, TRes3DeltaData, TRes3DeltaDataMessage, Stamp
+    from ._message_future import MessageFuture
+    from ._delta_stream import TRes3DeltaEncoder, TRes3DeltaDecoder
+    from ._fanout_hub import FanoutHub, Subscriber, QueuePolicy, conflation_key
+    from ._shm_transport import ShmRing, ShmTransport
+    from ._udp_transport import UdpDataSender, UdpDataReceiver, UdpStats, UdpData
+    from ._wire_encoder import WireEncoder, format_float
+    from ._reliability import ReliableWindow, RttEstimator
+    from ._latency import STAGES, stamp, carry_stamps, LatencyHistogram, ClockOffsetEstimator
+    from ._latency import LatencyTracker
+    from ._outbound_scheduler import OutboundScheduler, ClassStats, TrafficClass, CLASSES, classify
+    from ._reply_cache import ReplyCache, CacheStats, request_key
+    from ._connection_manager import ConnectionManager, SessionRegistry, Session
+    from ._framing import FrameStream
@@ -9,6 +9,7 @@ Nilusink
 """
 from pydantic import TypeAdapter, ValidationError
 from contextlib import suppress
+from functools import cache
 from traceback import print_exc
 from uuid import getnode
 from time import time
@@ -20,7 +21,23 @@ from ._message_types import *
 from ..debugging import debugger
 
 
-DEVICE_MAC: int = getnode()
+DEVICE_MAC: int  # resolved on first access, see `get_device_mac`
+
+
+@cache
+def get_device_mac() -> int:
+    """
+    `uuid.getnode` may have to run external programs, so it isn't called on
+    import
+    """
+    return getnode()
+
+
+def __getattr__(name: str) -> tp.Any:
+    if name == "DEVICE_MAC":
+        return get_device_mac()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def try_find_id(message: str) -> int:
@@ -68,6 +85,25 @@ def prepare_message(
     """
     converts message data to a message, adding type, id and time
     """
+    message = build_message(data)
+
+    # if message wants a reply, add it to pending
+    future = None
+    if message.type != "ack":
+        future = MessageFuture(message)
+
+        debugger.trace("DataServer: appending message to pending")
+
+        message_queue_callback(future)
+
+    return message, future
+
+
+def build_message(data: MessageData) -> Message:
+    """
+    converts message data to a message without registering a future
+    (for messages that never get a reply)
+    """
     match data:
         case ReqData(req=_):
             type_name = "req"
@@ -91,6 +127,11 @@ def prepare_message(
             message_type = DataMessage
             data = TRes3DataMessage(data=data)
 
+        case TRes3DeltaData():
+            type_name = "data"
+            message_type = DataMessage
+            data = TRes3DeltaDataMessage(data=data)
+
         case SInfData():
             type_name = "data"
             message_type = DataMessage
@@ -102,24 +143,13 @@ def prepare_message(
 
     # encapsulate message
     t = time()
-    message = message_type(
+    return message_type(
         type=type_name,
-        id=int(t*1e6 + DEVICE_MAC),
+        id=int(t*1e6 + get_device_mac()),
         time=t,
         data=data
     )
 
-    # if message wants a reply, add it to pending
-    future = None
-    if message.type != "ack":
-        future = MessageFuture(message)
-
-        debugger.trace("DataServer: appending message to pending")
-
-        message_queue_callback(future)
-
-    return message, future
-
 
 def receive_message(
         s: socket.socket,
@@ -132,6 +162,7 @@ def receive_message(
     # receive message
     try:
         data = s.recv(2048).decode(encoding)
+        received = time()
 
     except socket.timeout:
         return ...
@@ -148,6 +179,20 @@ def receive_message(
         debugger.error("peer disconnected")
         raise RuntimeError
 
+    return decode_message(data, send_callback, received)
+
+
+def decode_message(
+        data: str,
+        send_callback: tp.Callable[[MessageData], None],
+        received: float | None = None
+) -> Message:
+    """
+    converts a received string to Pydantic, sends a NACK if it is invalid
+
+    :param received: time the data was received, stamped (together with
+        the decode time) into messages that carry latency stamps
+    """
     # try validating to json
     try:
         json_data = json.loads(data)
@@ -162,9 +207,8 @@ def receive_message(
         return ...
 
     # validate message
-    message_adapter = TypeAdapter(Message)
     try:
-        validated_data = message_adapter.validate_python(json_data)
+        validated_data = _message_adapter().validate_python(json_data)
 
     except ValidationError:
         debugger.error(f"received invalid message: {data}")
@@ -177,4 +221,19 @@ def receive_message(
         )
         return ...
 
-    return validated_data
\ No newline at end of file
+    # only traced messages carry stamps
+    if validated_data.stamps:
+        host = get_device_mac()
+        decoded = time()
+        validated_data.stamps.append(("receive", decoded if received is None else received, host))
+        validated_data.stamps.append(("decode", decoded, host))
+
+    return validated_data
+
+
+@cache
+def _message_adapter() -> TypeAdapter:
+    """
+    building the adapter is expensive, only do it once
+    """
+    return TypeAdapter(Message)
@@ -0,0 +1,443 @@
+"""
+_connection_manager.py
+19. October 2026
+
+reconnecting camera links that resume their session instead of starting over
+
+Author:
+Nilusink
+"""
+from dataclasses import dataclass, field
+from threading import Thread, Event, Lock
+from time import monotonic
+import typing as tp
+import secrets
+import random
+import socket
+
+from ._message_types import Message, ReqData, ReplData, ReplMessage, ReqMessage, SInfData
+from ._message_types import DataMessage, SInfDataMessage, MessageData
+from ._common_functions import build_message, decode_message
+from ._message_future import MessageFuture
+from ._reliability import ReliableWindow
+from ._framing import FrameStream
+from ..debugging import debugger
+
+
+SESSION_REQUEST = "session"
+NEW_SESSION = "new"
+
+# handshake frames start with b"H", heartbeats are a single b"K",
+# everything else is a `ReliableWindow` frame
+_HANDSHAKE = b"H"
+_HEARTBEAT = b"K"
+
+
+class _SessionStream(FrameStream):
+    def keepalive(self, interval: float, idle_timeout: float, now: float | None = None) -> None:
+        """
+        send a heartbeat if nothing was sent for `interval`
+
+        :raises TimeoutError: if nothing was received for `idle_timeout`
+        """
+        now = monotonic() if now is None else now
+
+        if now - self.last_received > idle_timeout:
+            raise TimeoutError(f"nothing received for {now - self.last_received:.1f}s")
+
+        if now - self.last_sent >= interval:
+            self.send(_HEARTBEAT)
+
+
+def _encode_handshake(message: Message, encoding: str) -> bytes:
+    return _HANDSHAKE + message.model_dump_json().encode(encoding)
+
+
+def _decode_handshake(frame: bytes, encoding: str) -> Message | None:
+    if frame[:1] != _HANDSHAKE:
+        return None
+
+    message = decode_message(frame[1:].decode(encoding), lambda _: None)
+    return None if message is ... else message
+
+
+def _drop(_frame: bytes) -> None:
+    """
+    send callback while disconnected, the window resends after `resume`
+    """
+
+
+@dataclass
+class Session:
+    """
+    server side state of one peer, kept across reconnects
+    """
+    token: str
+    window: ReliableWindow
+    peer_info: SInfData | None = None
+    settings: dict = field(default_factory=dict)
+    connected: bool = False
+    resumes: int = 0
+    last_seen: float = field(default_factory=monotonic)
+    _stream: _SessionStream | None = field(default=None, repr=False)
+
+
+class SessionRegistry:
+    """
+    Server side of the session handshake. A peer that reconnects with the
+    token of a session that didn't expire (`session_ttl` seconds after the
+    disconnect) gets its `ReliableWindow` back, unacked messages are
+    resent in both directions and its `SInfData` is still known.
+
+    Handshake: the peer sends a `ReqMessage` "session <token | new>", the
+    reply data is {"token": ..., "resumed": bool, "settings": {...}}.
+
+    Both sides send a heartbeat after `heartbeat_interval` seconds without
+    traffic, a connection that received nothing for `idle_timeout` seconds
+    is dropped (the session stays resumable).
+    """
+    def __init__(
+            self,
+            session_ttl: float = 30.,
+            settings: dict | None = None,
+            window_kwargs: dict | None = None,
+            heartbeat_interval: float = 1.,
+            idle_timeout: float = 5.,
+            encoding: str = "utf-8"
+    ) -> None:
+        self.session_ttl = session_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.settings = settings or {}
+        self.window_kwargs = window_kwargs or {}
+        self.encoding = encoding
+
+        self._lock = Lock()
+        self._sessions: dict[str, Session] = {}
+
+    @property
+    def sessions(self) -> list[Session]:
+        return list(self._sessions.values())
+
+    def get(self, token: str) -> Session | None:
+        return self._sessions.get(token)
+
+    def expire(self, now: float | None = None) -> list[Session]:
+        """
+        drop disconnected sessions older than `session_ttl`
+        """
+        now = monotonic() if now is None else now
+
+        with self._lock:
+            expired = [
+                s for s in self._sessions.values()
+                if not s.connected and now - s.last_seen > self.session_ttl
+            ]
+            for session in expired:
+                del self._sessions[session.token]
+
+        return expired
+
+    def serve(
+            self,
+            sock: socket.socket,
+            on_message: tp.Callable[[Session, Message], None],
+            stop: Event | None = None
+    ) -> None:
+        """
+        handshake and receive loop of one connection (blocking, one thread
+        per connection), returns once the connection is gone
+        """
+        stream = _SessionStream(sock)
+        session = self._handshake(stream)
+        if session is None:
+            return
+
+        stop = Event() if stop is None else stop
+
+        try:
+            while not stop.is_set() and session._stream is stream:
+                stream.keepalive(self.heartbeat_interval, self.idle_timeout)
+
+                timeout = session.window.poll()
+                for frame in stream.receive(.05 if timeout is None else min(timeout, .05)):
+                    if frame[:1] in (_HANDSHAKE, _HEARTBEAT):
+                        continue
+
+                    for message in session.window.receive_messages(frame):
+                        if isinstance(message, DataMessage) and isinstance(message.data, SInfDataMessage):
+                            session.peer_info = message.data.data
+
+                        on_message(session, message)
+
+        except (ConnectionError, OSError) as e:
+            debugger.info(f"session {session.token[:8]} disconnected: {e}")
+
+        finally:
+            self._detach(session, stream)
+
+    # internal functions
+    def _handshake(self, stream: _SessionStream, timeout: float = 1.) -> Session | None:
+        """
+        :return: the new or resumed session, None if the handshake failed
+        """
+        self.expire()
+
+        try:
+            request = _decode_handshake(stream.receive_one(timeout), self.encoding)
+
+        except (TimeoutError, ConnectionError, OSError) as e:
+            debugger.warning(f"session handshake failed: {e}")
+            stream.close()
+            return None
+
+        if not isinstance(request, ReqMessage) or request.data.req.split()[:1] != [SESSION_REQUEST]:
+            debugger.warning(f"invalid session handshake: {request}")
+            stream.close()
+            return None
+
+        token = (request.data.req.split()[1:] or [NEW_SESSION])[0]
+
+        with self._lock:
+            session = self._sessions.get(token)
+            resumed = session is not None
+
+            if session is None:
+                token = secrets.token_hex(16)
+                session = Session(
+                    token=token,
+                    window=ReliableWindow(_drop, encoding=self.encoding, **self.window_kwargs),
+                    settings=dict(self.settings)
+                )
+                self._sessions[token] = session
+
+            old, session._stream = session._stream, stream
+            session.connected = True
+            session.resumes += resumed
+
+        if old is not None:
+            old.close()
+
+        reply = build_message(ReplData(to=request.id, data={
+            "token": token,
+            "resumed": resumed,
+            "settings": session.settings,
+        }))
+
+        try:
+            stream.send(_encode_handshake(reply, self.encoding))
+            session.window.resume(lambda frame: self._send(session, stream, frame))
+
+        except OSError as e:
+            debugger.warning(f"session handshake failed: {e}")
+            self._detach(session, stream)
+            return None
+
+        debugger.info(f"session {token[:8]} {'resumed' if resumed else 'started'}")
+        return session
+
+    def _send(self, session: Session, stream: _SessionStream, frame: bytes) -> None:
+        if session._stream is not stream:
+            return
+
+        try:
+            stream.send(frame)
+
+        except OSError:
+            self._detach(session, stream)
+
+    def _detach(self, session: Session, stream: _SessionStream) -> None:
+        with self._lock:
+            # a newer connection may already have taken over
+            if session._stream is stream:
+                session._stream = None
+                session.connected = False
+                session.last_seen = monotonic()
+
+        stream.close()
+
+
+class ConnectionManager:
+    """
+    Client side of a camera link. Keeps reconnecting with exponential
+    backoff (`initial_backoff` doubling up to `max_backoff`, with jitter)
+    and resumes the session, so pending `MessageFuture`s and unacked
+    messages survive the disconnect. If the server lost the session, a new
+    one is started: `info` is sent first and the unacked messages follow.
+
+    Messages can be sent while disconnected, they go out once the link is
+    back. Received messages are passed to `on_message` on the connection
+    thread. A link that received nothing (not even a heartbeat) for
+    `idle_timeout` seconds counts as lost.
+    """
+    def __init__(
+            self,
+            address: tuple[str, int],
+            on_message: tp.Callable[[Message], None] | None = None,
+            info: SInfData | None = None,
+            initial_backoff: float = .05,
+            max_backoff: float = 5.,
+            jitter: float = .2,
+            connect_timeout: float = 1.,
+            window_kwargs: dict | None = None,
+            heartbeat_interval: float = 1.,
+            idle_timeout: float = 5.,
+            encoding: str = "utf-8"
+    ) -> None:
+        self.address = address
+        self.on_message = on_message
+        self.info = info
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.connect_timeout = connect_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.encoding = encoding
+
+        self.window = ReliableWindow(_drop, encoding=encoding, **(window_kwargs or {}))
+
+        self.token: str | None = None
+        self.settings: dict = {}
+        self.peer_info: SInfData | None = None
+        self.reconnects = 0  # successful connections after the first one
+
+        self._stream: _SessionStream | None = None
+        self._connected = Event()
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def wait_connected(self, timeout: float | None = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def send_message(self, message: Message) -> MessageFuture:
+        return self.window.send_message(message)
+
+    def send_data(self, data: MessageData) -> MessageFuture:
+        return self.window.send_data(data)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="connection-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+        stream = self._stream
+        if stream is not None:
+            self._disconnect(stream)
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def connect(self) -> bool:
+        """
+        one connection attempt including the session handshake
+        """
+        try:
+            sock = socket.create_connection(self.address, timeout=self.connect_timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        except OSError as e:
+            debugger.trace(f"connecting to {self.address} failed: {e}")
+            return False
+
+        stream = _SessionStream(sock)
+        request = build_message(ReqData(req=f"{SESSION_REQUEST} {self.token or NEW_SESSION}"))
+
+        try:
+            stream.send(_encode_handshake(request, self.encoding))
+            reply = _decode_handshake(stream.receive_one(self.connect_timeout), self.encoding)
+
+        except (TimeoutError, ConnectionError, OSError) as e:
+            debugger.warning(f"session handshake with {self.address} failed: {e}")
+            stream.close()
+            return False
+
+        if not isinstance(reply, ReplMessage) or reply.data.to != request.id:
+            debugger.warning(f"invalid session handshake reply: {reply}")
+            stream.close()
+            return False
+
+        data = reply.data.data
+        resumed = data.get("resumed", False) and data.get("token") == self.token
+        self.reconnects += self.token is not None
+
+        if not resumed:
+            self.token = data["token"]
+            self.settings = data.get("settings", {})
+            self.window.reset([] if self.info is None else [build_message(self.info)])
+
+        self._stream = stream
+        self._connected.set()
+
+        try:
+            self.window.resume(lambda frame: self._send(stream, frame))
+
+        except OSError:
+            self._disconnect(stream)
+            return False
+
+        debugger.info(f"{'resumed' if resumed else 'started'} session with {self.address}")
+        return True
+
+    # internal functions
+    def _run(self) -> None:
+        delay = 0.
+        while not self._stop.is_set():
+            stream = self._stream
+            if stream is None:
+                if self.connect():
+                    delay = 0.
+                    continue
+
+                delay = min(max(delay * 2, self.initial_backoff), self.max_backoff)
+                self._stop.wait(delay * random.uniform(1 - self.jitter, 1))
+                continue
+
+            try:
+                stream.keepalive(self.heartbeat_interval, self.idle_timeout)
+
+                timeout = self.window.poll()
+                for frame in stream.receive(.05 if timeout is None else min(timeout, .05)):
+                    self._handle(frame)
+
+            except (ConnectionError, OSError) as e:
+                if not self._stop.is_set():
+                    debugger.warning(f"connection to {self.address} lost: {e}")
+
+                self._disconnect(stream)
+
+    def _handle(self, frame: bytes) -> None:
+        if frame[:1] in (_HANDSHAKE, _HEARTBEAT):
+            return
+
+        for message in self.window.receive_messages(frame):
+            if isinstance(message, DataMessage) and isinstance(message.data, SInfDataMessage):
+                self.peer_info = message.data.data
+
+            if self.on_message is not None:
+                self.on_message(message)
+
+    def _send(self, stream: _SessionStream, frame: bytes) -> None:
+        if self._stream is not stream:
+            return
+
+        try:
+            stream.send(frame)
+
+        except OSError:
+            self._disconnect(stream)
+
+    def _disconnect(self, stream: _SessionStream) -> None:
+        if self._stream is stream:
+            self._stream = None
+            self._connected.clear()
+
+        stream.close()
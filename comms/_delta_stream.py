@@ -0,0 +1,254 @@
+"""
+_delta_stream.py
+19. October 2026
+
+dead-banded, delta encoded stream of 3d track results
+
+Author:
+Nilusink
+"""
+from collections import OrderedDict
+import typing as tp
+import math as m
+
+from ._message_types import TRes3Data, TRes3Delta, TRes3DeltaData
+from ..debugging import debugger
+
+
+type QPos = tuple[int, int, int]
+
+
+class TRes3DeltaEncoder:
+    """
+    Turns the full list of track results of every tick into a
+    `TRes3DeltaData` frame that only contains the tracks that changed.
+
+    A track is sent if it moved more than `movement_threshold` since it
+    was last sent or if its type / accuracy changed. Positions are
+    quantized and sent relative to the last state the receiver
+    acknowledged (see `acknowledge`), or absolute if there is none.
+    Changes that weren't acknowledged after `resend_interval` frames are
+    sent again. Every `keyframe_interval` frames all tracks are sent
+    absolute.
+    """
+    def __init__(
+            self,
+            movement_threshold: float = .05,
+            accuracy_threshold: float = .01,
+            quantum: float = .001,
+            keyframe_interval: int = 150,
+            resend_interval: int = 5,
+            max_unacked: int = 64
+    ) -> None:
+        self.movement_threshold = movement_threshold
+        self.accuracy_threshold = accuracy_threshold
+        self.quantum = quantum
+        self.keyframe_interval = keyframe_interval
+        self.resend_interval = resend_interval
+        self.max_unacked = max_unacked
+
+        self._frame = 0
+        self._force_keyframe = False
+
+        # last sent: quantized position, track type, accuracy, frame
+        self._sent: dict[int, tuple[QPos, int, float, int]] = {}
+
+        # last acknowledged: frame, quantized position
+        self._acked: dict[int, tuple[int, QPos]] = {}
+
+        # positions sent in not yet acknowledged frames
+        self._unacked: OrderedDict[int, dict[int, QPos]] = OrderedDict()
+
+    def request_keyframe(self) -> None:
+        """
+        send all tracks absolute with the next frame (e.g. after a receiver
+        reported a missing base)
+        """
+        self._force_keyframe = True
+
+    def encode(self, results: tp.Iterable[TRes3Data]) -> TRes3DeltaData | None:
+        """
+        encode the current results
+
+        :return: frame to send, None if nothing changed
+        """
+        frame = self._frame
+        self._frame += 1
+
+        keyframe = self._force_keyframe or frame % self.keyframe_interval == 0
+        self._force_keyframe = False
+
+        entries: list[TRes3Delta] = []
+        positions: dict[int, QPos] = {}
+        seen: set[int] = set()
+
+        for result in results:
+            tid = result.track_id
+            q = self._quantize(result.position)
+            seen.add(tid)
+
+            if not keyframe and not self._changed(tid, q, result, frame):
+                continue
+
+            base, pos = -1, q
+            if not keyframe and tid in self._acked:
+                base, acked = self._acked[tid]
+                pos = (q[0] - acked[0], q[1] - acked[1], q[2] - acked[2])
+
+            entries.append(TRes3Delta(
+                track_id=tid,
+                base=base,
+                position=pos,
+                track_type=result.track_type,
+                accuracy=result.accuracy,
+                cam_angles=result.cam_angles
+            ))
+            positions[tid] = q
+            self._sent[tid] = (q, result.track_type, result.accuracy, frame)
+
+        removed = [tid for tid in self._sent if tid not in seen]
+        for tid in removed:
+            self._sent.pop(tid)
+            self._acked.pop(tid, None)
+
+        if not keyframe and not entries and not removed:
+            return None
+
+        self._unacked[frame] = positions
+        while len(self._unacked) > self.max_unacked:
+            self._unacked.popitem(last=False)
+
+        return TRes3DeltaData(
+            frame=frame,
+            keyframe=keyframe,
+            quantum=self.quantum,
+            tracks=entries,
+            removed=removed
+        )
+
+    def acknowledge(self, frame: int) -> None:
+        """
+        the receiver has decoded `frame`, use it as base for future deltas
+        """
+        positions = self._unacked.pop(frame, None)
+        if positions is None:
+            return
+
+        for tid, q in positions.items():
+            if tid in self._sent and self._acked.get(tid, (-1,))[0] < frame:
+                self._acked[tid] = (frame, q)
+
+    # internal functions
+    def _quantize(self, position: tuple[float, float, float]) -> QPos:
+        return (
+            round(position[0] / self.quantum),
+            round(position[1] / self.quantum),
+            round(position[2] / self.quantum)
+        )
+
+    def _changed(self, tid: int, q: QPos, result: TRes3Data, frame: int) -> bool:
+        last = self._sent.get(tid)
+        if last is None:
+            return True
+
+        last_q, last_type, last_accuracy, last_frame = last
+        if (
+                self._acked.get(tid, (-1,))[0] < last_frame
+                and frame - last_frame >= self.resend_interval
+        ):
+            return True
+
+        if last_type != result.track_type:
+            return True
+
+        if abs(last_accuracy - result.accuracy) > self.accuracy_threshold:
+            return True
+
+        moved = m.dist(q, last_q) * self.quantum
+        return moved > self.movement_threshold
+
+
+class TRes3DeltaDecoder:
+    """
+    Rebuilds the track results from a `TRes3DeltaData` stream. Only the
+    tracks contained in a frame are touched.
+    """
+    def __init__(self, max_unacked: int = 64) -> None:
+        self.max_unacked = max_unacked
+
+        self._tracks: dict[int, TRes3Data] = {}
+
+        # quantized positions per track and frame, for resolving deltas
+        self._bases: dict[int, dict[int, QPos]] = {}
+        self._needs_keyframe = False
+
+    @property
+    def tracks(self) -> dict[int, TRes3Data]:
+        return self._tracks
+
+    @property
+    def needs_keyframe(self) -> bool:
+        """
+        a delta referred to a frame this decoder doesn't know, the sender
+        should be asked for a keyframe
+        """
+        return self._needs_keyframe
+
+    def decode(self, data: TRes3DeltaData) -> list[TRes3Data]:
+        """
+        apply a frame
+
+        :return: all tracks that changed with this frame
+        """
+        if data.keyframe:
+            self._needs_keyframe = False
+
+            present = {entry.track_id for entry in data.tracks}
+            for tid in [tid for tid in self._tracks if tid not in present]:
+                self._remove(tid)
+
+        for tid in data.removed:
+            self._remove(tid)
+
+        changed: list[TRes3Data] = []
+        for entry in data.tracks:
+            q = entry.position
+            if entry.base >= 0:
+                base = self._bases.get(entry.track_id, {}).get(entry.base)
+                if base is None:
+                    debugger.warning(
+                        f"missing base frame {entry.base} for track {entry.track_id}"
+                    )
+                    self._needs_keyframe = True
+                    continue
+
+                q = (base[0] + q[0], base[1] + q[1], base[2] + q[2])
+
+            self._store_base(entry.track_id, data.frame, q)
+
+            result = TRes3Data(
+                track_id=entry.track_id,
+                track_type=entry.track_type,
+                position=(q[0] * data.quantum, q[1] * data.quantum, q[2] * data.quantum),
+                accuracy=entry.accuracy,
+                cam_angles=entry.cam_angles
+            )
+            self._tracks[entry.track_id] = result
+            changed.append(result)
+
+        return changed
+
+    # internal functions
+    def _remove(self, tid: int) -> None:
+        self._tracks.pop(tid, None)
+        self._bases.pop(tid, None)
+
+    def _store_base(self, tid: int, frame: int, q: QPos) -> None:
+        bases = self._bases.setdefault(tid, {})
+        bases[frame] = q
+
+        # prune in chunks, older frames can't be referenced anymore
+        if len(bases) > 2 * self.max_unacked:
+            oldest = frame - self.max_unacked
+            for old in [f for f in bases if f < oldest]:
+                del bases[old]
@@ -0,0 +1,320 @@
+"""
+_fanout_hub.py
+19. October 2026
+
+publish / subscribe hub that sends the same messages to many sockets
+
+Author:
+Nilusink
+"""
+from collections import OrderedDict, deque
+from itertools import count
+import typing as tp
+import threading
+import selectors
+import socket
+
+from ._message_types import Message, DataMessage, TRes3DataMessage
+from ._framing import frame
+from ..debugging import debugger
+
+
+type QueuePolicy = tp.Literal["drop_oldest", "conflate", "block"]
+type ConflationKey = tp.Hashable
+
+
+def conflation_key(message: Message) -> ConflationKey | None:
+    """
+    messages with the same key replace each other in a "conflate" queue,
+    None means the message is never replaced
+    """
+    if isinstance(message, DataMessage) and isinstance(message.data, TRes3DataMessage):
+        return "tres3", message.data.data.track_id
+
+    return None
+
+
+class Subscriber:
+    """
+    one consumer of a `FanoutHub` with its own bounded queue
+    """
+    def __init__(
+            self,
+            sock: socket.socket,
+            policy: QueuePolicy,
+            maxsize: int,
+            block_timeout: float | None
+    ) -> None:
+        if policy not in ("drop_oldest", "conflate", "block"):
+            raise ValueError(f"invalid queue policy: {policy}")
+
+        self.sock = sock
+        self.policy = policy
+        self.maxsize = maxsize
+        self.block_timeout = block_timeout
+
+        self.sent = 0
+        self.dropped = 0
+
+        # unique keys for messages that can't be conflated
+        self._keys = count()
+        self._queue: OrderedDict[ConflationKey, bytes] | deque[bytes] = (
+            OrderedDict() if policy == "conflate" else deque()
+        )
+
+        # rest of the message that is currently being written
+        self._current: memoryview | None = None
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def pending(self) -> bool:
+        return self._current is not None or len(self._queue) > 0
+
+    def _put(self, payload: bytes, key: ConflationKey | None) -> None:
+        """
+        enqueue a message (lock has to be held, the queue must have space
+        unless the policy is able to drop)
+        """
+        if self.policy == "conflate":
+            key = ("_unique", next(self._keys)) if key is None else key
+
+            if key in self._queue:
+                self.dropped += 1
+                self._queue.move_to_end(key)
+
+            elif len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                self._queue.popitem(last=False)
+
+            self._queue[key] = payload
+            return
+
+        if len(self._queue) >= self.maxsize:
+            self.dropped += 1
+            self._queue.popleft()
+
+        self._queue.append(payload)
+
+    def _next(self) -> memoryview | None:
+        if self._current is None and self._queue:
+            if self.policy == "conflate":
+                _, payload = self._queue.popitem(last=False)
+
+            else:
+                payload = self._queue.popleft()
+
+            self._current = memoryview(payload)
+
+        return self._current
+
+
+class FanoutHub:
+    """
+    Serializes every published message once and hands the same bytes to
+    all subscribers. A single thread writes to all subscriber sockets
+    (non-blocking, driven by a selector), so a slow consumer only fills
+    up its own queue.
+
+    Every message is prefixed with its length, subscribers read them with
+    a `FrameStream`.
+
+    The selector only exists while the hub runs, it can be stopped and
+    started again.
+    """
+    def __init__(self, encoding: str = "utf-8") -> None:
+        self.encoding = encoding
+
+        self._subscribers: list[Subscriber] = []
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+
+        self._selector: selectors.BaseSelector | None = None
+        self._wake_r: socket.socket | None = None
+        self._wake_w: socket.socket | None = None
+        self._woken = False
+
+        self._thread: threading.Thread | None = None
+        self._running = False
+
+    @property
+    def subscribers(self) -> list[Subscriber]:
+        return self._subscribers.copy()
+
+    def subscribe(
+            self,
+            sock: socket.socket,
+            policy: QueuePolicy = "drop_oldest",
+            maxsize: int = 256,
+            block_timeout: float | None = None
+    ) -> Subscriber:
+        """
+        :param policy: what to do if the queue is full:
+            drop_oldest: drop the oldest queued message
+            conflate: replace the queued message for the same track, else
+                drop the oldest one
+            block: block `publish` until there is space (or `block_timeout`
+                ran out, then the oldest message is dropped)
+        """
+        sock.setblocking(False)
+        subscriber = Subscriber(sock, policy, maxsize, block_timeout)
+
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._close(subscriber)
+
+    def publish(self, message: Message) -> None:
+        """
+        queue a message for all subscribers
+        """
+        self.publish_raw(
+            message.model_dump_json().encode(self.encoding),
+            conflation_key(message)
+        )
+
+    def publish_raw(self, payload: bytes, key: ConflationKey | None = None) -> None:
+        """
+        queue already serialized bytes for all subscribers
+        """
+        payload = frame(payload)
+
+        with self._lock:
+            # copy, blocking releases the lock and subscribers may leave
+            for subscriber in self._subscribers.copy():
+                if subscriber.policy == "block":
+                    self._space.wait_for(
+                        lambda: subscriber.closed or len(subscriber) < subscriber.maxsize,
+                        timeout=subscriber.block_timeout
+                    )
+
+                    if subscriber.closed:
+                        continue
+
+                subscriber._put(payload, key)
+
+            self._wake()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError("hub is already running")
+
+        with self._lock:
+            self._selector = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            self._selector.register(self._wake_r, selectors.EVENT_READ)
+            self._woken = False
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+
+        with self._lock:
+            self._wake()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # internal functions
+    def _wake(self) -> None:
+        """
+        interrupt the selector (lock has to be held)
+        """
+        if self._wake_w is not None and not self._woken:
+            self._woken = True
+            try:
+                self._wake_w.send(b"\0")
+
+            except BlockingIOError:
+                pass
+
+    def _close(self, subscriber: Subscriber) -> None:
+        """
+        lock has to be held
+        """
+        if subscriber.closed:
+            return
+
+        subscriber.closed = True
+        self._subscribers.remove(subscriber)
+
+        if self._selector is not None and subscriber.sock in self._selector.get_map():
+            self._selector.unregister(subscriber.sock)
+
+        self._space.notify_all()
+
+    def _update_interest(self) -> None:
+        """
+        only wait for writability of sockets with pending data
+        """
+        registered = self._selector.get_map()
+        for subscriber in self._subscribers:
+            if subscriber.pending and subscriber.sock not in registered:
+                self._selector.register(subscriber.sock, selectors.EVENT_WRITE, subscriber)
+
+            elif not subscriber.pending and subscriber.sock in registered:
+                self._selector.unregister(subscriber.sock)
+
+    def _run(self) -> None:
+        while self._running:
+            with self._lock:
+                self._update_interest()
+
+            for key, _ in self._selector.select():
+                if key.fileobj is self._wake_r:
+                    with self._lock:
+                        self._woken = False
+                        try:
+                            self._wake_r.recv(4096)
+
+                        except BlockingIOError:
+                            pass
+
+                    continue
+
+                self._write(key.data)
+
+        with self._lock:
+            self._selector.close()
+            self._wake_r.close()
+            self._wake_w.close()
+            self._selector = self._wake_r = self._wake_w = None
+
+    def _write(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            while True:
+                current = subscriber._next()
+                if current is None:
+                    break
+
+                try:
+                    n = subscriber.sock.send(current)
+
+                except BlockingIOError:
+                    break
+
+                except (ConnectionResetError, BrokenPipeError, OSError) as e:
+                    debugger.error("subscriber disconnected: ", e)
+                    self._close(subscriber)
+                    return
+
+                if n < len(current):
+                    subscriber._current = current[n:]
+                    break
+
+                subscriber._current = None
+                subscriber.sent += 1
+
+            self._space.notify_all()
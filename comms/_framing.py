@@ -0,0 +1,130 @@
+"""
+_framing.py
+19. October 2026
+
+length prefixed messages over stream sockets
+
+Author:
+Nilusink
+"""
+from threading import Lock
+from time import monotonic
+import socket
+import struct
+
+from ._common_functions import decode_message
+from ._message_types import Message
+
+
+# every frame is prefixed with its length
+LENGTH = struct.Struct("<I")
+
+
+def frame(payload: bytes) -> bytes:
+    """
+    prefix a payload with its length
+    """
+    return LENGTH.pack(len(payload)) + payload
+
+
+class FrameStream:
+    """
+    length prefixed frames over a stream socket, sending is thread safe
+    """
+    def __init__(self, sock: socket.socket, encoding: str = "utf-8") -> None:
+        self.sock = sock
+        self.encoding = encoding
+        self._buffer = bytearray()
+        self._send_lock = Lock()
+
+        self.last_sent = self.last_received = monotonic()
+
+    def send(self, payload: bytes) -> None:
+        with self._send_lock:
+            self.sock.sendall(frame(payload))
+            self.last_sent = monotonic()
+
+    def receive(self, timeout: float | None) -> list[bytes]:
+        """
+        :return: all frames that arrived within `timeout`
+        :raises ConnectionError: if the peer closed the connection
+        """
+        frames = self._frames()
+        if frames:
+            return frames
+
+        self.sock.settimeout(timeout)
+        try:
+            data = self.sock.recv(1 << 16)
+
+        except socket.timeout:
+            return []
+
+        if not data:
+            raise ConnectionError("peer disconnected")
+
+        self.last_received = monotonic()
+        self._buffer.extend(data)
+        return self._frames()
+
+    def receive_one(self, timeout: float) -> bytes:
+        """
+        :raises TimeoutError: if no frame arrived within `timeout`
+        """
+        deadline = monotonic() + timeout
+        while True:
+            frames = self._frames(limit=1)
+            if frames:
+                return frames[0]
+
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise TimeoutError("no frame received")
+
+            self.sock.settimeout(remaining)
+            try:
+                data = self.sock.recv(1 << 16)
+
+            except socket.timeout:
+                raise TimeoutError("no frame received") from None
+
+            if not data:
+                raise ConnectionError("peer disconnected")
+
+            self.last_received = monotonic()
+            self._buffer.extend(data)
+
+    def receive_messages(self, timeout: float | None) -> list[Message]:
+        """
+        like `receive`, but validated to messages (e.g. of a `FanoutHub`)
+        """
+        messages = []
+        for payload in self.receive(timeout):
+            message = decode_message(payload.decode(self.encoding), lambda _: None)
+            if message is not ...:
+                messages.append(message)
+
+        return messages
+
+    def close(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+
+        except OSError:
+            pass
+
+        self.sock.close()
+
+    # internal functions
+    def _frames(self, limit: int | None = None) -> list[bytes]:
+        frames = []
+        while len(self._buffer) >= LENGTH.size and (limit is None or len(frames) < limit):
+            length, = LENGTH.unpack_from(self._buffer)
+            end = LENGTH.size + length
+            if len(self._buffer) < end:
+                break
+
+            frames.append(bytes(self._buffer[LENGTH.size:end]))
+            del self._buffer[:end]
+
+        return frames
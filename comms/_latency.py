@@ -0,0 +1,316 @@
+"""
+_latency.py
+19. October 2026
+
+latency of every pipeline stage, from stamps that travel with the messages
+
+Author:
+Nilusink
+"""
+from collections import deque
+from time import time
+import math as m
+
+from ._message_types import Message, Stamp, DataMessage
+from ._common_functions import get_device_mac
+
+
+# in pipeline order, custom stages are allowed as well
+STAGES: tuple[str, ...] = ("capture", "send", "receive", "decode", "associate", "publish")
+TOTAL = "total"
+
+
+def stamp(message: Message, stage: str, t: float | None = None) -> Message:
+    """
+    add a stage stamp of this host to a message (in place)
+    """
+    message.stamps.append((stage, time() if t is None else t, get_device_mac()))
+    return message
+
+
+def carry_stamps(source: Message, stage: str | None = None, t: float | None = None) -> list[Stamp]:
+    """
+    stamps for a message derived from `source` (e.g. the track result of a
+    detection), optionally with a new stage
+    """
+    stamps = list(source.stamps)
+    if stage is not None:
+        stamps.append((stage, time() if t is None else t, get_device_mac()))
+
+    return stamps
+
+
+class LatencyHistogram:
+    """
+    Histogram with logarithmic buckets (`buckets_per_decade` per factor of
+    10) between `minimum` and `maximum` seconds, so percentiles have the
+    same relative error from microseconds to seconds.
+    """
+    def __init__(
+            self,
+            minimum: float = 1e-6,
+            maximum: float = 100.,
+            buckets_per_decade: int = 20
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.buckets_per_decade = buckets_per_decade
+
+        # +2: below minimum, above maximum
+        n = m.ceil(m.log10(maximum / minimum) * buckets_per_decade)
+        self._counts = [0] * (n + 2)
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, value: float) -> None:
+        self._counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if len(other._counts) != len(self._counts) or other.minimum != self.minimum:
+            raise ValueError("histograms have different buckets")
+
+        for i, count in enumerate(other._counts):
+            self._counts[i] += count
+
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.
+
+    def percentile(self, q: float) -> float:
+        """
+        :param q: 0 - 100
+        :return: upper bound of the bucket containing the percentile
+        """
+        if not self.count:
+            return 0.
+
+        rank = m.ceil(q / 100 * self.count)
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if seen >= max(rank, 1):
+                return min(self._upper(i), self.max)
+
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    # internal functions
+    def _bucket(self, value: float) -> int:
+        if value < self.minimum:
+            return 0
+
+        if value >= self.maximum:
+            return len(self._counts) - 1
+
+        return 1 + int(m.log10(value / self.minimum) * self.buckets_per_decade)
+
+    def _upper(self, bucket: int) -> float:
+        if bucket == 0:
+            return self.minimum
+
+        if bucket == len(self._counts) - 1:
+            return self.max
+
+        return self.minimum * 10 ** (bucket / self.buckets_per_decade)
+
+
+class ClockOffsetEstimator:
+    """
+    NTP style offset of a peer clock. Every exchange (our send t0, peer
+    receive t1, peer send t2, our receive t3) gives
+
+        offset = ((t1 - t0) + (t2 - t3)) / 2, delay = (t3 - t0) - (t2 - t1)
+
+    and the sample with the lowest delay of the last `window` exchanges is
+    used, as it has the smallest error bound (delay / 2).
+    """
+    def __init__(self, window: int = 8) -> None:
+        self._samples: deque[tuple[float, float]] = deque(maxlen=window)
+
+    def add_exchange(self, t0: float, t1: float, t2: float, t3: float) -> None:
+        delay = (t3 - t0) - (t2 - t1)
+        self._samples.append((max(delay, 0.), ((t1 - t0) + (t2 - t3)) / 2))
+
+    def add_ack(self, sent: float, ack: Message, received: float | None = None) -> None:
+        """
+        use a message and its ack as an exchange, the peer stamps the ack
+        `time` when it received the message
+        """
+        received = time() if received is None else received
+        self.add_exchange(sent, ack.time, ack.time, received)
+
+    @property
+    def synchronized(self) -> bool:
+        return bool(self._samples)
+
+    @property
+    def offset(self) -> float:
+        """
+        peer clock - local clock (seconds)
+        """
+        if not self._samples:
+            return 0.
+
+        return min(self._samples)[1]
+
+    @property
+    def error(self) -> float:
+        if not self._samples:
+            return m.inf
+
+        return min(self._samples)[0] / 2
+
+    def to_local(self, t: float) -> float:
+        return t - self.offset
+
+
+class LatencyTracker:
+    """
+    Collects the stamps of received messages into histograms keyed by
+    (stage, camera, message type). The latency of a stage is the time since
+    the previous stamp, `TOTAL` the time from the first to the last one.
+
+    Stamps of other hosts are moved to the local clock with the offset of
+    `clock(host)`, which has to be fed with exchanges (e.g. `add_ack`).
+
+    A message with several cameras is recorded for each of them, and once
+    (without a camera) for the statistics of all cameras together.
+    """
+    def __init__(self, **histogram_kwargs) -> None:
+        self._histogram_kwargs = histogram_kwargs
+        self._histograms: dict[tuple[str, int, str], LatencyHistogram] = {}
+        self._all_cameras: dict[tuple[str, str], LatencyHistogram] = {}
+        self._clocks: dict[int, ClockOffsetEstimator] = {}
+
+    def clock(self, host: int) -> ClockOffsetEstimator:
+        if host not in self._clocks:
+            self._clocks[host] = ClockOffsetEstimator()
+
+        return self._clocks[host]
+
+    def record(self, message: Message, stage: str | None = None, t: float | None = None) -> None:
+        """
+        :param stage: final stage that happens here (e.g. "associate"),
+            stamped before recording
+        """
+        if stage is not None:
+            stamp(message, stage, t)
+
+        if len(message.stamps) < 2:
+            return
+
+        local = get_device_mac()
+        times = [
+            (name, st if host == local else self.clock(host).to_local(st))
+            for name, st, host in message.stamps
+        ]
+
+        message_type = self._message_type(message)
+        cameras = self._cameras(message)
+
+        latencies = [
+            (name, st - previous)
+            for (_, previous), (name, st) in zip(times, times[1:])
+        ]
+        latencies.append((TOTAL, times[-1][1] - times[0][1]))
+
+        for name, latency in latencies:
+            latency = max(latency, 0.)
+
+            for camera in cameras:
+                self._histogram(name, camera, message_type).add(latency)
+
+            key = (name, message_type)
+            if key not in self._all_cameras:
+                self._all_cameras[key] = LatencyHistogram(**self._histogram_kwargs)
+
+            self._all_cameras[key].add(latency)
+
+    def histogram(
+            self,
+            stage: str = TOTAL,
+            camera: int | None = None,
+            message_type: str | None = None
+    ) -> LatencyHistogram:
+        """
+        :return: merged histogram of everything matching (None: all)
+        """
+        merged = LatencyHistogram(**self._histogram_kwargs)
+        if camera is None:
+            # every message only once, even if it has several cameras
+            for (s, t), histogram in self._all_cameras.items():
+                if s == stage and message_type in (None, t):
+                    merged.merge(histogram)
+
+            return merged
+
+        for (s, c, t), histogram in self._histograms.items():
+            if s == stage and c == camera and message_type in (None, t):
+                merged.merge(histogram)
+
+        return merged
+
+    def report(self, camera: int | None = None, message_type: str | None = None) -> dict[str, dict[str, float]]:
+        """
+        summary of every stage, in pipeline order
+        """
+        seen = {stage for stage, _, _ in self._histograms}
+        order = [s for s in STAGES if s in seen] + sorted(seen - {*STAGES, TOTAL})
+        if TOTAL in seen:
+            order.append(TOTAL)
+
+        return {
+            stage: self.histogram(stage, camera, message_type).summary()
+            for stage in order
+        }
+
+    # internal functions
+    def _histogram(self, stage: str, camera: int, message_type: str) -> LatencyHistogram:
+        key = (stage, camera, message_type)
+        if key not in self._histograms:
+            self._histograms[key] = LatencyHistogram(**self._histogram_kwargs)
+
+        return self._histograms[key]
+
+    @staticmethod
+    def _message_type(message: Message) -> str:
+        if isinstance(message, DataMessage):
+            return message.data.type
+
+        return message.type
+
+    @staticmethod
+    def _cameras(message: Message) -> list[int]:
+        """
+        :return: cameras that contributed to the message, [-1] if none
+        """
+        if not isinstance(message, DataMessage):
+            return [-1]
+
+        data = message.data.data
+        if hasattr(data, "cam_angles"):
+            return sorted({angle.cam_id for angle in data.cam_angles}) or [-1]
+
+        if hasattr(data, "tracks"):
+            return sorted({
+                angle.cam_id for track in data.tracks for angle in track.cam_angles
+            }) or [-1]
+
+        return [getattr(data, "id", -1)]
@@ -10,10 +10,20 @@ from ._message_types import Message
 class MessageFuture:
     _message: Message
 
-    def __init__(self, origin_message: Message | None = None) -> None:
+    def __init__(
+            self,
+            origin_message: Message | None = None,
+            origin_raw: bytes | None = None
+    ) -> None:
+        """
+        :param origin_raw: serialized origin message, only validated if
+            `origin_message` is accessed (for messages that were encoded
+            without building a model)
+        """
         self._message = ...
         self._sem = Semaphore()
         self._origin_message = origin_message
+        self._origin_raw = origin_raw
 
     def done(self) -> bool:
         return self._message is not ...
@@ -50,4 +60,9 @@ class MessageFuture:
 
     @property
     def origin_message(self) -> Message:
+        if self._origin_message is None and self._origin_raw is not None:
+            from ._common_functions import _message_adapter
+
+            self._origin_message = _message_adapter().validate_json(self._origin_raw)
+
         return self._origin_message.copy()
@@ -7,7 +7,7 @@ implements all message types according to the protocol
 Author:
 Nilusink
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_serializer
 import typing as tp
 
 
@@ -36,6 +36,23 @@ class TRes3Data(BaseModel):
     cam_angles: list[CamAngle3]
 
 
+class TRes3Delta(BaseModel):
+    track_id: int
+    base: int  # frame the position is relative to, -1: absolute
+    position: tuple[int, int, int]  # in multiples of TRes3DeltaData.quantum
+    track_type: int
+    accuracy: float
+    cam_angles: list[CamAngle3] = []
+
+
+class TRes3DeltaData(BaseModel):
+    frame: int
+    keyframe: bool  # if set, all tracks not in `tracks` are gone
+    quantum: float
+    tracks: list[TRes3Delta]
+    removed: list[int] = []
+
+
 class SInfData(BaseModel):
     id: int
     position: tuple[float, float, float]
@@ -55,12 +72,17 @@ class TRes3DataMessage(BaseModel):
     data: TRes3Data
 
 
+class TRes3DeltaDataMessage(BaseModel):
+    type: tp.Literal["tres3d"] = "tres3d"
+    data: TRes3DeltaData
+
+
 class SInfDataMessage(BaseModel):
     type: tp.Literal["sinf"] = "sinf"
     data: SInfData
 
 
-DataDataMessage = tp.Annotated[tp.Union[TResDataMessage, TRes3DataMessage, SInfDataMessage], Field(discriminator='type')]
+DataDataMessage = tp.Annotated[tp.Union[TResDataMessage, TRes3DataMessage, TRes3DeltaDataMessage, SInfDataMessage], Field(discriminator='type')]
 
 
 class ReqData(BaseModel):
@@ -78,10 +100,23 @@ class ReplData(BaseModel):
 
 
 # message
+type Stamp = tuple[str, float, int]  # stage, time, host (see _latency.py)
+
+
 class _Message(BaseModel):
     type: str
     id: int
     time: float
+    stamps: list[Stamp] = []
+
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler) -> dict:
+        # only traced messages carry stamps on the wire
+        data = handler(self)
+        if not self.stamps:
+            data.pop("stamps", None)
+
+        return data
 
 class ReqMessage(_Message):
     type: tp.Literal["req"] = "req"
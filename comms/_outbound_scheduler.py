@@ -0,0 +1,298 @@
+"""
+_outbound_scheduler.py
+19. October 2026
+
+orders outgoing messages so acks and control traffic never wait behind data
+
+Author:
+Nilusink
+"""
+from dataclasses import dataclass, field
+from threading import Condition
+from collections import deque
+from time import monotonic
+import typing as tp
+
+from ._message_types import Message, AckMessage, ReqMessage, ReplMessage, DataMessage
+from ._latency import LatencyHistogram
+
+
+type TrafficClass = tp.Literal["ack", "control", "data"]
+
+# in priority order
+CLASSES: tuple[TrafficClass, ...] = ("ack", "control", "data")
+
+
+def classify(message: Message) -> TrafficClass:
+    if isinstance(message, AckMessage):
+        return "ack"
+
+    if isinstance(message, (ReqMessage, ReplMessage)):
+        return "control"
+
+    return "data"
+
+
+@dataclass
+class ClassStats:
+    queued: int = 0
+    sent: int = 0
+    dropped: int = 0  # oldest messages dropped because the class was full
+    delay: LatencyHistogram = field(default_factory=LatencyHistogram)  # seconds queued
+
+
+class _Stream:
+    __slots__ = ("queue", "weight", "deficit", "turn")
+
+    def __init__(self, weight: float) -> None:
+        self.queue: deque[tuple[bytes, float]] = deque()
+        self.weight = weight
+        self.deficit = 0.
+        self.turn = False
+
+
+class OutboundScheduler:
+    """
+    Multi-level queue for one outgoing connection. Acks always go first,
+    then control messages (requests and replies), then data. Data is split
+    into streams (by default one per data type) that share the remaining
+    bandwidth by deficit round robin: per round a stream may send
+    `quantum * weight` bytes.
+
+    Every class holds at most `limits[class]` messages, if it is full the
+    oldest message (of the longest data stream) is dropped. The time every
+    message spent queued is recorded per class in `stats`.
+
+    Producers call `put` from any thread, the sending thread calls `get`
+    or `drain`.
+    """
+    def __init__(
+            self,
+            limits: dict[TrafficClass, int] | None = None,
+            quantum: int = 1500,
+            encoding: str = "utf-8"
+    ) -> None:
+        self.limits: dict[TrafficClass, int] = {"ack": 1024, "control": 256, "data": 4096}
+        self.limits.update(limits or {})
+        self.quantum = quantum
+        self.encoding = encoding
+
+        self.stats: dict[TrafficClass, ClassStats] = {cls: ClassStats() for cls in CLASSES}
+
+        self._condition = Condition()
+        self._closed = False
+
+        self._ack: deque[tuple[bytes, float]] = deque()
+        self._control: deque[tuple[bytes, float]] = deque()
+        self._streams: dict[tp.Hashable, _Stream] = {}
+        self._active: deque[tp.Hashable] = deque()  # streams with queued data
+        self._weights: dict[tp.Hashable, float] = {}
+        self._data_queued = 0
+
+    def __len__(self) -> int:
+        return len(self._ack) + len(self._control) + self._data_queued
+
+    def pending(self, traffic_class: TrafficClass) -> int:
+        with self._condition:
+            match traffic_class:
+                case "ack":
+                    return len(self._ack)
+
+                case "control":
+                    return len(self._control)
+
+                case _:
+                    return self._data_queued
+
+    def set_weight(self, stream: tp.Hashable, weight: float) -> None:
+        """
+        share of a data stream relative to the others (default 1)
+        """
+        if weight <= 0:
+            raise ValueError("stream weight has to be positive")
+
+        with self._condition:
+            self._weights[stream] = weight
+            if stream in self._streams:
+                self._streams[stream].weight = weight
+
+    def put(
+            self,
+            message: Message,
+            stream: tp.Hashable | None = None,
+            now: float | None = None
+    ) -> None:
+        """
+        :param stream: data stream of the message (default: its data type,
+            e.g. "tres3"), ignored for acks and control messages
+        """
+        traffic_class = classify(message)
+        if traffic_class == "data" and stream is None:
+            stream = message.data.type if isinstance(message, DataMessage) else "data"
+
+        self.put_raw(
+            message.model_dump_json().encode(self.encoding),
+            traffic_class,
+            stream,
+            now
+        )
+
+    def put_raw(
+            self,
+            payload: bytes,
+            traffic_class: TrafficClass,
+            stream: tp.Hashable | None = None,
+            now: float | None = None
+    ) -> None:
+        """
+        enqueue an already serialized message
+        """
+        if traffic_class not in CLASSES:
+            raise ValueError(f"invalid traffic class: {traffic_class}")
+
+        entry = (payload, monotonic() if now is None else now)
+        stats = self.stats[traffic_class]
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("scheduler is closed")
+
+            if traffic_class == "data":
+                if self._data_queued >= self.limits["data"]:
+                    self._drop_data()
+
+                self._enqueue_data(entry, "data" if stream is None else stream)
+
+            else:
+                queue = self._ack if traffic_class == "ack" else self._control
+                if len(queue) >= self.limits[traffic_class]:
+                    queue.popleft()
+                    stats.dropped += 1
+
+                queue.append(entry)
+
+            stats.queued += 1
+            self._condition.notify()
+
+    def get(self, timeout: float | None = 0., now: float | None = None) -> bytes | None:
+        """
+        next message to send
+
+        :param timeout: wait up to this long for a message (None: forever)
+        :return: None if nothing was queued in time or the scheduler is closed
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self) or self._closed, timeout):
+                return None
+
+            if not len(self):
+                return None
+
+            traffic_class, (payload, queued) = self._next()
+
+            stats = self.stats[traffic_class]
+            stats.sent += 1
+            stats.delay.add((monotonic() if now is None else now) - queued)
+
+        return payload
+
+    def drain(self, send: tp.Callable[[bytes], tp.Any], max_messages: int | None = None) -> int:
+        """
+        send queued messages in schedule order
+
+        :return: number of messages sent
+        """
+        sent = 0
+        while max_messages is None or sent < max_messages:
+            payload = self.get()
+            if payload is None:
+                break
+
+            send(payload)
+            sent += 1
+
+        return sent
+
+    def close(self) -> None:
+        """
+        wake up all waiting `get` calls, queued messages can still be drained
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def report(self) -> dict[TrafficClass, dict[str, float]]:
+        """
+        queueing delay percentiles and counters per class
+        """
+        # consistent with `get` / `put_raw`, which update them under the lock
+        with self._condition:
+            return {
+                cls: {
+                    "queued": stats.queued,
+                    "sent": stats.sent,
+                    "dropped": stats.dropped,
+                    "pending": self.pending(cls),
+                    **stats.delay.summary(),
+                }
+                for cls, stats in self.stats.items()
+            }
+
+    # internal functions
+    def _enqueue_data(self, entry: tuple[bytes, float], key: tp.Hashable) -> None:
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = _Stream(self._weights.get(key, 1.))
+
+        if not stream.queue:
+            self._active.append(key)
+
+        stream.queue.append(entry)
+        self._data_queued += 1
+
+    def _drop_data(self) -> None:
+        """
+        drop the oldest message of the longest stream, light streams keep
+        their messages
+        """
+        key = max(self._active, key=lambda k: len(self._streams[k].queue))
+        self._pop_stream(key)
+        self.stats["data"].dropped += 1
+
+    def _pop_stream(self, key: tp.Hashable) -> tuple[bytes, float]:
+        stream = self._streams[key]
+        entry = stream.queue.popleft()
+        self._data_queued -= 1
+
+        if not stream.queue:
+            # idle streams don't save up credit
+            stream.deficit = 0.
+            stream.turn = False
+            self._active.remove(key)
+            del self._streams[key]
+
+        return entry
+
+    def _next(self) -> tuple[TrafficClass, tuple[bytes, float]]:
+        if self._ack:
+            return "ack", self._ack.popleft()
+
+        if self._control:
+            return "control", self._control.popleft()
+
+        # deficit round robin, the stream at the front has the turn
+        while True:
+            key = self._active[0]
+            stream = self._streams[key]
+
+            if not stream.turn:
+                stream.deficit += self.quantum * stream.weight
+                stream.turn = True
+
+            size = len(stream.queue[0][0])
+            if size <= stream.deficit:
+                stream.deficit -= size
+                return "data", self._pop_stream(key)
+
+            stream.turn = False
+            self._active.rotate(-1)
@@ -0,0 +1,496 @@
+"""
+_reliability.py
+19. October 2026
+
+sliding window with cumulative / selective acks and an adaptive
+retransmit timeout, for lossy or long round trip links
+
+Author:
+Nilusink
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import RLock
+from time import monotonic
+import typing as tp
+import struct
+
+from ._message_types import AckData, Message, MessageData
+from ._common_functions import build_message, decode_message
+from ._message_future import MessageFuture
+from ..debugging import debugger
+
+
+# kind, sequence number
+_DATA = struct.Struct("<cQ")
+
+# kind, cumulative ack (next expected sequence), free receive window,
+# number of selective ack ranges, followed by (start, end) ranges
+_ACK = struct.Struct("<cQIH")
+_RANGE = struct.Struct("<QQ")
+
+MAX_SACK_RANGES = 16
+
+
+class RttEstimator:
+    """
+    Smoothed round trip time and retransmit timeout as in RFC 6298.
+    Samples of retransmitted messages must not be fed (Karn's algorithm).
+    """
+    def __init__(
+            self,
+            initial_rto: float = 1.,
+            min_rto: float = .2,
+            max_rto: float = 60.,
+            granularity: float = .001,
+            alpha: float = 1 / 8,
+            beta: float = 1 / 4,
+            k: float = 4
+    ) -> None:
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.granularity = granularity
+        self.alpha = alpha
+        self.beta = beta
+        self.k = k
+
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self._rto = initial_rto
+
+    @property
+    def rto(self) -> float:
+        return self._rto
+
+    def sample(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+
+        else:
+            self.rttvar += self.beta * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += self.alpha * (rtt - self.srtt)
+
+        self._rto = self._clamp(self.srtt + max(self.granularity, self.k * self.rttvar))
+
+    def backoff(self) -> None:
+        """
+        double the timeout after it expired
+        """
+        self._rto = self._clamp(self._rto * 2)
+
+    # internal functions
+    def _clamp(self, rto: float) -> float:
+        return min(max(rto, self.min_rto), self.max_rto)
+
+
+@dataclass
+class _InFlight:
+    payload: bytes
+    future: MessageFuture
+    message_id: int
+    sent_at: float
+    retransmits: int = 0
+    sacked: bool = False
+
+
+class ReliableWindow:
+    """
+    Reliable, ordered delivery of payloads over one connection, keeping up
+    to `window` payloads in flight instead of waiting for every ack.
+
+    Every payload gets a sequence number. The receiving side answers with
+    a cumulative ack (everything below it arrived) plus up to
+    `MAX_SACK_RANGES` ranges that arrived out of order, and its free
+    receive buffer, which further limits the window. Payloads are
+    retransmitted after the adaptive timeout of `rtt` or once three acks
+    reported data behind a hole (fast retransmit).
+
+    The returned futures are completed with an `AckMessage` as soon as the
+    peer has the payload, so code waiting on `prepare_message` futures
+    works unchanged. After `max_retransmits` the future gets a NACK and
+    the connection should be considered broken.
+
+    Frames are handed to `send_callback`, received frames go to `receive`.
+    `poll` has to be called regularly (e.g. with the socket timeout) to
+    drive retransmissions.
+    """
+    def __init__(
+            self,
+            send_callback: tp.Callable[[bytes], None],
+            window: int = 64,
+            receive_buffer: int = 256,
+            max_retransmits: int = 10,
+            rtt: RttEstimator | None = None,
+            encoding: str = "utf-8"
+    ) -> None:
+        self.send_callback = send_callback
+        self.window = window
+        self.receive_buffer = receive_buffer
+        self.max_retransmits = max_retransmits
+        self.rtt = RttEstimator() if rtt is None else rtt
+        self.encoding = encoding
+
+        self._lock = RLock()
+
+        # sending
+        self._next_seq = 0
+        self._unacked = 0  # lowest sequence that wasn't cumulatively acked
+        self._peer_window = receive_buffer
+        self._in_flight: OrderedDict[int, _InFlight] = OrderedDict()
+        self._backlog: OrderedDict[int, _InFlight] = OrderedDict()
+        self._duplicate_acks = 0
+        self._timer_start: float | None = None  # retransmit timer
+
+        # receiving
+        self._expected = 0
+        self._out_of_order: dict[int, bytes] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def queued(self) -> int:
+        return len(self._backlog)
+
+    def send(self, payload: bytes, message_id: int | None = None) -> MessageFuture:
+        """
+        send a payload, queued if the window is full
+
+        :param message_id: id the acknowledging `AckMessage` refers to,
+            the sequence number if not given
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+
+            entry = _InFlight(
+                payload=payload,
+                future=MessageFuture(origin_raw=payload),
+                message_id=seq if message_id is None else message_id,
+                sent_at=0.
+            )
+            self._backlog[seq] = entry
+            self._fill_window(monotonic())
+
+            return entry.future
+
+    def send_message(self, message: Message) -> MessageFuture:
+        return self.send(message.model_dump_json().encode(self.encoding), message.id)
+
+    def send_data(self, data: MessageData) -> MessageFuture:
+        """
+        build and send a message, the replacement for `prepare_message`
+        """
+        return self.send_message(build_message(data))
+
+    def receive(self, frame: bytes) -> list[bytes]:
+        """
+        handle a received frame
+
+        :return: payloads that can now be delivered, in order
+        """
+        if len(frame) < 1:
+            return []
+
+        match frame[:1]:
+            case b"D":
+                return self._receive_data(frame)
+
+            case b"A":
+                self._receive_ack(frame)
+                return []
+
+            case _:
+                debugger.warning(f"received unknown frame kind {frame[:1]!r}")
+                return []
+
+    def receive_messages(self, frame: bytes) -> list[Message]:
+        """
+        like `receive`, but validated to messages
+        """
+        messages = []
+        for payload in self.receive(frame):
+            message = decode_message(payload.decode(self.encoding), lambda _: None)
+            if message is not ...:
+                messages.append(message)
+
+        return messages
+
+    def poll(self, now: float | None = None) -> float | None:
+        """
+        retransmit everything whose timeout expired
+
+        :return: seconds until the next timeout, None if nothing is in flight
+        """
+        now = monotonic() if now is None else now
+
+        with self._lock:
+            if not self._in_flight:
+                if self._backlog and self._peer_window == 0:
+                    return self._probe_window(now)
+
+                self._timer_start = None
+                return None
+
+            if self._timer_start is None:
+                self._timer_start = now
+
+            deadline = self._timer_start + self.rtt.rto
+            if now < deadline:
+                return deadline - now
+
+            # the timer expired, resend everything that had a full timeout
+            # to be acked, at least the oldest payload
+            rto = self.rtt.rto
+            waiting = [
+                (seq, entry) for seq, entry in self._in_flight.items()
+                if not entry.sacked
+            ]
+            expired = [(seq, entry) for seq, entry in waiting if now - entry.sent_at >= rto]
+            for seq, entry in expired or waiting[:1]:
+                self._retransmit(seq, entry, now)
+
+            # one backoff per timeout, not per payload
+            self.rtt.backoff()
+            self._timer_start = now if self._in_flight else None
+            return self.rtt.rto
+
+    def resume(
+            self,
+            send_callback: tp.Callable[[bytes], None] | None = None,
+            now: float | None = None
+    ) -> None:
+        """
+        continue over a new connection to the same peer: everything in
+        flight is sent again right away and the peer gets our ack state
+        """
+        now = monotonic() if now is None else now
+
+        with self._lock:
+            if send_callback is not None:
+                self.send_callback = send_callback
+
+            for seq, entry in self._in_flight.items():
+                if not entry.sacked:
+                    # the old connection is gone, so this isn't counted as
+                    # a retransmit (and still gives a valid rtt sample)
+                    entry.sent_at = now
+                    self.send_callback(_DATA.pack(b"D", seq) + entry.payload)
+
+            self._duplicate_acks = 0
+            self._timer_start = now if self._in_flight else None
+            self._fill_window(now)
+            self._send_ack()
+
+    def reset(self, preamble: tp.Iterable[Message] = ()) -> list[MessageFuture]:
+        """
+        Start over with a peer that lost its state (e.g. a new session after
+        a reconnect). Unacked payloads are kept and sent again with new
+        sequence numbers after the `preamble` messages, once `resume` is
+        called. Payloads the peer got but didn't ack yet arrive twice.
+
+        :return: futures of the preamble messages
+        """
+        with self._lock:
+            futures = []
+            entries = []
+            for message in preamble:
+                future = MessageFuture(message)
+                futures.append(future)
+                entries.append(_InFlight(
+                    message.model_dump_json().encode(self.encoding), future, message.id, 0.
+                ))
+
+            entries.extend(self._in_flight.values())
+            entries.extend(self._backlog.values())
+
+            self._backlog = OrderedDict()
+            for seq, entry in enumerate(entries):
+                entry.sent_at = 0.
+                entry.retransmits = 0
+                entry.sacked = False
+                self._backlog[seq] = entry
+
+            self._next_seq = len(entries)
+            self._unacked = 0
+            self._peer_window = self.receive_buffer
+            self._in_flight.clear()
+            self._duplicate_acks = 0
+            self._timer_start = None
+
+            self._expected = 0
+            self._out_of_order.clear()
+
+            return futures
+
+    # internal functions
+    def _probe_window(self, now: float) -> float:
+        """
+        The peer reported a full receive buffer and nothing is in flight,
+        so no ack would ever reopen the window: send the next payload
+        anyway once per timeout, its ack carries the new window.
+        """
+        if self._timer_start is None:
+            self._timer_start = now
+
+        deadline = self._timer_start + self.rtt.rto
+        if now < deadline:
+            return deadline - now
+
+        seq, entry = self._backlog.popitem(last=False)
+        entry.sent_at = now
+        self._in_flight[seq] = entry
+        self.send_callback(_DATA.pack(b"D", seq) + entry.payload)
+
+        self.rtt.backoff()
+        self._timer_start = now
+        return self.rtt.rto
+
+    def _fill_window(self, now: float) -> None:
+        limit = min(self.window, self._peer_window)
+
+        while self._backlog and len(self._in_flight) < limit:
+            seq, entry = self._backlog.popitem(last=False)
+            entry.sent_at = now
+            self._in_flight[seq] = entry
+            if self._timer_start is None:
+                self._timer_start = now
+
+            self.send_callback(_DATA.pack(b"D", seq) + entry.payload)
+
+    def _retransmit(self, seq: int, entry: _InFlight, now: float) -> None:
+        if entry.retransmits >= self.max_retransmits:
+            debugger.error(f"giving up on message {entry.message_id} after {entry.retransmits} retransmits")
+            del self._in_flight[seq]
+            self._complete(entry, False)
+            return
+
+        debugger.trace(f"retransmitting sequence {seq}")
+        entry.retransmits += 1
+        entry.sent_at = now
+        self.send_callback(_DATA.pack(b"D", seq) + entry.payload)
+
+    def _receive_ack(self, frame: bytes) -> None:
+        if len(frame) < _ACK.size:
+            debugger.warning("received truncated ack frame")
+            return
+
+        _, cumulative, peer_window, n_ranges = _ACK.unpack_from(frame)
+        ranges = [
+            _RANGE.unpack_from(frame, _ACK.size + i * _RANGE.size)
+            for i in range(min(n_ranges, (len(frame) - _ACK.size) // _RANGE.size))
+        ]
+        now = monotonic()
+
+        with self._lock:
+            self._peer_window = peer_window
+            progress = cumulative > self._unacked
+
+            # cumulative
+            while self._in_flight:
+                seq = next(iter(self._in_flight))
+                if seq >= cumulative:
+                    break
+
+                entry = self._in_flight.pop(seq)
+                if not entry.sacked:
+                    # sacked entries already gave their rtt sample
+                    self._acked(entry, now)
+
+            self._unacked = max(self._unacked, cumulative)
+            if progress:
+                self._timer_start = now if self._in_flight else None
+
+            # selective
+            highest_sacked = -1
+            for start, end in ranges:
+                for seq in range(max(start, cumulative), end):
+                    entry = self._in_flight.get(seq)
+                    if entry is not None and not entry.sacked:
+                        entry.sacked = True
+                        self._acked(entry, now)
+
+                highest_sacked = max(highest_sacked, end - 1)
+
+            # fast retransmit of the first hole
+            if progress or highest_sacked < 0:
+                self._duplicate_acks = 0
+
+            else:
+                self._duplicate_acks += 1
+                if self._duplicate_acks == 3:
+                    entry = self._in_flight.get(cumulative)
+                    if entry is not None and not entry.sacked:
+                        self._retransmit(cumulative, entry, now)
+
+            self._fill_window(now)
+
+    def _acked(self, entry: _InFlight, now: float) -> None:
+        if entry.retransmits == 0:
+            self.rtt.sample(now - entry.sent_at)
+
+        self._complete(entry, True)
+
+    @staticmethod
+    def _complete(entry: _InFlight, ack: bool) -> None:
+        if entry.future.done():
+            return
+
+        entry.future.message = build_message(AckData(to=entry.message_id, ack=ack))
+
+    def _receive_data(self, frame: bytes) -> list[bytes]:
+        if len(frame) < _DATA.size:
+            debugger.warning("received truncated data frame")
+            return []
+
+        _, seq = _DATA.unpack_from(frame)
+        payload = frame[_DATA.size:]
+
+        delivered = []
+        with self._lock:
+            if seq == self._expected:
+                delivered.append(payload)
+                self._expected += 1
+
+                while self._expected in self._out_of_order:
+                    delivered.append(self._out_of_order.pop(self._expected))
+                    self._expected += 1
+
+            elif self._expected < seq < self._expected + self.receive_buffer:
+                self._out_of_order.setdefault(seq, payload)
+
+            # duplicates and frames beyond the buffer are only acked
+
+            self._send_ack()
+
+        return delivered
+
+    def _send_ack(self) -> None:
+        ranges = self._sack_ranges()
+        frame = _ACK.pack(
+            b"A",
+            self._expected,
+            self.receive_buffer - len(self._out_of_order),
+            len(ranges)
+        ) + b"".join(_RANGE.pack(start, end) for start, end in ranges)
+
+        self.send_callback(frame)
+
+    def _sack_ranges(self) -> list[tuple[int, int]]:
+        """
+        out of order sequences as [start, end) ranges, highest first
+        """
+        ranges: list[tuple[int, int]] = []
+        for seq in sorted(self._out_of_order, reverse=True):
+            if ranges and ranges[-1][0] == seq + 1:
+                ranges[-1] = (seq, ranges[-1][1])
+
+            elif len(ranges) == MAX_SACK_RANGES:
+                break
+
+            else:
+                ranges.append((seq, seq + 1))
+
+        return ranges
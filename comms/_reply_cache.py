@@ -0,0 +1,231 @@
+"""
+_reply_cache.py
+19. October 2026
+
+serialized replies to repeated requests, patched with the new to / id / time
+
+Author:
+Nilusink
+"""
+from collections import OrderedDict
+from time import monotonic, time
+from pydantic_core import to_json
+from dataclasses import dataclass
+from threading import Lock
+import typing as tp
+
+from ._common_functions import get_device_mac
+from ._message_types import ReqMessage
+from ._wire_encoder import format_float
+
+
+type CacheKey = tuple[str, tuple[str, ...], tuple[tuple[str, tp.Any], ...]]
+
+# same layout as `ReplMessage(data=ReplData(...)).model_dump_json()`
+_REPL_HEAD = '{"type":"repl","id":%d,"time":%s,"data":{"to":%d,"data":'
+_REPL_TAIL = b'}}'
+
+# bookkeeping per entry, counted against `max_bytes`
+_ENTRY_OVERHEAD = 200
+
+
+def request_key(req: str, params: tp.Mapping[str, tp.Any] | None = None) -> CacheKey:
+    """
+    "<command> [args ...]" and optional extra parameters
+    """
+    command, *args = req.split() or ("",)
+    return command, tuple(args), tuple(sorted((params or {}).items()))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evicted: int = 0
+    invalidated: int = 0
+
+
+@dataclass
+class _Entry:
+    body: bytes  # serialized `ReplData.data`
+    expires: float
+    tags: frozenset[tp.Hashable]
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + _ENTRY_OVERHEAD
+
+
+class ReplyCache:
+    """
+    Caches the serialized `ReplData.data` of requests, so answering a
+    repeated request only costs a lookup and formatting the message head
+    (`to`, `id` and `time` of the new reply).
+
+    Entries expire after their ttl, can be dropped by tag (e.g. the tag of
+    a camera when it is recalibrated, see `invalidate`) and the least
+    recently used ones are evicted once the cache holds more than
+    `max_bytes`.
+    """
+    def __init__(
+            self,
+            max_bytes: int = 4 * 1024 * 1024,
+            ttl: float = 1.,
+            encoding: str = "utf-8"
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.encoding = encoding
+
+        self.stats = CacheStats()
+
+        self._lock = Lock()
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._tags: dict[tp.Hashable, set[CacheKey]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """
+        bytes held, including a fixed overhead per entry
+        """
+        return self._size
+
+    def get(
+            self,
+            request: ReqMessage,
+            params: tp.Mapping[str, tp.Any] | None = None,
+            now: float | None = None
+    ) -> bytes | None:
+        """
+        :return: reply message bytes, None if not cached
+        """
+        key = request_key(request.data.req, params)
+        now = monotonic() if now is None else now
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= now:
+                self._remove(key)
+                self.stats.expired += 1
+                entry = None
+
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+
+        return self._encode(request.id, entry.body)
+
+    def put(
+            self,
+            request: ReqMessage,
+            data: dict,
+            params: tp.Mapping[str, tp.Any] | None = None,
+            ttl: float | None = None,
+            tags: tp.Iterable[tp.Hashable] = (),
+            now: float | None = None
+    ) -> bytes:
+        """
+        cache the reply data of a request
+
+        :param tags: invalidate the entry together with everything else
+            that has one of these tags
+        :return: reply message bytes
+        """
+        key = request_key(request.data.req, params)
+        now = monotonic() if now is None else now
+        entry = _Entry(
+            body=to_json(data),
+            expires=now + (self.ttl if ttl is None else ttl),
+            tags=frozenset(tags)
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if entry.size <= self.max_bytes:
+                self._entries[key] = entry
+                self._size += entry.size
+                for tag in entry.tags:
+                    self._tags.setdefault(tag, set()).add(key)
+
+                self._evict()
+
+        return self._encode(request.id, entry.body)
+
+    def reply(
+            self,
+            request: ReqMessage,
+            build: tp.Callable[[], dict],
+            params: tp.Mapping[str, tp.Any] | None = None,
+            ttl: float | None = None,
+            tags: tp.Iterable[tp.Hashable] = ()
+    ) -> bytes:
+        """
+        cached reply, `build` is only called on a miss
+        """
+        cached = self.get(request, params)
+        if cached is not None:
+            return cached
+
+        return self.put(request, build(), params, ttl, tags)
+
+    def invalidate(self, *tags: tp.Hashable) -> int:
+        """
+        drop all entries with any of the tags
+
+        :return: number of dropped entries
+        """
+        with self._lock:
+            keys = set().union(*(self._tags.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._remove(key)
+
+            self.stats.invalidated += len(keys)
+            return len(keys)
+
+    def invalidate_request(self, req: str, params: tp.Mapping[str, tp.Any] | None = None) -> bool:
+        with self._lock:
+            key = request_key(req, params)
+            if key not in self._entries:
+                return False
+
+            self._remove(key)
+            self.stats.invalidated += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.stats.invalidated += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+
+    # internal functions
+    def _encode(self, to: int, body: bytes) -> bytes:
+        t = time()
+        head = _REPL_HEAD % (int(t * 1e6 + get_device_mac()), format_float(t), to)
+        return b"".join((head.encode(self.encoding), body, _REPL_TAIL))
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+        for tag in entry.tags:
+            keys = self._tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats.evicted += 1
@@ -0,0 +1,419 @@
+"""
+_shm_transport.py
+19. October 2026
+
+message transport over shared memory for producers and consumers on the
+same host
+
+Author:
+Nilusink
+"""
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing import resource_tracker
+from time import perf_counter, sleep
+import typing as tp
+import struct
+import select
+import sys
+import os
+
+from ._common_functions import prepare_message, decode_message
+from ._message_types import Message, MessageData, AckData
+from ._message_future import MessageFuture
+from ..debugging import debugger
+
+
+# header layout, every counter on its own cache line
+_HEAD = 0       # uint64, bytes written (producer)
+_TAIL = 64      # uint64, bytes read (consumer)
+_WAITING = 128  # uint32, consumer is sleeping on the eventfd
+_DATA = 192
+
+_LEN = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_U32 = struct.Struct("<I")
+_WRAP = 0xFFFFFFFF
+
+# busy polling before sleeping (useless with a single core)
+_SPIN = 2000 if (os.cpu_count() or 1) > 1 else 0
+_MAX_BACKOFF = .001
+
+# longer than a store can take to become visible to the other process,
+# see `ShmRing._sleep`
+_SETTLE = 100e-6
+
+
+def _inherited_resource_tracker() -> bool:
+    """
+    whether this process uses the resource tracker of a parent process
+    """
+    tracker = resource_tracker._resource_tracker
+    if tracker._fd is None:
+        return False
+
+    # spawned children only get the fd
+    if tracker._pid is None:
+        return True
+
+    # forked children copy the pid of the parent's tracker
+    try:
+        os.waitpid(tracker._pid, os.WNOHANG)
+
+    except ChildProcessError:
+        return True
+
+    return False
+
+
+class ShmRing:
+    """
+    Lock-free single producer / single consumer ring buffer of length
+    prefixed records in `multiprocessing.shared_memory`.
+
+    The producer only writes `head`, the consumer only writes `tail`, both
+    are aligned 8 byte stores that are published after the data. That
+    relies on the store ordering of x86 (TSO).
+
+    Sending and receiving are plain memory operations. A waiting consumer
+    spins first and then sleeps, either on an (inherited) eventfd that the
+    producer only signals if the consumer announced it is sleeping, or
+    with an exponential backoff if there is none.
+    """
+    def __init__(
+            self,
+            shm: SharedMemory,
+            owner: bool,
+            eventfd: int | None = None
+    ) -> None:
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+        self._capacity = shm.size - _DATA
+        self.eventfd = eventfd
+
+    @classmethod
+    def create(
+            cls,
+            name: str | None = None,
+            capacity: int = 1 << 20,
+            use_eventfd: bool = hasattr(os, "eventfd")
+    ) -> tp.Self:
+        """
+        create a new ring, the eventfd is only usable by processes that
+        inherit it (fork / pass_fds)
+        """
+        shm = SharedMemory(name=name, create=True, size=_DATA + capacity)
+        shm.buf[:_DATA] = bytes(_DATA)
+
+        eventfd = None
+        if use_eventfd:
+            eventfd = os.eventfd(0, os.EFD_NONBLOCK)
+            os.set_inheritable(eventfd, True)
+
+        return cls(shm, owner=True, eventfd=eventfd)
+
+    @classmethod
+    def attach(cls, name: str, eventfd: int | None = None) -> tp.Self:
+        # only the creator should unlink the segment
+        if sys.version_info >= (3, 13):
+            shm = SharedMemory(name=name, track=False)
+
+        else:
+            shm = SharedMemory(name=name)
+
+            # attaching registers the segment too. A tracker of our own would
+            # unlink it when this process exits, one inherited from the
+            # creator (fork / spawn) has to keep the creator's registration
+            if not _inherited_resource_tracker():
+                resource_tracker.unregister(shm._name, "shared_memory")
+
+        return cls(shm, owner=False, eventfd=eventfd)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+
+        if self._owner:
+            self._shm.unlink()
+
+            if self.eventfd is not None:
+                os.close(self.eventfd)
+
+    # producer side
+    def try_write(self, payload: bytes) -> bool:
+        """
+        :return: False if there is not enough space
+        """
+        size = _LEN.size + len(payload)
+        if size > self._capacity:
+            raise ValueError("message is larger than the ring")
+
+        head = self._load(_HEAD)
+        tail = self._load(_TAIL)
+
+        offset = head % self._capacity
+        contiguous = self._capacity - offset
+
+        # records never wrap, skip the rest of the ring instead
+        needed = size if size <= contiguous else contiguous + size
+        if self._capacity - (head - tail) < needed:
+            return False
+
+        if size > contiguous:
+            if contiguous >= _LEN.size:
+                _LEN.pack_into(self._buf, _DATA + offset, _WRAP)
+
+            head += contiguous
+            offset = 0
+
+        _LEN.pack_into(self._buf, _DATA + offset, len(payload))
+        start = _DATA + offset + _LEN.size
+        self._buf[start:start + len(payload)] = payload
+
+        # publish
+        _U64.pack_into(self._buf, _HEAD, head + size)
+
+        if self.eventfd is not None and _U32.unpack_from(self._buf, _WAITING)[0]:
+            os.eventfd_write(self.eventfd, 1)
+
+        return True
+
+    def write(self, payload: bytes, timeout: float | None = None) -> None:
+        """
+        write a record, waits while the ring is full
+        """
+        self._wait(lambda: self.try_write(payload), timeout, "ring is full")
+
+    # consumer side
+    def try_read(self) -> bytes | None:
+        """
+        :return: the next record, None if the ring is empty
+        """
+        tail = self._load(_TAIL)
+        while True:
+            head = self._load(_HEAD)
+            if head == tail:
+                return None
+
+            offset = tail % self._capacity
+            contiguous = self._capacity - offset
+
+            if contiguous < _LEN.size:
+                tail += contiguous
+                continue
+
+            length = _LEN.unpack_from(self._buf, _DATA + offset)[0]
+            if length == _WRAP:
+                tail += contiguous
+                continue
+
+            start = _DATA + offset + _LEN.size
+            payload = bytes(self._buf[start:start + length])
+
+            _U64.pack_into(self._buf, _TAIL, tail + _LEN.size + length)
+            return payload
+
+    def read(self, timeout: float | None = None) -> bytes | None:
+        """
+        read the next record, waits while the ring is empty
+
+        :return: None on timeout
+        """
+        payload = self.try_read()
+        if payload is not None:
+            return payload
+
+        result: list[bytes] = []
+
+        def attempt() -> bool:
+            data = self.try_read()
+            if data is None:
+                return False
+
+            result.append(data)
+            return True
+
+        try:
+            self._wait(attempt, timeout, "", sleep_on_eventfd=True)
+
+        except TimeoutError:
+            return None
+
+        return result[0]
+
+    # internal functions
+    def _load(self, offset: int) -> int:
+        return _U64.unpack_from(self._buf, offset)[0]
+
+    def _sleep(self, attempt: tp.Callable[[], bool], timeout: float | None) -> bool:
+        """
+        sleep on the eventfd until the producer signals it
+
+        The consumer stores the waiting flag and loads head, the producer
+        stores head and loads the flag. Without a fence in between both
+        loads can miss the other store, then nobody signals. So the first
+        sleep only lasts until both stores are certainly visible, after
+        that either the consumer sees the record or the producer sees the
+        flag of this (second) sleep.
+
+        :return: whether `attempt` succeeded
+        """
+        _U32.pack_into(self._buf, _WAITING, 1)
+        try:
+            if attempt():
+                return True
+
+            self._wait_eventfd(_SETTLE if timeout is None else min(_SETTLE, timeout))
+            if attempt():
+                return True
+
+            if timeout is None or timeout > _SETTLE:
+                self._wait_eventfd(None if timeout is None else timeout - _SETTLE)
+
+            return False
+
+        finally:
+            _U32.pack_into(self._buf, _WAITING, 0)
+
+    def _wait_eventfd(self, timeout: float | None) -> None:
+        select.select([self.eventfd], [], [], timeout)
+        try:
+            os.eventfd_read(self.eventfd)
+
+        except BlockingIOError:
+            pass
+
+    def _wait(
+            self,
+            attempt: tp.Callable[[], bool],
+            timeout: float | None,
+            error: str,
+            sleep_on_eventfd: bool = False
+    ) -> None:
+        start = perf_counter()
+        for _ in range(_SPIN):
+            if attempt():
+                return
+
+        backoff = 1e-6
+        while True:
+            remaining = None if timeout is None else timeout - (perf_counter() - start)
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(error)
+
+            if sleep_on_eventfd and self.eventfd is not None:
+                if self._sleep(attempt, remaining):
+                    return
+
+            else:
+                sleep(backoff if remaining is None else min(backoff, remaining))
+                backoff = min(backoff * 2, _MAX_BACKOFF)
+
+            if attempt():
+                return
+
+
+class ShmTransport:
+    """
+    Bidirectional message link over two `ShmRing`s with the same
+    send / receive / ack contract as the socket functions.
+    """
+    def __init__(
+            self,
+            tx: ShmRing,
+            rx: ShmRing,
+            encoding: str = "utf-8"
+    ) -> None:
+        self.tx = tx
+        self.rx = rx
+        self.encoding = encoding
+
+    @classmethod
+    def create(cls, name: str, capacity: int = 1 << 20, **kwargs) -> tp.Self:
+        """
+        create both rings (server side)
+        """
+        return cls(
+            ShmRing.create(f"{name}_tx", capacity),
+            ShmRing.create(f"{name}_rx", capacity),
+            **kwargs
+        )
+
+    @classmethod
+    def attach(
+            cls,
+            name: str,
+            eventfds: tuple[int | None, int | None] = (None, None),
+            **kwargs
+    ) -> tp.Self:
+        """
+        attach to rings created by `create` (client side, directions swapped)
+
+        :param eventfds: inherited eventfds of the (server tx, server rx) rings
+        """
+        return cls(
+            ShmRing.attach(f"{name}_rx", eventfds[1]),
+            ShmRing.attach(f"{name}_tx", eventfds[0]),
+            **kwargs
+        )
+
+    @property
+    def eventfds(self) -> tuple[int | None, int | None]:
+        return self.tx.eventfd, self.rx.eventfd
+
+    def close(self) -> None:
+        self.tx.close()
+        self.rx.close()
+
+    def send(
+            self,
+            data: MessageData,
+            message_queue_callback: tp.Callable[[MessageFuture], None],
+            timeout: float | None = None
+    ) -> tuple[Message, MessageFuture | None]:
+        """
+        prepare and send message data (see `prepare_message`)
+        """
+        message, future = prepare_message(data, message_queue_callback)
+        self.send_message(message, timeout)
+
+        return message, future
+
+    def send_message(self, message: Message, timeout: float | None = None) -> None:
+        self.tx.write(message.model_dump_json().encode(self.encoding), timeout)
+
+    def send_ack(self, to: int, ack: bool = True) -> None:
+        """
+        acks don't create a future
+        """
+        self.send(AckData(to=to, ack=ack), lambda _: None)
+
+    def receive(self, timeout: float | None = None) -> Message:
+        """
+        receives a message and converts it to Pydantic
+
+        :return: ... on timeout or invalid message (a NACK has been sent)
+        """
+        payload = self.rx.read(timeout)
+        if payload is None:
+            return ...
+
+        try:
+            data = payload.decode(self.encoding)
+
+        except UnicodeDecodeError:
+            debugger.error("received undecodable message")
+            return ...
+
+        return decode_message(
+            data,
+            lambda nack: self.send(nack, lambda _: None)
+        )
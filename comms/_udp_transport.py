@@ -0,0 +1,245 @@
+"""
+_udp_transport.py
+19. October 2026
+
+unreliable datagram channel for high rate data messages
+
+Author:
+Nilusink
+"""
+from dataclasses import dataclass
+from collections import deque
+from time import time_ns
+import struct
+import socket
+
+from ._message_types import TResData, TRes3Data, TRes3DeltaData, DataMessage
+from ._message_types import TResDataMessage, TRes3DataMessage, Message
+from ._common_functions import build_message, decode_message
+from ..debugging import debugger
+
+
+type Address = tuple[str, int]
+
+# epoch (start time of the sender in µs) and sequence number in front of
+# every datagram, a restarted sender starts a new epoch
+_HEADER = struct.Struct("<QQ")
+MAX_DATAGRAM = 65507
+
+# data that goes stale within a tick, everything else (requests, replies,
+# acks and sensor info) has to stay on the reliable channel
+UdpData = TResData | TRes3Data | TRes3DeltaData
+
+
+@dataclass
+class UdpStats:
+    received: int = 0
+    lost: int = 0
+    reordered: int = 0
+    duplicates: int = 0
+    stale: int = 0  # dropped, a newer result for the same track or a newer epoch was delivered
+
+
+class UdpDataSender:
+    """
+    Sends data messages as single datagrams with a sequence number. There
+    are no acks and no retransmits, a lost message is simply replaced by
+    the next one.
+
+    Sequence numbers start at 0 in every new epoch (one per sender object).
+    """
+    def __init__(
+            self,
+            sock: socket.socket,
+            address: Address,
+            encoding: str = "utf-8"
+    ) -> None:
+        self.sock = sock
+        self.address = address
+        self.encoding = encoding
+        self.epoch = time_ns() // 1000
+        self._seq = 0
+
+    def send(self, data: UdpData) -> DataMessage:
+        if not isinstance(data, UdpData):
+            raise ValueError(
+                f"{type(data).__name__} has to be sent over the reliable channel"
+            )
+
+        message = build_message(data)
+        self.send_message(message)
+
+        return message
+
+    def send_message(self, message: DataMessage) -> None:
+        payload = message.model_dump_json().encode(self.encoding)
+        if len(payload) + _HEADER.size > MAX_DATAGRAM:
+            raise ValueError("message is too large for a datagram")
+
+        self.sock.sendto(_HEADER.pack(self.epoch, self._seq) + payload, self.address)
+        self._seq += 1
+
+
+class UdpDataReceiver:
+    """
+    Receives datagrams of one or more `UdpDataSender`s. Per sender it
+    detects gaps, reordering and duplicates; track results are delivered
+    latest-wins, so a late result for a track that already got a newer
+    one is dropped.
+
+    A sender that restarted (newer epoch) starts over with fresh sequence
+    state, datagrams of an older epoch are dropped as stale.
+    """
+    def __init__(
+            self,
+            sock: socket.socket,
+            encoding: str = "utf-8",
+            window: int = 1024
+    ) -> None:
+        self.sock = sock
+        self.encoding = encoding
+        self.window = window
+
+        self._stats: dict[Address, UdpStats] = {}
+        self._epochs: dict[Address, int] = {}
+        self._highest: dict[Address, int] = {}
+
+        # recently seen sequence numbers per sender, for duplicates
+        self._seen: dict[Address, tuple[set[int], deque[int]]] = {}
+
+        # newest sequence number delivered per (sender, track)
+        self._latest: dict[tuple[Address, int], int] = {}
+
+    def stats(self, address: Address | None = None) -> UdpStats:
+        """
+        :param address: sender, None for all senders combined
+        """
+        if address is not None:
+            return self._stats.setdefault(address, UdpStats())
+
+        total = UdpStats()
+        for stats in self._stats.values():
+            for name in total.__dataclass_fields__:
+                setattr(total, name, getattr(total, name) + getattr(stats, name))
+
+        return total
+
+    def forget(self, address: Address) -> None:
+        """
+        drop the state of a sender
+        """
+        self._stats.pop(address, None)
+        self._epochs.pop(address, None)
+        self._reset_sequence(address)
+
+    def receive(self) -> tuple[Message, Address]:
+        """
+        receive the next datagram (respects the socket timeout)
+
+        :return: ... as message if the datagram timed out, was invalid or
+            stale
+        """
+        try:
+            datagram, address = self.sock.recvfrom(MAX_DATAGRAM)
+
+        except socket.timeout:
+            return ..., None
+
+        return self.handle_datagram(datagram, address), address
+
+    def handle_datagram(self, datagram: bytes, address: Address) -> Message:
+        if len(datagram) < _HEADER.size:
+            debugger.warning(f"received truncated datagram from {address}")
+            return ...
+
+        epoch, seq = _HEADER.unpack_from(datagram)
+        if not self._track_epoch(address, epoch) or not self._track_sequence(address, seq):
+            return ...
+
+        try:
+            data = datagram[_HEADER.size:].decode(self.encoding)
+
+        except UnicodeDecodeError:
+            debugger.error(f"received undecodable datagram from {address}")
+            return ...
+
+        # there is no way to NACK, the next message replaces this one anyway
+        message = decode_message(data, lambda _: None)
+        if message is ... or not isinstance(message, DataMessage):
+            return ...
+
+        track_id = self._track_id(message)
+        if track_id is not None:
+            key = (address, track_id)
+            if self._latest.get(key, -1) > seq:
+                self._stats[address].stale += 1
+                return ...
+
+            self._latest[key] = seq
+
+        return message
+
+    # internal functions
+    def _track_epoch(self, address: Address, epoch: int) -> bool:
+        """
+        :return: False if the datagram is from before a restart
+        """
+        current = self._epochs.get(address)
+        if current is None or epoch > current:
+            if current is not None:
+                debugger.info(f"udp sender {address} restarted")
+                self._reset_sequence(address)
+
+            self._epochs[address] = epoch
+
+        elif epoch < current:
+            self._stats.setdefault(address, UdpStats()).stale += 1
+            return False
+
+        return True
+
+    def _reset_sequence(self, address: Address) -> None:
+        self._highest.pop(address, None)
+        self._seen.pop(address, None)
+
+        for key in [key for key in self._latest if key[0] == address]:
+            del self._latest[key]
+
+    def _track_sequence(self, address: Address, seq: int) -> bool:
+        """
+        update gap / reorder statistics
+
+        :return: False if the datagram is a duplicate
+        """
+        stats = self._stats.setdefault(address, UdpStats())
+        seen, order = self._seen.setdefault(address, (set(), deque()))
+
+        if seq in seen:
+            stats.duplicates += 1
+            return False
+
+        seen.add(seq)
+        order.append(seq)
+        if len(order) > self.window:
+            seen.discard(order.popleft())
+
+        stats.received += 1
+        highest = self._highest.get(address, -1)
+
+        if seq > highest:
+            stats.lost += seq - highest - 1
+            self._highest[address] = seq
+
+        else:
+            # counted as lost when the gap was detected
+            stats.reordered += 1
+            stats.lost -= 1
+
+        return True
+
+    @staticmethod
+    def _track_id(message: DataMessage) -> int | None:
+        if isinstance(message.data, (TResDataMessage, TRes3DataMessage)):
+            return message.data.data.track_id
+
+        return None
@@ -0,0 +1,203 @@
+"""
+_wire_encoder.py
+19. October 2026
+
+encodes tracks straight to wire bytes, without building pydantic models
+
+Author:
+Nilusink
+"""
+from time import time
+import typing as tp
+import json
+
+from ._common_functions import get_device_mac
+from ._message_types import Stamp
+from ._message_future import MessageFuture
+from .._tracking import Track, TrackUpdate
+from .._combined_result import CombinedResult
+from .._data_types import AngularTrack
+
+
+type Encodable = Track | TrackUpdate | CombinedResult
+
+# same layout as `DataMessage(data=TRes3DataMessage(...)).model_dump_json()`
+_TRES3_HEAD = (
+    '{"type":"data","id":%d,"time":%s,%s"data":{"type":"tres3","data":'
+    '{"track_id":%d,"track_type":%d,"position":[%s,%s,%s],"accuracy":%s,'
+    '"cam_angles":['
+)
+_TRES3_TAIL = ']}}}'
+_CAM_ANGLE3 = '{"cam_id":%d,"position":[%s,%s,%s],"direction":[%s,%s,%s]}'
+_STAMPS = '"stamps":[%s],'  # left out if there are none
+_STAMP = '[%s,%s,%d]'
+
+
+def format_float(value: float) -> str:
+    """
+    format a float like pydantic's json serializer does
+    """
+    r = repr(float(value))
+    if "e-" in r:
+        mantissa, exponent = r.split("e-")
+
+        # pydantic only switches to scientific notation below 1e-5
+        if exponent == "05":
+            sign = "-" if mantissa[0] == "-" else ""
+            return f"{sign}0.0000{mantissa.lstrip('-').replace('.', '')}"
+
+        return f"{mantissa}e-{int(exponent)}"
+
+    if r in ("inf", "-inf", "nan"):
+        return "null"
+
+    return r
+
+
+class WireEncoder:
+    """
+    Serializes `Track`s, `TrackUpdate`s and `CombinedResult`s to the same
+    bytes a `tres3` `DataMessage` would produce, using preformatted
+    templates and a reusable list of parts.
+    """
+    def __init__(self, encoding: str = "utf-8") -> None:
+        self.encoding = encoding
+        self._parts: list[str] = []
+        self._next_batch_id = 0
+
+    def encode_tres3(
+            self,
+            track_id: int,
+            track_type: int,
+            position: tuple[float, float, float],
+            accuracy: float,
+            cam_angles: tp.Iterable[AngularTrack] = (),
+            t: float | None = None,
+            stamps: tp.Iterable[Stamp] = (),
+            message_id: int | None = None
+    ) -> tuple[int, bytes]:
+        """
+        :param stamps: latency stamps (see `_latency.py`)
+        :param message_id: default: derived from `t` like `build_message`
+        :return: message id, message bytes
+        """
+        t = time() if t is None else t
+        if message_id is None:
+            message_id = int(t*1e6 + get_device_mac())
+
+        formatted_stamps = ",".join(
+            _STAMP % (json.dumps(stage), format_float(st), host)
+            for stage, st, host in stamps
+        )
+
+        parts = self._parts
+        parts.clear()
+        parts.append(_TRES3_HEAD % (
+            message_id,
+            format_float(t),
+            _STAMPS % formatted_stamps if formatted_stamps else "",
+            track_id,
+            track_type,
+            format_float(position[0]),
+            format_float(position[1]),
+            format_float(position[2]),
+            format_float(accuracy)
+        ))
+
+        first = True
+        for angle in cam_angles:
+            if not first:
+                parts.append(",")
+
+            first = False
+            pos = angle.position.xyz
+            direction = angle.direction.xyz
+            parts.append(_CAM_ANGLE3 % (
+                angle.cam_id,
+                format_float(pos[0]),
+                format_float(pos[1]),
+                format_float(pos[2]),
+                format_float(direction[0]),
+                format_float(direction[1]),
+                format_float(direction[2])
+            ))
+
+        parts.append(_TRES3_TAIL)
+        return message_id, "".join(parts).encode(self.encoding)
+
+    def encode(
+            self,
+            item: Encodable,
+            cam_angles: tp.Iterable[AngularTrack] = (),
+            accuracy: float | None = None,
+            t: float | None = None,
+            stamps: tp.Iterable[Stamp] = (),
+            message_id: int | None = None
+    ) -> tuple[int, bytes]:
+        """
+        :param accuracy: overrides the track accuracy (`TrackUpdate`s don't
+            have one and default to 0)
+        :return: message id, message bytes
+        """
+        if isinstance(item, CombinedResult):
+            cam_angles = item.camera_angles
+            item = item.track_update
+
+        if isinstance(item, Track):
+            return self.encode_tres3(
+                item.id,
+                item.track_type,
+                item.position.xyz,
+                item.accuracy if accuracy is None else accuracy,
+                cam_angles,
+                t,
+                stamps,
+                message_id
+            )
+
+        return self.encode_tres3(
+            item.track_id,
+            item.track_type,
+            item.pos.xyz,
+            0. if accuracy is None else accuracy,
+            cam_angles,
+            t,
+            stamps,
+            message_id
+        )
+
+    def encode_batch(
+            self,
+            items: tp.Iterable[Encodable],
+            t: float | None = None
+    ) -> list[tuple[int, bytes]]:
+        """
+        encode one message per item, all sharing the same timestamp
+        """
+        t = time() if t is None else t
+
+        # ids have to be unique: consecutive integers, not overlapping the
+        # previous batch (offsetting `t` by 1e-6 collides because of float
+        # rounding)
+        items = list(items)
+        base_id = max(int(t*1e6 + get_device_mac()), self._next_batch_id)
+        self._next_batch_id = base_id + len(items)
+
+        return [self.encode(item, t=t, message_id=base_id + i) for i, item in enumerate(items)]
+
+    def prepare(
+            self,
+            item: Encodable,
+            message_queue_callback: tp.Callable[[MessageFuture], None],
+            **kwargs
+    ) -> tuple[bytes, MessageFuture]:
+        """
+        like `prepare_message`, the future only builds the origin message
+        if it is accessed
+        """
+        _, payload = self.encode(item, **kwargs)
+
+        future = MessageFuture(origin_raw=payload)
+        message_queue_callback(future)
+
+        return payload, future
@@ -1,4 +1,22 @@
-from ._decoators import run_with_debug
-from ._console_colors import CC, get_fg_color
-from ._utils import get_caller_name, print_ic_style
-from ._debugger import DebugLevel, debugger
+"""
+debugging tools, submodules are imported on first access
+"""
+from ..logic._lazy import lazy_exports, TYPE_CHECKING
+
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "._decoators": ("run_with_debug",),
+    "._console_colors": ("CC", "get_fg_color"),
+    "._utils": ("get_caller_name", "print_ic_style"),
+    "._debugger": ("DebugLevel", "debugger"),
+    "._import_benchmark": ("benchmark_imports",),
+    "._profiler": ("Profiler", "ProfileCapture", "PROFILE_REQUEST"),
+})
+
+if TYPE_CHECKING:
+    from ._decoators import run_with_debug
+    from ._console_colors import CC, get_fg_color
+    from ._utils import get_caller_name, print_ic_style
+    from ._debugger import DebugLevel, debugger
+    from ._import_benchmark import benchmark_imports
+    from ._profiler import Profiler, ProfileCapture, PROFILE_REQUEST
@@ -9,7 +9,6 @@ Nilusink
 """
 from enum import IntEnum
 from os import PathLike
-from icecream import ic
 import types
 
 
@@ -109,6 +108,9 @@ class _Debugger:
         """
         actually writes / prints
         """
+        # icecream is slow to import, only load it once something is written
+        from icecream import ic
+
         prefix = ic.prefix()
         string_out = ""
 
@@ -0,0 +1,67 @@
+"""
+_import_benchmark.py
+19. October 2026
+
+measures the cold start import cost of the package and its subpackages
+
+usage: python -m <package>.debugging._import_benchmark
+
+Author:
+Nilusink
+"""
+from statistics import median
+import subprocess
+import sys
+import os
+
+
+# root package, this module lives in <root>.debugging (__spec__ also works
+# when run with -m)
+_ROOT = (__spec__.name if __spec__ else __name__).rsplit(".", 2)[0]
+
+SUBPACKAGES: tuple[str, ...] = ("", ".logic", ".debugging", ".comms")
+
+
+def _cold_import_us(module: str) -> int:
+    """
+    import `module` in a fresh interpreter
+
+    :return: cumulative import time in µs (from -X importtime)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    # "import time: self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def benchmark_imports(
+        modules: tuple[str, ...] = SUBPACKAGES,
+        repeat: int = 5
+) -> dict[str, int]:
+    """
+    :param modules: modules relative to the root package ("" is the root)
+    :return: {module: median cold import time in µs}
+    """
+    return {
+        module: int(median(_cold_import_us(_ROOT + module) for _ in range(repeat)))
+        for module in modules
+    }
+
+
+if __name__ == "__main__":
+    # also report what the first access of everything costs
+    modules = (*SUBPACKAGES, ".comms._message_types", ".debugging._debugger")
+
+    for name, us in benchmark_imports(modules).items():
+        print(f"{_ROOT + name:<40} {us / 1000:8.2f} ms")
@@ -0,0 +1,281 @@
+"""
+_profiler.py
+19. October 2026
+
+profiling captures that can be started at runtime (signal, request or
+api call) and end by themselves
+
+Author:
+Nilusink
+"""
+from threading import Lock, Thread, Timer, Event, current_thread, enumerate as threads
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from time import strftime, time
+import tracemalloc
+import typing as tp
+import cProfile
+import pstats
+import signal
+import sys
+import os
+
+from ._debugger import debugger
+
+if tp.TYPE_CHECKING:
+    from ..comms import ReqMessage, ReplData
+
+
+PROFILE_REQUEST = "profile"
+
+
+@dataclass
+class ProfileCapture:
+    directory: Path
+    started: float
+    duration: float
+    files: list[Path]
+
+
+class Profiler:
+    """
+    Captures for a bounded window of `duration` seconds:
+
+    * cProfile call statistics of all threads (`profile.pstats` and the
+      top `top_n` functions by cumulative time in `profile.txt`)
+    * the top `top_n` allocation sites that are still alive at the end
+      (`tracemalloc.txt`)
+    * stacks of all threads, sampled every `sample_interval` seconds, in
+      folded format for flame graphs (`stacks.folded`)
+
+    Every capture gets its own directory in `output_dir`. Once the window
+    ended, profiler, tracing and the sampling thread are stopped again, so
+    there is no overhead outside of captures.
+    """
+    def __init__(
+            self,
+            output_dir: str | os.PathLike = "profiles",
+            duration: float = 10.,
+            sample_interval: float = .005,
+            top_n: int = 30,
+            trace_frames: int = 8
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.duration = duration
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        self.trace_frames = trace_frames
+
+        self._lock = Lock()
+        self._running = False
+        self._started = 0.
+        self._capture_duration = 0.
+        self._profile: cProfile.Profile | None = None
+        self._started_tracing = False
+        self._timer: Timer | None = None
+        self._sampler: Thread | None = None
+        self._done = Event()
+        self._signalled = Event()
+        self._signal_watcher: Thread | None = None
+        self._stacks: Counter[str] = Counter()
+        self._last: ProfileCapture | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def last_capture(self) -> ProfileCapture | None:
+        return self._last
+
+    def start(self, duration: float | None = None) -> bool:
+        """
+        start a capture, it stops by itself after `duration` seconds
+
+        :return: False if a capture is already running
+        """
+        with self._lock:
+            if self._running:
+                return False
+
+            self._running = True
+            self._started = time()
+            self._capture_duration = self.duration if duration is None else duration
+            self._stacks = Counter()
+
+            # only one profiler can be active per interpreter
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+
+            except ValueError:
+                debugger.warning("another profiler is active, capturing without call statistics")
+                self._profile = None
+
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(self.trace_frames)
+
+            self._done.clear()
+            self._sampler = Thread(target=self._sample, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+            self._timer = Timer(self._capture_duration, self.stop)
+            self._timer.name = "profiler-timer"
+            self._timer.daemon = True
+            self._timer.start()
+
+        debugger.info(f"started profiling capture ({self._capture_duration} s)")
+        return True
+
+    def stop(self) -> ProfileCapture | None:
+        """
+        end the running capture early and write the results
+
+        :return: the capture, None if none was running
+        """
+        with self._lock:
+            if not self._running:
+                return None
+
+            if self._profile is not None:
+                self._profile.disable()
+
+            self._done.set()
+            if self._sampler is not current_thread():
+                self._sampler.join()
+
+            if self._timer is not current_thread():
+                self._timer.cancel()
+
+            allocations = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            if self._started_tracing:
+                tracemalloc.stop()
+
+            capture = self._write(allocations)
+
+            self._profile = None
+            self._sampler = None
+            self._timer = None
+            self._running = False
+            self._last = capture
+
+        debugger.info(f"wrote profiling capture to {capture.directory}")
+        return capture
+
+    def install_signal(self, signum: int = getattr(signal, "SIGUSR1", signal.SIGINT)) -> None:
+        """
+        start a capture with the default duration when the process receives
+        `signum` (e.g. `kill -USR1 <pid>`), has to be called from the main
+        thread
+        """
+        # the handler interrupts the main thread anywhere, even in `start`
+        # or `stop` while they hold the lock, so it only wakes up a thread
+        if self._signal_watcher is None:
+            self._signal_watcher = Thread(target=self._watch_signal, name="profiler-signal", daemon=True)
+            self._signal_watcher.start()
+
+        signal.signal(signum, lambda *_: self._signalled.set())
+
+    def handle_request(self, message: "ReqMessage") -> "ReplData | None":
+        """
+        handle a "profile" or "profile <seconds>" request
+
+        :return: reply, None if the request isn't a profiling request
+        """
+        from ..comms import ReplData
+
+        command, *args = message.data.req.split()
+        if command != PROFILE_REQUEST:
+            return None
+
+        try:
+            duration = float(args[0]) if args else None
+
+        except ValueError:
+            return ReplData(to=message.id, data={"started": False, "error": "invalid duration"})
+
+        started = self.start(duration)
+        return ReplData(to=message.id, data={
+            "started": started,
+            "duration": self._capture_duration,
+            "output_dir": str(self.output_dir.resolve())
+        })
+
+    # internal functions
+    def _watch_signal(self) -> None:
+        while True:
+            self._signalled.wait()
+            self._signalled.clear()
+            self.start()
+
+    def _sample(self) -> None:
+        # keep the sampler out of the call statistics (a profiler that
+        # covers all threads still sees it, so it calls as little as possible)
+        sys.setprofile(None)
+
+        own = current_thread().ident
+        names = {}
+        labels = {}
+
+        while not self._done.wait(self.sample_interval):
+            if len(names) != len(threads()):
+                names = {thread.ident: thread.name for thread in threads()}
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = f"{code.co_qualname} ({os.path.basename(code.co_filename)}"
+
+                    stack.append(f"{label}:{frame.f_lineno})")
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def _write(self, allocations: tracemalloc.Snapshot | None) -> ProfileCapture:
+        name = strftime("%Y%m%d-%H%M%S")
+        directory = self.output_dir / name
+        n = 0
+        while directory.exists():
+            n += 1
+            directory = self.output_dir / f"{name}-{n}"
+
+        directory.mkdir(parents=True)
+        files = []
+
+        if self._profile is not None:
+            self._profile.dump_stats(directory / "profile.pstats")
+
+            with open(directory / "profile.txt", "w") as out:
+                stats = pstats.Stats(self._profile, stream=out)
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+
+            files += [directory / "profile.pstats", directory / "profile.txt"]
+
+        if allocations is not None:
+            with open(directory / "tracemalloc.txt", "w") as out:
+                for stat in allocations.statistics("lineno")[:self.top_n]:
+                    out.write(f"{stat}\n")
+
+            files.append(directory / "tracemalloc.txt")
+
+        with open(directory / "stacks.folded", "w") as out:
+            for stack, count in self._stacks.most_common():
+                out.write(f"{stack} {count}\n")
+
+        files.append(directory / "stacks.folded")
+
+        return ProfileCapture(
+            directory=directory,
+            started=self._started,
+            duration=time() - self._started,
+            files=files
+        )
@@ -7,7 +7,6 @@ generally useful functions
 Author:
 Nilusink
 """
-from icecream import ic
 import inspect
 
 from ._console_colors import get_fg_color, CC
@@ -24,6 +23,8 @@ def get_caller_name() -> str:
 
 
 def print_ic_style(*values, sep=" ") -> None:
+    from icecream import ic
+
     prefix = ic.prefix
     if not isinstance(prefix, str):
         prefix = prefix()
@@ -1,2 +1,17 @@
-from ._utility_classes import BetterDict, SimpleLock
-from ._utility_functions import classname
+"""
+utility classes and functions, submodules are imported on first access
+"""
+from ._lazy import lazy_exports, TYPE_CHECKING
+
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    "._utility_classes": ("BetterDict", "SimpleLock"),
+    "._utility_functions": ("classname",),
+    "._timer_wheel": ("TimerWheel",),
+    "._lazy": ("lazy_exports",),
+})
+
+if TYPE_CHECKING:
+    from ._utility_classes import BetterDict, SimpleLock
+    from ._utility_functions import classname
+    from ._timer_wheel import TimerWheel
@@ -0,0 +1,68 @@
+"""
+_lazy.py
+19. October 2026
+
+module level lazy loading of package exports
+
+Author:
+Nilusink
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+
+# typing is slow to import, this module is imported by every package init
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing as tp
+
+
+def lazy_exports(
+        package: str,
+        exports: dict[str, tuple[str, ...]],
+        subpackages: tuple[str, ...] = ()
+) -> tuple[tp.Callable[[str], tp.Any], tp.Callable[[], list[str]], list[str]]:
+    """
+    build `__getattr__`, `__dir__` and `__all__` for a package that only
+    imports its submodules once one of their exports is accessed
+
+    :param package: `__name__` of the package
+    :param exports: {relative module: names it exports}
+    :param subpackages: relative subpackages whose exports are re-exported
+    """
+    names = {name: module for module, members in exports.items() for name in members}
+    subpackage_names = {sub.lstrip("."): sub for sub in subpackages}
+
+    def _sub(relative: str) -> tp.Any:
+        return importlib.import_module(relative, package)
+
+    def __getattr__(name: str) -> tp.Any:
+        if name in names:
+            value = getattr(_sub(names[name]), name)
+
+        elif name in subpackage_names:
+            value = _sub(subpackage_names[name])
+
+        else:
+            for sub in subpackages:
+                module = _sub(sub)
+                if name in module.__all__:
+                    value = getattr(module, name)
+                    break
+
+            else:
+                raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        # cache, next access doesn't go through here
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(sys.modules[package])) | set(__all__))
+
+    __all__ = sorted(names) + list(subpackage_names)
+    for sub in subpackages:
+        __all__ += _sub(sub).__all__
+
+    return __getattr__, __dir__, __all__
@@ -0,0 +1,110 @@
+"""
+_timer_wheel.py
+19. October 2026
+
+hierarchical (tick based) timer wheel
+
+Author:
+Nilusink
+"""
+import typing as tp
+
+
+class TimerWheel[K: tp.Hashable]:
+    """
+    hierarchical timer wheel
+
+    Timers are stored in `levels` wheels of 2**slot_bits slots each. Only the
+    slot of the current tick is looked at, upper wheels are cascaded down when
+    the lower one wraps, so advancing one tick costs O(timers expiring).
+    Timers can't be cancelled, the owner has to ignore stale keys.
+    """
+    def __init__(
+            self,
+            slot_bits: int = 6,
+            levels: int = 4,
+            start_tick: int = 0
+    ) -> None:
+        self._bits = slot_bits
+        self._levels = levels
+        self._mask = (1 << slot_bits) - 1
+        self._now = start_tick
+        self._count = 0
+
+        self._wheels: list[list[list[tuple[int, K]]]] = [
+            [[] for _ in range(1 << slot_bits)] for _ in range(levels)
+        ]
+
+        # timers further away than the whole wheel can hold
+        self._overflow: list[tuple[int, K]] = []
+
+    @property
+    def now(self) -> int:
+        return self._now
+
+    def __len__(self) -> int:
+        return self._count
+
+    def schedule(self, key: K, deadline: int) -> None:
+        """
+        schedule `key` to expire at tick `deadline`
+        (deadlines in the past expire on the next tick)
+        """
+        self._count += 1
+        self._insert(max(deadline, self._now + 1), key)
+
+    def advance(self, to_tick: int | None = None) -> list[K]:
+        """
+        advance the wheel to `to_tick` (default: one tick)
+
+        :return: all keys that expired on the way
+        """
+        if to_tick is None:
+            to_tick = self._now + 1
+
+        expired: list[K] = []
+        while self._now < to_tick:
+            self._now += 1
+            self._cascade()
+
+            slot = self._wheels[0][self._now & self._mask]
+            if slot:
+                self._wheels[0][self._now & self._mask] = []
+                expired.extend(key for _, key in slot)
+
+        self._count -= len(expired)
+        return expired
+
+    # internal functions
+    def _insert(self, deadline: int, key: K) -> None:
+        delta = deadline - self._now
+
+        for level in range(self._levels):
+            if delta < 1 << (self._bits * (level + 1)):
+                slot = (deadline >> (self._bits * level)) & self._mask
+                self._wheels[level][slot].append((deadline, key))
+                return
+
+        self._overflow.append((deadline, key))
+
+    def _cascade(self) -> None:
+        """
+        move the timers of every wrapped upper wheel down
+        """
+        for level in range(1, self._levels):
+            if self._now & ((1 << (self._bits * level)) - 1):
+                return
+
+            slot = (self._now >> (self._bits * level)) & self._mask
+            entries = self._wheels[level][slot]
+            self._wheels[level][slot] = []
+
+            for deadline, key in entries:
+                self._insert(deadline, key)
+
+        # the top wheel wrapped, re-check the far away timers
+        if self._overflow and not self._now & ((1 << (self._bits * self._levels)) - 1):
+            entries, self._overflow = self._overflow, []
+
+            for deadline, key in entries:
+                self._insert(deadline, key)
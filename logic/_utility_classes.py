@@ -10,7 +10,6 @@ Nilusink, melektron
 from time import perf_counter
 import typing as tp
 import math as m
-import asyncio
 import inspect
 
 